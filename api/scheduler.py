@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from models.models import User
+from core.user import get_current_user
+from core.scheduler import scheduler
+
+router = APIRouter()
+
+@router.get("/status")
+async def get_scheduler_status(
+    user: User = Depends(get_current_user)
+):
+    """获取调度器各阶段的队列深度与运行状态"""
+    return {
+        "status": "success",
+        "data": scheduler.status()
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_scheduler_job(
+    job_id: str,
+    user: User = Depends(get_current_user)
+):
+    """查询立即检查任务的进度"""
+    job = scheduler.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    return {
+        "status": "success",
+        "data": job
+    }
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 
 from models.session import get_db
 from models.models import User, Source
 
 from core.user import get_current_user, get_current_admin_user
-from core.sources import get_all_sources
+from core.sources import get_all_sources, clear_feed_state
+from core.scheduler import scheduler
+from core.feed_router import compile_route
+from core.item_filter import ItemFilter
 
-from schemas.source import SourceBase, AnalyzeSourceResponse, AnalyzeSourceRequest
+from schemas.source import SourceBase, SourceUpdate, AnalyzeSourceResponse, AnalyzeSourceRequest
 
 import logging
 
@@ -54,14 +57,27 @@ async def list_sources(
                     "media_type": source.media_type,
                     "season": source.season,
                     "multi_season": source.multi_season,
+                    "skip_unwanted_files": source.skip_unwanted_files,
                     "episode_offset": source.episode_offset,
                     "episode_regex": source.episode_regex,
                     "use_ai_episode": source.use_ai_episode,
                     "check_interval": source.check_interval,
+                    "min_check_interval": source.min_check_interval,
+                    "max_check_interval": source.max_check_interval,
                     "created_at": source.created_at.isoformat(),
                     "last_check": source.last_check.isoformat() if source.last_check else None,
+                    "next_check": source.next_check.isoformat() if source.next_check else None,
                     "outdated": source.outdated,
-                    "tmdb_id": source.tmdb_id
+                    "tmdb_id": source.tmdb_id,
+                    "router_id": source.router_id,
+                    "route_pattern": source.route_pattern,
+                    "route_use_regex": source.route_use_regex,
+                    "filter_include": source.filter_include,
+                    "filter_exclude": source.filter_exclude,
+                    "filter_resolutions": source.filter_resolutions,
+                    "filter_subgroups": source.filter_subgroups,
+                    "filter_min_size_mb": source.filter_min_size_mb,
+                    "filter_max_size_mb": source.filter_max_size_mb
                 }
                 for source in sources
             ]
@@ -93,14 +109,27 @@ async def get_source_detail(
             "media_type": source.media_type,
             "season": source.season,
             "multi_season": source.multi_season,
+            "skip_unwanted_files": source.skip_unwanted_files,
             "episode_offset": source.episode_offset,
             "episode_regex": source.episode_regex,
             "use_ai_episode": source.use_ai_episode,
             "check_interval": source.check_interval,
+            "min_check_interval": source.min_check_interval,
+            "max_check_interval": source.max_check_interval,
             "created_at": source.created_at.isoformat(),
             "last_check": source.last_check.isoformat() if source.last_check else None,
+            "next_check": source.next_check.isoformat() if source.next_check else None,
             "outdated": source.outdated,
-            "tmdb_id": source.tmdb_id
+            "tmdb_id": source.tmdb_id,
+            "router_id": source.router_id,
+            "route_pattern": source.route_pattern,
+            "route_use_regex": source.route_use_regex,
+            "filter_include": source.filter_include,
+            "filter_exclude": source.filter_exclude,
+            "filter_resolutions": source.filter_resolutions,
+            "filter_subgroups": source.filter_subgroups,
+            "filter_min_size_mb": source.filter_min_size_mb,
+            "filter_max_size_mb": source.filter_max_size_mb
         }
     )
 
@@ -115,16 +144,109 @@ async def create_source(
     source_data = source_in.model_dump()
     if not source_data.get("type"):
         source_data["type"] = _detect_source_type(source_in.url)
+    if source_data["type"] == "routed":
+        # 节目源没有独立的feed，条目由所属的聚合订阅源按路由规则分发
+        router_source = await db.get(Source, source_data.get("router_id") or 0)
+        if not router_source or router_source.type != "router":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="所属的聚合订阅源不存在"
+            )
+        try:
+            compile_route(source_data.get("route_pattern"), source_data.get("route_use_regex", False))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        source_data["url"] = router_source.url
+        # 聚合订阅源已处理过的条目对新节目源还未分发过，清除抓取状态，下次检查时重新处理所有条目
+        clear_feed_state(router_source)
+    else:
+        source_data["router_id"] = None
+        source_data["route_pattern"] = None
+    try:
+        ItemFilter(
+            source_data.get("filter_include"),
+            source_data.get("filter_exclude"),
+            source_data.get("filter_resolutions"),
+            source_data.get("filter_subgroups"),
+            source_data.get("filter_min_size_mb"),
+            source_data.get("filter_max_size_mb"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    min_interval, max_interval = source_data.get("min_check_interval"), source_data.get("max_check_interval")
+    if min_interval is not None and max_interval is not None and min_interval > max_interval:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="最短检查间隔不能大于最长检查间隔"
+        )
     new_source = Source(**source_data)
     db.add(new_source)
     await db.commit()
     await db.refresh(new_source)
+    # 新来源走快速通道立即检查，之后再进入后台的定期检查队列
+    job_id = scheduler.check_source_now(new_source.id)
     logger.info(f"已创建来源 ID:{new_source.id}")
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
-        content={"status": "success"}
+        content={"status": "success", "job_id": job_id}
     )
 
+@router.patch("/{source_id}")
+async def update_source(
+    source_id: int,
+    source_in: SourceUpdate,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_admin_user)
+):
+    """修改来源的设置，只更新请求中给出的字段"""
+    from core.sources import get_source_by_id
+    source = await get_source_by_id(db, source_id)
+    if not source:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="源不存在"
+        )
+    
+    update_data = source_in.model_dump(exclude_unset=True)
+    update_data.pop("enable_sr", None)  # 没有对应的来源字段
+    # 不可为空的字段传null时视为不修改，其余字段传null表示清除
+    for field in ("title", "multi_season", "skip_unwanted_files", "episode_offset", "use_ai_episode", "check_interval"):
+        if update_data.get(field, 0) is None:
+            del update_data[field]
+    # 按修改后的完整规则校验过滤规则
+    filter_rules = {
+        field: update_data.get(field, getattr(source, field))
+        for field in ("filter_include", "filter_exclude", "filter_resolutions",
+                      "filter_subgroups", "filter_min_size_mb", "filter_max_size_mb")
+    }
+    try:
+        ItemFilter(
+            filter_rules["filter_include"],
+            filter_rules["filter_exclude"],
+            filter_rules["filter_resolutions"],
+            filter_rules["filter_subgroups"],
+            filter_rules["filter_min_size_mb"],
+            filter_rules["filter_max_size_mb"],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    min_interval = update_data.get("min_check_interval", source.min_check_interval)
+    max_interval = update_data.get("max_check_interval", source.max_check_interval)
+    if min_interval is not None and max_interval is not None and min_interval > max_interval:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="最短检查间隔不能大于最长检查间隔"
+        )
+    
+    for field, value in update_data.items():
+        setattr(source, field, value)
+    if update_data.keys() & {"check_interval", "min_check_interval", "max_check_interval"}:
+        # 按新的检查间隔重新安排下次检查，不必等到按旧设置安排的检查
+        await scheduler.reschedule_source(db, source)
+    await db.commit()
+    logger.info(f"已更新来源 ID:{source_id}: {sorted(update_data)}")
+    return {"status": "success"}
+
 @router.post("/analyze", response_model=AnalyzeSourceResponse)
 async def analyze_source(
     request: AnalyzeSourceRequest,
@@ -209,8 +331,12 @@ async def delete_source(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="来源不存在"
         )
+    if db_obj.type == "router":
+        # 删除聚合订阅源时保留其下的节目源（不再接收新条目）
+        await db.execute(update(Source).where(Source.router_id == source_id).values(router_id=None))
     await db.delete(db_obj)
     await db.commit()
+    scheduler.unschedule_source(source_id)
     logger.info(f"已删除来源 ID:{source_id}")
     return {"status": "success", "message": "来源已删除"}
 
@@ -229,15 +355,49 @@ async def reset_source_check_time(
             detail="来源不存在"
         )
     
+    # 节目源的条目来自聚合订阅源，重置聚合订阅源
+    feed_obj = db_obj
+    if db_obj.type == "routed" and db_obj.router_id:
+        feed_obj = await get_source_by_id(db, db_obj.router_id) or db_obj
+    
     # 更新为很早的时间，确保下次检查会处理所有内容
     from datetime import datetime, timezone
     past_time = datetime(2000, 1, 1, tzinfo=timezone.utc)
-    db_obj.last_check = past_time
+    feed_obj.last_check = past_time
+    # 清除条件请求信息，下次检查时完整抓取并处理所有条目
+    clear_feed_state(feed_obj)
+    feed_obj.next_check = None
     await db.commit()
-    await db.refresh(db_obj)  # 刷新对象以获取最新数据
+    await db.refresh(feed_obj)  # 刷新对象以获取最新数据
+    if feed_obj.type in ("rss", "router"):
+        scheduler.schedule_source(feed_obj.id)
+    
+    logger.info(f"已重置来源 ID:{source_id} 的检查时间（feed来源 ID:{feed_obj.id}）")
+    return {
+        "status": "success",
+        "message": "已重置来源的检查时间",
+        "feed_source_id": feed_obj.id,
+        "last_check": feed_obj.last_check.isoformat()
+    }
+
+@router.post("/{source_id}/check-now", response_model=dict)
+async def check_source_now(
+    source_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_admin_user)
+):
+    """立即检查来源（抓取、入库并添加到qBittorrent），返回可轮询进度的任务ID"""
+    from core.sources import get_source_by_id
+    db_obj = await get_source_by_id(db, source_id)
+    if not db_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="来源不存在"
+        )
     
-    logger.info(f"已重置来源 ID:{source_id} 的检查时间")
-    return {"status": "success", "message": "已重置来源的检查时间"}
+    job_id = scheduler.check_source_now(source_id)
+    logger.info(f"已开始立即检查来源 ID:{source_id}，任务ID:{job_id}")
+    return {"status": "success", "job_id": job_id}
 
 @router.post("/generate-regex", response_model=dict)
 async def generate_episode_regex(
@@ -257,7 +417,7 @@ async def generate_episode_regex(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     content={"status": "error", "message": "无法获取RSS源数据"}
                 )
-            first_item_title = item["title"]
+            first_item_title = item.title or ""
             full_title_list = first_item_title
         else: # Get torrent file list and generate regex from file names
             from utils.magnet import get_file_list
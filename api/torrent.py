@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Form
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Form, Header, Query, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -7,6 +10,7 @@ from models.session import get_db
 from models.models import Torrent, File, Source, User
 from core.user import get_current_user
 from core.scheduler import scheduler
+from core.config import CONFIG
 
 router = APIRouter()
 
@@ -49,7 +53,9 @@ async def get_source_torrents(
                 "created_at": torrent.created_at.isoformat(),
                 "started_at": torrent.started_at.isoformat() if torrent.started_at else None,
                 "completed_at": torrent.completed_at.isoformat() if torrent.completed_at else None,
-                "error_message": torrent.error_message
+                "error_message": torrent.error_message,
+                "retry_count": torrent.retry_count,
+                "next_retry_at": torrent.next_retry_at.isoformat() if torrent.next_retry_at else None
             }
             for torrent in torrents
         ]
@@ -174,3 +180,24 @@ async def get_file_info(
                 "message": f"获取文件信息失败: {str(e)}"
             }
         )
+
+@router.post("/hook/completed")
+async def torrent_completed_hook(
+    torrent_hash: str = Query(..., alias="hash"),
+    token: Optional[str] = None,
+    x_hook_token: Optional[str] = Header(None)
+):
+    """qBittorrent下载完成回调：立即将种子送入后处理（使用配置中的令牌认证）"""
+    expected = CONFIG.download.completion_hook_token
+    provided = token or x_hook_token or ""
+    if not expected or not secrets.compare_digest(provided, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的回调令牌"
+        )
+    
+    queued = await scheduler.handle_completion_hook(torrent_hash)
+    return {
+        "status": "success" if queued else "ignored",
+        "queued": queued
+    }
@@ -0,0 +1,90 @@
+"""
+RSS源检查间隔的模拟对比：固定检查间隔（旧实现） vs 按发布历史自适应（core.release_cadence）
+
+模拟若干部周更番剧：每周固定时刻发布，带随机偏差、偶尔大幅延迟和停播周。
+统计每个源每周的feed请求数，以及从发布到被检查发现的延迟。
+
+用法（在项目根目录运行）：
+    python -m benchmarks.adaptive_polling --shows 50 --weeks 12
+    python -m benchmarks.adaptive_polling --fixed 1800 --min-interval 300 --max-interval 21600
+"""
+import argparse
+import random
+import statistics
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from core.release_cadence import ReleaseCadence
+
+START = datetime(2024, 10, 1)
+
+
+def make_releases(rng: random.Random, weeks: int) -> List[datetime]:
+    """一部周更番剧的发布时间"""
+    phase = timedelta(seconds=rng.uniform(0, 7 * 86400))
+    releases = []
+    for week in range(weeks):
+        if rng.random() < 0.08:
+            continue  # 停播周
+        jitter = rng.gauss(0, 20 * 60)
+        if rng.random() < 0.1:
+            jitter += rng.uniform(1, 6) * 3600  # 偶尔大幅延迟
+        releases.append(START + timedelta(weeks=week) + phase + timedelta(seconds=jitter))
+    return releases
+
+
+def simulate(releases: List[datetime], end: datetime, next_check) -> Tuple[int, List[float]]:
+    """按next_check(now, 已发现的发布时间)安排检查，返回 (请求数, 每次发布的发现延迟秒数)"""
+    now = START
+    polls = 0
+    seen: List[datetime] = []
+    latencies: List[float] = []
+    pending = list(releases)
+    while now < end:
+        polls += 1
+        while pending and pending[0] <= now:
+            released = pending.pop(0)
+            seen.append(released)
+            latencies.append((now - released).total_seconds())
+        now = next_check(now, seen)
+    return polls, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shows", type=int, default=50, help="模拟的番剧数量")
+    parser.add_argument("--weeks", type=int, default=12, help="模拟的周数")
+    parser.add_argument("--fixed", type=int, default=3600, help="固定检查间隔（秒）")
+    parser.add_argument("--min-interval", type=int, default=600, help="自适应：发布窗口内的检查间隔（秒）")
+    parser.add_argument("--max-interval", type=int, default=14400, help="自适应：窗口外的最长检查间隔（秒）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    end = START + timedelta(weeks=args.weeks)
+    shows = [make_releases(rng, args.weeks) for _ in range(args.shows)]
+
+    def fixed(now, seen):
+        return now + timedelta(seconds=args.fixed)
+
+    def adaptive(now, seen):
+        cadence = ReleaseCadence.learn(seen)
+        if cadence is None:
+            return fixed(now, seen)
+        return cadence.next_check(now, args.min_interval, args.max_interval)
+
+    print(f"--- {args.shows} weekly shows, {args.weeks} weeks")
+    for name, policy in (("fixed interval (legacy)", fixed), ("adaptive (release cadence)", adaptive)):
+        polls, latencies = 0, []
+        for releases in shows:
+            show_polls, show_latencies = simulate(releases, end, policy)
+            polls += show_polls
+            latencies += show_latencies
+        latencies.sort()
+        p90 = latencies[int(len(latencies) * 0.9)]
+        print(f"{name:<28} requests/source/week={polls / args.shows / args.weeks:6.1f}  "
+              f"latency median={statistics.median(latencies) / 60:5.1f}min  p90={p90 / 60:6.1f}min")
+
+
+if __name__ == "__main__":
+    main()
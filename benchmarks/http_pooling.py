@@ -0,0 +1,110 @@
+"""
+对外HTTP请求的连接复用对比：每次请求新建 ClientSession（旧实现） vs 共享连接池（utils.http）
+
+在本地启动一个HTTPS测试服务器（自签名证书，需要 openssl 命令），统计服务端看到的
+TCP连接数和总耗时。每个新连接都要经过一次 TCP + TLS 握手。
+
+用法（在项目根目录运行，需要 config.yaml）：
+    python -m benchmarks.http_pooling --requests 200 --concurrency 8
+    python -m benchmarks.http_pooling --no-tls
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+from utils.http import close_http, http_request
+
+FEED = "<rss><channel><title>bench</title>" + "<item><title>[Group] Show - 01</title></item>" * 50 + "</channel></rss>"
+
+
+class ConnectionCounter:
+    """按客户端地址统计服务端接受的连接数"""
+
+    def __init__(self):
+        self.peers = set()
+        self.requests = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.requests += 1
+        return web.Response(text=FEED, content_type="application/rss+xml")
+
+
+def make_ssl_context(tmp: str) -> ssl.SSLContext:
+    cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def fetch_new_session(url: str) -> None:
+    """旧实现：每次请求创建并关闭一个会话"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, ssl=False, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            await response.read()
+
+
+async def fetch_shared(url: str) -> None:
+    async with http_request("GET", url, ssl=False, proxy=None) as response:
+        await response.read()
+
+
+async def run_case(name: str, fetch, url: str, counter: ConnectionCounter, total: int, concurrency: int) -> None:
+    counter.peers.clear()
+    counter.requests = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await fetch(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} requests={counter.requests:<5} connections={len(counter.peers):<5} "
+          f"time={elapsed * 1000:.1f}ms ({elapsed * 1000 / total:.2f}ms/req)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时进行的请求数")
+    parser.add_argument("--no-tls", action="store_true", help="使用明文HTTP（只比较TCP握手）")
+    parser.add_argument("--port", type=int, default=18443)
+    args = parser.parse_args()
+
+    counter = ConnectionCounter()
+    app = web.Application()
+    app.router.add_get("/rss", counter.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ssl_context = None if args.no_tls else make_ssl_context(tmp)
+        await web.TCPSite(runner, "127.0.0.1", args.port, ssl_context=ssl_context).start()
+        scheme = "http" if args.no_tls else "https"
+        url = f"{scheme}://127.0.0.1:{args.port}/rss"
+
+        print(f"--- {args.requests} requests, concurrency {args.concurrency}, {scheme}")
+        try:
+            await run_case("session per request (legacy)", fetch_new_session, url, counter, args.requests, args.concurrency)
+            await run_case("shared pool (utils.http)", fetch_shared, url, counter, args.requests, args.concurrency)
+        finally:
+            await close_http()
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+RSS条目入库的数据库往返次数对比：逐条 SELECT + 提交（旧实现） vs 按feed批量去重 + 批量插入
+
+用法（在项目根目录运行，需要 config.yaml）：
+    python -m benchmarks.rss_dedup_roundtrips --items 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.base import Base
+from models.models import Source, Torrent
+from core.scheduler import AutoBangumiScheduler
+from utils.qbittorrent import QBittorrentClient
+from utils.rss import FeedItem
+
+
+def make_items(count: int, offset: int = 0) -> list[FeedItem]:
+    return [
+        FeedItem(
+            title=f"[Group] Show - {i:02d} [1080p]",
+            magnet=f"magnet:?xt=urn:btih:{i:040x}&dn=Show+{i:02d}",
+        )
+        for i in range(offset, offset + count)
+    ]
+
+
+class RoundTripCounter:
+    """统计SQL语句和COMMIT次数"""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+
+async def legacy_ingest(db: AsyncSession, source: Source, items: list[FeedItem]) -> None:
+    """旧实现：每个条目一次hash查询，每个新种子一次提交"""
+    for item in items:
+        magnet_url = item.magnet
+        torrent_hash = QBittorrentClient.extract_hash_from_magnet(magnet_url)
+        existing = await db.execute(select(Torrent).where(Torrent.hash == torrent_hash))
+        if existing.scalar_one_or_none():
+            continue
+        db.add(Torrent(
+            hash=torrent_hash,
+            source_id=source.id,
+            url=magnet_url,
+            title=item.title,
+            status="pending",
+            download_progress=0.0,
+            created_at=datetime.utcnow(),
+        ))
+        await db.commit()
+
+
+async def batched_ingest(db: AsyncSession, source: Source, items: list[FeedItem]) -> None:
+    await AutoBangumiScheduler()._ingest_rss_items(db, source, items)
+    await db.commit()
+
+
+async def run_case(name: str, ingest, items: list[FeedItem], preload: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            source = Source(type="rss", url="https://example.com/rss", media_type="tv", title="Show")
+            db.add(source)
+            await db.commit()
+            # 预先写入已存在的种子，模拟稳定状态下的轮询
+            await batched_ingest(db, source, items[:preload])
+
+            counter = RoundTripCounter(engine)
+            start = time.perf_counter()
+            await ingest(db, source, items)
+            elapsed = time.perf_counter() - start
+
+        print(f"{name:<28} statements={counter.statements:<5} commits={counter.commits:<5} "
+              f"round_trips={counter.total:<5} time={elapsed * 1000:.1f}ms")
+        await engine.dispose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100, help="每个feed的条目数")
+    parser.add_argument("--new", type=int, default=5, help="其中新条目的数量（混合场景）")
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    scenarios = [
+        ("unchanged feed", args.items),
+        (f"{args.new} new items", args.items - args.new),
+        ("all new items", 0),
+    ]
+    for label, preload in scenarios:
+        print(f"--- {label} ({args.items} items/feed)")
+        await run_case("per-item (legacy)", legacy_ingest, items, preload)
+        await run_case("set-based (current)", batched_ingest, items, preload)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+RSS条目磁力链接提取的耗时对比：每个条目构造 BeautifulSoup（旧实现） vs 预编译正则 + lxml兜底（utils.rss）
+
+默认使用生成的500条目feed（仿dmhy的描述HTML，每条目带磁力链接）；也可以用 --feed 指定录制的feed文件。
+
+用法（在项目根目录运行，需要 config.yaml）：
+    python -m benchmarks.rss_magnet_extract --items 500 --rounds 20
+    python -m benchmarks.rss_magnet_extract --feed recorded.xml
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+from html import escape
+
+from bs4 import BeautifulSoup
+
+from utils.rss import FeedStream, extract_magnet_link
+
+
+def make_feed(count: int) -> str:
+    items = []
+    for i in range(count):
+        title = f"[LoliHouse] Show Title - {i % 24 + 1:02d} [WebRip 1080p HEVC-10bit AAC][简繁内封字幕]"
+        magnet = f"magnet:?xt=urn:btih:{i:040x}&amp;dn={i}&amp;tr=http%3A%2F%2Ft.acg.rip%3A6699%2Fannounce"
+        description = (
+            f'<p><img src="https://example.com/cover/{i}.jpg" alt="" /></p>'
+            f'<p>字幕：LoliHouse<br />压制：LoliHouse<br />来源：Baha</p>'
+            f'<p>本作品的播放器推荐：<a href="https://example.com/player">PotPlayer</a></p>'
+            f'<p><a href="https://example.com/topics/{i}">详情</a> | <a href="{magnet}">磁力链接</a></p>'
+        )
+        items.append(
+            f"<item><title>{escape(title)}</title><link>https://example.com/topics/{i}</link>"
+            f"<description>{escape(description)}</description><guid>https://example.com/topics/{i}</guid>"
+            f"<pubDate>Sat, 05 Oct 2024 12:00:00 +0800</pubDate></item>"
+        )
+    return f"<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel><title>bench</title>{''.join(items)}</channel></rss>"
+
+
+def soup_extract(description: str):
+    """旧实现：BeautifulSoup解析描述，取第一个magnet链接"""
+    for link in BeautifulSoup(description, "html.parser").find_all("a"):
+        href = link.get("href")
+        if href and isinstance(href, str) and href.startswith("magnet:"):
+            return href
+    return None
+
+
+def timed(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500, help="生成feed的条目数")
+    parser.add_argument("--rounds", type=int, default=20, help="重复次数")
+    parser.add_argument("--feed", help="录制的RSS文件，指定后忽略 --items")
+    args = parser.parse_args()
+
+    if args.feed:
+        with open(args.feed, encoding="utf-8") as f:
+            content = f.read()
+    else:
+        content = make_feed(args.items)
+
+    descriptions = [item.findtext("description") or "" for item in ET.fromstring(content).iter("item")]
+    old = [soup_extract(d) for d in descriptions]
+    new = [extract_magnet_link(d) for d in descriptions]
+    mismatches = sum(1 for a, b in zip(old, new) if a != b)
+    print(f"--- {len(descriptions)} items, {sum(1 for m in new if m)} with magnet links, mismatches={mismatches}")
+
+    soup_time = timed(lambda: [soup_extract(d) for d in descriptions], args.rounds)
+    fast_time = timed(lambda: [extract_magnet_link(d) for d in descriptions], args.rounds)
+    print(f"{'extract: BeautifulSoup':<28} {soup_time * 1000:8.2f}ms/feed")
+    print(f"{'extract: regex (current)':<28} {fast_time * 1000:8.2f}ms/feed  ({soup_time / fast_time:.0f}x)")
+
+    def legacy_parse():
+        for item in ET.fromstring(content).iter("item"):
+            soup_extract(item.findtext("description") or "")
+
+    legacy_time = timed(legacy_parse, args.rounds)
+    stream_time = timed(lambda: list(FeedStream(content)), args.rounds)
+    print(f"{'full feed: tree + soup':<28} {legacy_time * 1000:8.2f}ms/feed")
+    print(f"{'full feed: FeedStream':<28} {stream_time * 1000:8.2f}ms/feed  ({legacy_time / stream_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import yaml
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class GeneralConfig(BaseModel):
     listen: int
@@ -18,6 +18,10 @@ class DownloadConfig(BaseModel):
     qbittorrent_password: str = "adminadmin"
     # 添加下载目录和目标目录配置
     download_dir: str = ""
+    # qBittorrent客户端实现：aiohttp（原生异步）或 qbittorrentapi（在线程池中运行同步库）
+    qbittorrent_backend: str = "aiohttp"
+    # 下载完成回调（/api/torrent/hook/completed）的访问令牌，留空则不启用
+    completion_hook_token: Optional[str] = None
 
 class HardlinkConfig(BaseModel):
     enable: bool
@@ -32,6 +36,25 @@ class LLMConfig(BaseModel):
     url: str
     token: str
     name: str = "gpt-3.5-turbo"  # 默认使用gpt-3.5-turbo
+    concurrency: int = 4  # 同时进行的LLM请求数量上限
+
+class SchedulerConfig(BaseModel):
+    rss_concurrency: int = 8  # 同时抓取的RSS源数量上限
+    rss_per_host_concurrency: int = 2  # 同一站点（如Mikan/Nyaa/dmhy）同时抓取的数量上限
+    process_concurrency: int = 2  # 同时进行后处理（文件分类、硬链接）的种子数量
+    torrent_max_retries: int = 8  # 种子添加失败的最大重试次数，超过后标记为dead不再重试
+    torrent_retry_base_delay: int = 60  # 首次重试等待秒数，之后每次翻倍
+    torrent_retry_max_delay: int = 21600  # 重试等待的上限（秒）
+    adaptive_polling: bool = True  # 按每个源的发布历史学习发布节奏，在预计发布窗口内密集检查、其余时间稀疏检查
+    adaptive_min_interval: int = Field(600, ge=60)  # 预计发布窗口内的检查间隔（秒），至少60，源未单独设置时使用
+    adaptive_max_interval: int = Field(14400, ge=60)  # 窗口外的最长检查间隔（秒），至少60，源未单独设置时使用
+
+class HttpConfig(BaseModel):
+    pool_size: int = 64  # 共享HTTP连接池的总连接数上限
+    per_host_limit: int = 8  # 同一主机的连接数上限
+    dns_cache_ttl: int = 300  # DNS解析结果缓存时间（秒）
+    timeout: int = 30  # 单次请求的默认总超时（秒）
+    connect_timeout: int = 10  # 建立连接（含代理）的超时（秒）
 
 class Settings(BaseModel):
     general: GeneralConfig
@@ -40,6 +63,8 @@ class Settings(BaseModel):
     notifications: List[dict]
     tmdb_api: TMDBConfig
     llm: LLMConfig
+    scheduler: SchedulerConfig = SchedulerConfig()
+    http: HttpConfig = HttpConfig()
 
 def load_config() -> Settings:
     config_path = Path("config.yaml")
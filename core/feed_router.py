@@ -0,0 +1,59 @@
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from models.models import Source
+from utils.rss import FeedItem
+
+
+def compile_route(pattern: Optional[str], use_regex: bool = False) -> Tuple[Optional[Pattern], List[str]]:
+    """编译路由规则：正则表达式（不区分大小写），或空格分隔的关键词（全部包含才匹配）
+
+    Raises:
+        ValueError: 规则为空或正则表达式无效
+    """
+    pattern = (pattern or "").strip()
+    if not pattern:
+        raise ValueError("路由规则不能为空")
+    if use_regex:
+        try:
+            return re.compile(pattern, re.IGNORECASE), []
+        except re.error as e:
+            raise ValueError(f"路由正则表达式无效: {e}")
+    return None, [keyword.casefold() for keyword in pattern.split()]
+
+
+class FeedRouter:
+    """聚合订阅源的路由表：按条目标题把条目分发给各节目的源，每个条目只分发给第一个匹配的源"""
+
+    def __init__(self, sources: List[Source]):
+        self.routes: List[Tuple[Source, Optional[Pattern], List[str]]] = []
+        self.invalid: Dict[int, str] = {}  # 规则无效的源ID -> 错误信息
+        for source in sorted(sources, key=lambda source: source.id):
+            try:
+                regex, keywords = compile_route(source.route_pattern, source.route_use_regex)
+            except ValueError as e:
+                self.invalid[source.id] = str(e)
+                continue
+            self.routes.append((source, regex, keywords))
+
+    def match(self, title: Optional[str]) -> Optional[Source]:
+        """返回第一个规则匹配该标题的源"""
+        if not title:
+            return None
+        folded = title.casefold()
+        for source, regex, keywords in self.routes:
+            if regex is not None:
+                if regex.search(title):
+                    return source
+            elif all(keyword in folded for keyword in keywords):
+                return source
+        return None
+
+    def route(self, items: List[FeedItem]) -> List[Tuple[Source, List[FeedItem]]]:
+        """把条目按匹配的源分组，未匹配任何规则的条目被忽略"""
+        routed: Dict[int, Tuple[Source, List[FeedItem]]] = {}
+        for item in items:
+            source = self.match(item.title)
+            if source is not None:
+                routed.setdefault(source.id, (source, []))[1].append(item)
+        return list(routed.values())
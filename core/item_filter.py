@@ -0,0 +1,207 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from models.models import Source
+from utils.ai import extract_episode_with_rules
+from utils.rss import FeedItem
+
+_SUBGROUP_RE = re.compile(r"^\s*[\[【]([^\]】]+)[\]】]")
+# 用户填写的分辨率：1080p、1080、1920x1080、4K 等
+_RESOLUTION_SETTING_RE = re.compile(r"(?i)(?:(?:3840|1920|1280|1024|848|720|640)[x×])?(2160|1080|720|576|480)[pi]?|(4K)")
+_RESOLUTION_RE = re.compile(r"(?i)(?<![0-9])(?:(2160|1080|720|576|480)[pi]|(?:3840|1920|1280|1024|848|720|640)[x×](2160|1080|720|576|480))(?![0-9])|\b(4K)\b")
+
+
+def detect_resolution(title: str) -> Optional[str]:
+    """从标题中识别分辨率，统一为 2160p/1080p/720p 这样的形式"""
+    match = _RESOLUTION_RE.search(title)
+    if not match:
+        return None
+    if match.group(3):
+        return "2160p"
+    return f"{match.group(1) or match.group(2)}p"
+
+
+def detect_subgroup(title: str) -> Optional[str]:
+    """标题开头方括号中的字幕组/发布组名称"""
+    match = _SUBGROUP_RE.match(title)
+    return match.group(1).strip() if match else None
+
+
+def normalize_resolution(value: str) -> str:
+    """把用户填写的分辨率统一为 detect_resolution 的形式（4K -> 2160p，1080 -> 1080p）
+
+    Raises:
+        ValueError: 无法识别的分辨率
+    """
+    match = _RESOLUTION_SETTING_RE.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f"无法识别的分辨率: {value}")
+    if match.group(2):
+        return "2160p"
+    return f"{match.group(1)}p"
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in re.split(r"[,，|]", value or "") if part.strip()]
+
+
+def _compile(pattern: Optional[str], name: str) -> Optional[Pattern]:
+    if not pattern or not pattern.strip():
+        return None
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"{name}正则表达式无效: {e}")
+
+
+class ItemFilter:
+    """源的条目过滤规则，在种子文件下载/元数据获取之前对原始feed条目求值"""
+
+    def __init__(
+        self,
+        include: Optional[str] = None,
+        exclude: Optional[str] = None,
+        resolutions: Optional[str] = None,
+        subgroups: Optional[str] = None,
+        min_size_mb: Optional[int] = None,
+        max_size_mb: Optional[int] = None,
+        episode_regex: Optional[str] = None,
+    ):
+        """
+        Args:
+            episode_regex: 源的集数正则（第一个捕获组为集数），用于识别同一集的不同版本，无效时按通用规则识别
+
+        Raises:
+            ValueError: 正则表达式无效或分辨率无法识别
+        """
+        self.include = _compile(include, "包含")
+        self.exclude = _compile(exclude, "排除")
+        # 按偏好排列的分辨率，如 "1080p,720p"
+        self.resolutions = list(dict.fromkeys(normalize_resolution(res) for res in _split_list(resolutions)))
+        self.subgroups = {group.casefold() for group in _split_list(subgroups)}
+        self.min_size = min_size_mb * 1024 * 1024 if min_size_mb else None
+        self.max_size = max_size_mb * 1024 * 1024 if max_size_mb else None
+        try:
+            self.episode_regex = re.compile(episode_regex) if episode_regex else None
+        except re.error:
+            self.episode_regex = None
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.include or self.exclude or self.resolutions or self.subgroups
+            or self.min_size or self.max_size
+        )
+
+    def accepts(self, item: FeedItem) -> bool:
+        """单个条目是否满足规则（无法识别分辨率/字幕组/大小的条目不按该项过滤）"""
+        title = item.title or ""
+        if self.include and not self.include.search(title):
+            return False
+        if self.exclude and self.exclude.search(title):
+            return False
+        if self.resolutions:
+            resolution = detect_resolution(title)
+            if resolution and resolution not in self.resolutions:
+                return False
+        if self.subgroups:
+            subgroup = detect_subgroup(title)
+            if subgroup and subgroup.casefold() not in self.subgroups:
+                return False
+        if item.size:
+            if self.min_size and item.size < self.min_size:
+                return False
+            if self.max_size and item.size > self.max_size:
+                return False
+        return True
+
+    def variant_key(self, title: str) -> Tuple[str, ...]:
+        """同一集不同版本（分辨率、编码等不同）共用的标识：(字幕组, 集数)，无法识别集数时为去掉分辨率的标题"""
+        stripped = _RESOLUTION_RE.sub(" ", title)
+        episode = None
+        if self.episode_regex:
+            match = self.episode_regex.search(title)
+            try:
+                episode = int(match.group(1)) if match else None
+            except (IndexError, ValueError):
+                episode = None
+        if episode is None:
+            episode = extract_episode_with_rules(stripped) or None
+        if episode is None:
+            return ("title", stripped.casefold())
+        return ("episode", (detect_subgroup(title) or "").casefold(), str(episode))
+
+    def resolution_rank(self, title: str) -> Optional[int]:
+        """标题中分辨率的偏好顺位（0最优），未识别或不在偏好列表中时为None"""
+        resolution = detect_resolution(title)
+        if resolution is None or resolution not in self.resolutions:
+            return None
+        return self.resolutions.index(resolution)
+
+    def apply(self, items: List[FeedItem], ingested_titles: Iterable[str] = ()) -> List[FeedItem]:
+        """过滤条目；同一集的多个版本只保留最偏好的分辨率
+
+        Args:
+            ingested_titles: 该源已入库的种子标题（见 needs_ingested_titles），用于跨多次抓取比较同一集的版本
+        """
+        if not self.active:
+            return items
+        accepted = [item for item in items if self.accepts(item)]
+        if len(self.resolutions) < 2:
+            return accepted
+
+        # 已入库的和本次抓取的各集最偏好的分辨率顺位
+        best: Dict[Tuple[str, ...], int] = {}
+        for title in ingested_titles:
+            rank = self.resolution_rank(title or "")
+            if rank is not None:
+                key = self.variant_key(title)
+                best[key] = min(rank, best.get(key, rank))
+        ranked = []
+        for item in accepted:
+            title = item.title or ""
+            rank = self.resolution_rank(title)
+            key = self.variant_key(title) if rank is not None else None
+            if key is not None:
+                best[key] = min(rank, best.get(key, rank))
+            ranked.append((item, rank, key))
+        # 只保留每集最偏好分辨率的版本：已入库更好版本的集不再入库较差的版本，
+        # 同一分辨率的多个版本（如简繁分开发布、v2）都保留
+        return [item for item, rank, key in ranked if key is None or rank <= best[key]]
+
+    def needs_ingested_titles(self, items: List[FeedItem]) -> bool:
+        """过滤后是否还有非最偏好分辨率的条目，需要对照已入库的种子确认该集没有更好的版本"""
+        if len(self.resolutions) < 2:
+            return False
+        return any(self.resolution_rank(item.title or "") for item in items)
+
+
+@lru_cache(maxsize=256)
+def _cached_filter(
+    include: Optional[str],
+    exclude: Optional[str],
+    resolutions: Optional[str],
+    subgroups: Optional[str],
+    min_size_mb: Optional[int],
+    max_size_mb: Optional[int],
+    episode_regex: Optional[str],
+) -> ItemFilter:
+    return ItemFilter(include, exclude, resolutions, subgroups, min_size_mb, max_size_mb, episode_regex)
+
+
+def get_item_filter(source: Source) -> ItemFilter:
+    """源的过滤规则（按规则内容缓存编译结果，规则不变时不会重复编译）
+
+    Raises:
+        ValueError: 正则表达式无效或分辨率无法识别
+    """
+    return _cached_filter(
+        source.filter_include,
+        source.filter_exclude,
+        source.filter_resolutions,
+        source.filter_subgroups,
+        source.filter_min_size_mb,
+        source.filter_max_size_mb,
+        source.episode_regex,
+    )
@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class StageStats:
+    """调度流水线中一个阶段的运行统计"""
+
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self.busy = 0
+        self.processed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_run: Optional[datetime] = None
+
+    def begin(self) -> None:
+        self.busy += 1
+
+    def finish(self, count: int = 1, error: Optional[BaseException] = None) -> None:
+        self.busy -= 1
+        self.last_run = datetime.utcnow()
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+        else:
+            self.processed += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "processed": self.processed,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+class StageQueue(StageStats):
+    """有界去重工作队列：同一条目在处理完成前不会重复入队
+
+    队列满时 put() 会等待（向上游施加背压），offer() 则直接放弃——
+    用于数据库中已持久化的工作，下一轮扫描会重新入队。
+    """
+
+    def __init__(self, name: str, maxsize: int, workers: int = 1):
+        super().__init__(name, workers)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._pending: Set[Hashable] = set()  # 已入队或正在处理的条目
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, item: Hashable) -> None:
+        """入队，队列满时等待"""
+        if item in self._pending:
+            return
+        self._pending.add(item)
+        try:
+            await self._queue.put(item)
+        except BaseException:
+            self._pending.discard(item)
+            raise
+
+    def offer(self, item: Hashable) -> bool:
+        """尝试入队，队列满时放弃并返回False"""
+        if item in self._pending:
+            return True
+        if self._queue.full():
+            self.dropped += 1
+            return False
+        self._pending.add(item)
+        self._queue.put_nowait(item)
+        return True
+
+    async def get_batch(self, max_items: int = 1) -> List[Hashable]:
+        """等待至少一个条目，并顺带取出队列中已有的条目（最多max_items个）"""
+        items = [await self._queue.get()]
+        while len(items) < max_items and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        self.begin()
+        return items
+
+    def done(self, items: List[Hashable], error: Optional[BaseException] = None) -> None:
+        """标记一批条目处理完毕，之后它们可以再次入队"""
+        for item in items:
+            self._pending.discard(item)
+            self._queue.task_done()
+        self.finish(len(items), error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = super().snapshot()
+        data.update({
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "dropped": self.dropped,
+        })
+        return data
+
+
+class PrioritySemaphore:
+    """名额满时优先唤醒高优先级等待方的信号量（同优先级先到先得）
+
+    用于让用户触发的立即检查排在后台抓取之前，同时仍受同一并发上限约束。
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # (优先级, 到达顺序, future)
+        self._counter = itertools.count()
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    async def acquire(self, priority: bool = False) -> None:
+        # 有空闲名额时一定没有等待方：release() 直接把名额交给等待方
+        if self._value > 0:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (0 if priority else 1, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已被交给名额后才取消，把名额还回去；未交给名额的取消条目由 release() 跳过
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: bool = False) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
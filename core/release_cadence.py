@@ -0,0 +1,82 @@
+import math
+import statistics
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+# 同一集的多个发布（不同字幕组/分辨率/平台）通常在几小时内先后出现，合并为一个发布批次
+RELEASE_BATCH_GAP = timedelta(hours=6)
+# 学习发布周期使用的最近批次数，以及至少需要的批次数（即至少两个间隔）
+RELEASE_HISTORY_BATCHES = 12
+MIN_RELEASE_BATCHES = 3
+# 周期短于一天的源（如聚合多部作品的feed）没有明确的发布窗口，保持固定检查间隔
+MIN_RELEASE_PERIOD = timedelta(days=1)
+# 预计发布窗口：预计时间之前 spread，之后 LATE_SPREAD_RATIO * spread（延迟发布比提前常见）
+MIN_RELEASE_SPREAD = timedelta(minutes=30)
+LATE_SPREAD_RATIO = 3
+# 错过预计发布窗口后，直到这么多个周期之前仍认为是延迟发布
+OVERDUE_PERIODS = 1.5
+# 超过这么多个周期没有新发布，视为已完结/停更，只按最长间隔检查
+STALE_PERIODS = 4
+
+
+def release_batches(release_times: Iterable[datetime]) -> List[datetime]:
+    """把发布时间合并为批次，返回每个批次最早的发布时间（升序）"""
+    batches: List[datetime] = []
+    last: Optional[datetime] = None
+    for released in sorted(release_times):
+        if last is None or released - last > RELEASE_BATCH_GAP:
+            batches.append(released)
+        last = released
+    return batches
+
+
+class ReleaseCadence:
+    """从发布历史学习的发布节奏：周期为相邻批次间隔的中位数，窗口宽度取决于间隔偏离周期的程度"""
+
+    def __init__(self, period: timedelta, spread: timedelta, last_release: datetime):
+        self.period = period
+        self.spread = spread
+        self.last_release = last_release
+
+    def __repr__(self) -> str:
+        return f"ReleaseCadence(period={self.period}, spread={self.spread}, last_release={self.last_release})"
+
+    @classmethod
+    def learn(cls, release_times: Iterable[datetime]) -> Optional["ReleaseCadence"]:
+        """根据发布时间学习节奏，历史不足或周期太短时返回None"""
+        batches = release_batches(release_times)[-RELEASE_HISTORY_BATCHES:]
+        if len(batches) < MIN_RELEASE_BATCHES:
+            return None
+        gaps = [(later - earlier).total_seconds() for earlier, later in zip(batches, batches[1:])]
+        period = statistics.median(gaps)
+        if period < MIN_RELEASE_PERIOD.total_seconds():
+            return None
+        # 间隔与周期整数倍的偏差（停播一周的间隔是两个周期，不算偏差）
+        deviations = [abs(gap - max(round(gap / period), 1) * period) for gap in gaps]
+        spread = min(
+            max(statistics.median(deviations) * 2, MIN_RELEASE_SPREAD.total_seconds()),
+            period / 4 / LATE_SPREAD_RATIO,
+        )
+        return cls(timedelta(seconds=period), timedelta(seconds=spread), batches[-1])
+
+    def window(self, now: datetime) -> Tuple[datetime, datetime]:
+        """尚未结束的最近一个预计发布窗口 (开始, 结束)"""
+        late = self.spread * LATE_SPREAD_RATIO
+        periods = max(1, -(-(now - late - self.last_release) // self.period))
+        expected = self.last_release + self.period * periods
+        return expected - self.spread, expected + late
+
+    def next_check(self, now: datetime, min_interval: int, max_interval: int) -> datetime:
+        """下次检查时间：窗口内按最短间隔检查，窗口外按最长间隔检查且不晚于下个窗口开始，错过窗口的延迟发布按中等间隔追赶"""
+        soonest = now + timedelta(seconds=min_interval)
+        latest = now + timedelta(seconds=max(max_interval, min_interval))
+        if now - self.last_release > self.period * STALE_PERIODS:
+            return latest
+        start, _ = self.window(now)
+        if start <= now:
+            return soonest
+        since_release = now - self.last_release
+        if self.period + self.spread * LATE_SPREAD_RATIO < since_release < self.period * OVERDUE_PERIODS:
+            # 预计的发布已错过窗口仍未出现（延迟发布），在半个周期内按中等间隔继续检查
+            latest = min(latest, now + timedelta(seconds=math.sqrt(min_interval * max(max_interval, min_interval))))
+        return max(soonest, min(start, latest))
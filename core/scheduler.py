@@ -2,26 +2,84 @@ import asyncio
 import logging
 import os
 import re
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Tuple, Callable, Awaitable
+from urllib.parse import urlparse, quote
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from models.session import AsyncSessionLocal
-from models.models import Source, Torrent, File
-from utils.rss import get_rss_data
-from utils.qbittorrent import QBittorrentClient
+from models.models import Source, Torrent, File, RssItemIndex
+from utils.rss import FeedItem, fetch_rss_shared, parse_pub_date
+from utils.qbittorrent import QBittorrentClient, QBittorrentSync, AsyncQBittorrent, get_qbittorrent
 from utils.ai import get_episode_from_filename, is_file_important
 from core.config import CONFIG
+from core.source_queue import SourceDueQueue, jittered_due
+from core.pipeline import PrioritySemaphore, StageQueue, StageStats
+from core.feed_router import FeedRouter
+from core.item_filter import get_item_filter
+from core.release_cadence import ReleaseCadence
+from core.sources import FEED_STATE_FIELDS
 
 logger = logging.getLogger(__name__)
 
+# 周期阶段（磁力链接、进度同步）及数据库扫描的执行周期（秒）
+CYCLE_INTERVAL = 60
+# RSS抓取失败后的重试间隔（秒）
+RSS_RETRY_INTERVAL = 60
+# 单条 IN (...) 查询中的hash数量上限，避免超出SQLite的参数个数限制
+HASH_QUERY_CHUNK = 500
+# 单次qBittorrent批量请求中的种子数量上限
+QB_BATCH_SIZE = 100
+# 流水线各阶段工作队列的容量
+STAGE_QUEUE_SIZE = 1000
+# 下载期间规划文件失败后的重试：首次等待秒数（之后每次翻倍）、等待上限、最多尝试次数
+# 放弃规划的种子在下载完成后由后处理阶段照常分析
+PLAN_RETRY_BASE_DELAY = 60
+PLAN_RETRY_MAX_DELAY = 3600
+PLAN_MAX_ATTEMPTS = 10
+# 保留的已结束立即检查任务数量
+MAX_FINISHED_JOBS = 100
+# 由调度器按检查间隔抓取feed的源类型
+FEED_SOURCE_TYPES = ("rss", "router")
+# 学习发布节奏时回看的发布历史时长
+RELEASE_HISTORY_DAYS = 120
+
 class AutoBangumiScheduler:
     """定时任务调度器"""
     
     def __init__(self):
         self.running = False
         self.task = None
+        # RSS并发抓取限制：全局上限 + 每个站点的上限
+        self._rss_semaphore = PrioritySemaphore(max(1, CONFIG.scheduler.rss_concurrency))
+        self._host_semaphores: Dict[str, PrioritySemaphore] = {}
+        # RSS源按下次检查时间排列的队列
+        self.source_queue = SourceDueQueue()
+        self._source_queue_seeded = False
+        # qBittorrent种子状态的增量镜像，以及新进入下载状态、需要与镜像核对一次的种子
+        self.qb_sync = QBittorrentSync()
+        self._sync_pending: set = set()
+        # 流水线各阶段：RSS/添加/后处理由有界队列驱动，磁力链接与进度同步按周期运行
+        self.rss_stage = StageQueue("rss", STAGE_QUEUE_SIZE)
+        self.magnet_stage = StageStats("magnet")
+        self.add_stage = StageQueue("add", STAGE_QUEUE_SIZE)
+        self.progress_stage = StageStats("progress")
+        self.plan_stage = StageQueue("plan", STAGE_QUEUE_SIZE)
+        self.process_stage = StageQueue(
+            "process", STAGE_QUEUE_SIZE, workers=max(1, CONFIG.scheduler.process_concurrency)
+        )
+        self.stages = [
+            self.rss_stage, self.magnet_stage, self.add_stage,
+            self.progress_stage, self.plan_stage, self.process_stage
+        ]
+        self.workers: List[asyncio.Task] = []
+        # 立即检查（快速通道）任务
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._job_tasks: set = set()
     
     async def _safe_commit(self, session: Any):
         """安全地提交数据库事务"""
@@ -46,108 +104,484 @@ class AutoBangumiScheduler:
             logger.error(f"Error rolling back transaction: {e}")
     
     async def start(self):
-        """启动定时任务"""
+        """启动调度器：RSS源分发循环以及各阶段的常驻worker"""
         if self.running:
             return
         
         self.running = True
         self.task = asyncio.create_task(self._run_scheduler())
+        self.workers = [
+            asyncio.create_task(self._queue_worker(self.rss_stage, self._run_rss_stage, STAGE_QUEUE_SIZE)),
+            asyncio.create_task(self._periodic_worker(self.magnet_stage, self._run_magnet_stage)),
+            asyncio.create_task(self._queue_worker(self.add_stage, self._add_torrents_to_qbittorrent, QB_BATCH_SIZE)),
+            asyncio.create_task(self._periodic_worker(self.progress_stage, self._run_progress_stage)),
+            asyncio.create_task(self._queue_worker(self.plan_stage, self._plan_torrent_files)),
+        ]
+        self.workers.extend(
+            asyncio.create_task(self._queue_worker(self.process_stage, self._process_completed_torrents))
+            for _ in range(self.process_stage.workers)
+        )
         logger.info("AutoBangumi scheduler started")
     
     async def stop(self):
-        """停止定时任务"""
+        """停止调度器及所有阶段worker"""
         self.running = False
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
+        tasks = [task for task in [self.task, *self.workers, *self._job_tasks] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self.workers = []
         logger.info("AutoBangumi scheduler stopped")
     
+    def status(self) -> Dict[str, Any]:
+        """调度器状态：各阶段的队列深度与运行统计"""
+        return {
+            "running": self.running,
+            "scheduled_sources": len(self.source_queue),
+            "next_source_due": self.source_queue.next_due().isoformat() if self.source_queue.next_due() else None,
+            "stages": {stage.name: stage.snapshot() for stage in self.stages},
+            "qbittorrent": get_qbittorrent().health.snapshot(),
+        }
+    
+    def schedule_source(self, source_id: int, due: Optional[datetime] = None):
+        """将RSS源加入检查队列（或更新其检查时间），默认立即检查"""
+        self.source_queue.schedule(source_id, due or datetime.utcnow())
+    
+    async def reschedule_source(self, db: Any, source: Source) -> Optional[datetime]:
+        """源的检查间隔设置修改后，按新设置重新计算下次检查时间并更新检查队列（不提交）"""
+        if source.type not in FEED_SOURCE_TYPES:
+            return None
+        now = datetime.utcnow()
+        next_check = now
+        if source.last_check is not None:
+            next_check = max(now, await self._next_check_at(db, source, source.last_check))
+        source.next_check = next_check
+        self.source_queue.schedule(source.id, next_check)
+        return next_check
+    
+    def unschedule_source(self, source_id: int):
+        """将源从检查队列中移除"""
+        self.source_queue.remove(source_id)
+    
+    async def _seed_source_queue(self):
+        """根据数据库中计划的下次检查时间（或最后检查时间和检查间隔）初始化RSS源队列"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Source.id, Source.last_check, Source.check_interval, Source.next_check)
+                .where(Source.type.in_(FEED_SOURCE_TYPES))
+            )
+            rows = result.all()
+        
+        now = datetime.utcnow()
+        for source_id, last_check, check_interval, next_check in rows:
+            self.source_queue.schedule(source_id, jittered_due(last_check, check_interval, now, next_check))
+        self._source_queue_seeded = True
+        logger.info(f"Seeded source queue with {len(rows)} RSS/router sources")
+    
     async def _run_scheduler(self):
-        """运行定时任务主循环"""
+        """分发循环：把到期的RSS源送入RSS阶段，并定期把数据库中待办的种子送入下载相关阶段"""
+        next_sweep = datetime.utcnow()
         while self.running:
             try:
-                await self._execute_tasks()
-                # 等待60秒后执行下一轮
-                await asyncio.sleep(60)
+                if not self._source_queue_seeded:
+                    await self._seed_source_queue()
+                
+                now = datetime.utcnow()
+                for source_id in self.source_queue.pop_due(now):
+                    # RSS阶段积压时在此等待（背压），而不是无限制地堆积任务
+                    await self.rss_stage.put(source_id)
+                if now >= next_sweep:
+                    await self._sweep_pending_torrents()
+                    next_sweep = now + timedelta(seconds=CYCLE_INTERVAL)
+                
+                deadline = next_sweep
+                next_due = self.source_queue.next_due()
+                if next_due and next_due < deadline:
+                    deadline = next_due
+                await self.source_queue.wait(deadline)
             except Exception as e:
                 logger.error(f"Error in scheduler: {e}")
                 await asyncio.sleep(60)
     
-    async def _execute_tasks(self):
-        """执行所有定时任务"""
-        logger.info("Executing scheduled tasks...")
+    async def _queue_worker(self, stage: StageQueue, handler: Callable[[Any, List[Any]], Awaitable[Any]], batch_size: int = 1):
+        """队列阶段的常驻worker：每次取出一批条目，在独立的session中交给handler处理"""
+        while True:
+            items = await stage.get_batch(batch_size)
+            error = None
+            try:
+                async with AsyncSessionLocal() as session:
+                    await handler(session, items)
+            except Exception as e:
+                error = e
+                logger.error(f"Error in {stage.name} stage: {e}")
+            finally:
+                stage.done(items, error)
+    
+    async def _periodic_worker(self, stage: StageStats, handler: Callable[[Any], Awaitable[Any]], interval: int = CYCLE_INTERVAL):
+        """周期阶段的常驻worker：每隔interval秒在独立的session中执行一次handler"""
+        while True:
+            stage.begin()
+            error = None
+            try:
+                async with AsyncSessionLocal() as session:
+                    await handler(session)
+            except Exception as e:
+                error = e
+                logger.error(f"Error in {stage.name} stage: {e}")
+            finally:
+                stage.finish(error=error)
+            await asyncio.sleep(interval)
+    
+    async def _run_rss_stage(self, db: Any, source_ids: List[int]):
+        """RSS阶段：检查到期的RSS源，新种子交给添加阶段"""
+        await self._check_rss_and_create_torrents(db, source_ids)
+        await self._enqueue_addable_torrents(db)
+    
+    async def _run_magnet_stage(self, db: Any):
+        """磁力链接阶段：为磁力链接源创建种子（可能等待DHT元数据），新种子交给添加阶段"""
+        await self._check_magnet_sources(db)
+        await self._enqueue_addable_torrents(db)
+    
+    async def _run_progress_stage(self, db: Any):
+        """进度阶段：同步下载进度，尚未规划文件的种子交给规划阶段，下载完成的种子交给后处理阶段"""
+        await self._update_torrent_progress(db)
+        await self._enqueue_plannable_torrents(db)
+        await self._enqueue_completed_torrents(db)
+    
+    async def _sweep_pending_torrents(self):
+        """定期扫描数据库，补充入队因队列已满而未能入队的种子，以及到期重试的种子"""
+        try:
+            async with AsyncSessionLocal() as session:
+                await self._enqueue_addable_torrents(session)
+                await self._enqueue_plannable_torrents(session)
+                await self._enqueue_completed_torrents(session)
+        except Exception as e:
+            logger.error(f"Error sweeping pending torrents: {e}")
+    
+    async def _enqueue_addable_torrents(self, db: Any):
+        """把待添加和到期重试的种子送入添加阶段（走(status, next_retry_at)索引）"""
+        now = datetime.utcnow()
+        result = await db.execute(select(Torrent.id).where(Torrent.status == "pending"))
+        torrent_ids = list(result.scalars().all())
+        result = await db.execute(
+            select(Torrent.id).where(
+                Torrent.status == "failed",
+                Torrent.next_retry_at <= now
+            )
+        )
+        torrent_ids.extend(result.scalars().all())
+        # 数据库中的状态是持久的，队列满时放弃入队，由下一轮扫描补上
+        for torrent_id in torrent_ids:
+            if not self.add_stage.offer(torrent_id):
+                break
+    
+    def check_source_now(self, source_id: int) -> str:
+        """立即检查单个源（抓取 -> 入库 -> 添加到qBittorrent），绕过后台队列
         
-        session = AsyncSessionLocal()
+        Returns:
+            str: 任务ID，可通过 get_job 查询进度
+        """
+        self._prune_jobs()
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {
+            "id": job_id,
+            "source_id": source_id,
+            "state": "queued",  # queued/fetching/ingesting/adding/done/failed
+            "new_torrents": 0,
+            "added": 0,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+        }
+        task = asyncio.create_task(self._run_check_now(job_id, source_id))
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+        return job_id
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询立即检查任务的进度"""
+        return self.jobs.get(job_id)
+    
+    def _prune_jobs(self):
+        """只保留最近的若干个已结束任务"""
+        finished = [job for job in self.jobs.values() if job["finished_at"]]
+        for job in sorted(finished, key=lambda job: job["finished_at"])[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job["id"]]
+    
+    async def _run_check_now(self, job_id: str, source_id: int):
+        """快速通道：不占用后台阶段的队列和并发名额，直接处理单个源"""
+        job = self.jobs[job_id]
+        rescheduled = False
+        feed_source_id = source_id
         try:
-            # 1. 检查RSS并创建新种子
-            await self._check_rss_and_create_torrents(session)
-            
-            # 2. 检查磁力链接源并创建种子
-            await self._check_magnet_sources(session)
-            
-            # 3. 将未添加的种子添加到qBittorrent
-            await self._add_torrents_to_qbittorrent(session)
+            async with AsyncSessionLocal() as session:
+                source : Optional[Source] = await session.get(Source, source_id)
+                if not source:
+                    raise RuntimeError("源不存在")
+                if source.type == "routed":
+                    # 节目源没有独立的feed，检查它所属的聚合订阅源
+                    source = await session.get(Source, source.router_id) if source.router_id else None
+                    if not source or source.type != "router":
+                        raise RuntimeError("所属的聚合订阅源不存在")
+                    feed_source_id = source.id
+                
+                job["state"] = "fetching"
+                if source.type in FEED_SOURCE_TYPES:
+                    # 失败时交还给后台队列稍后重试
+                    rescheduled = True
+                    # 立即检查不带条件请求信息，总是处理完整内容（可能复用刚刚抓取的同一feed）；
+                    # 与后台抓取共用并发名额，但排在等待中的后台抓取之前
+                    fetched = await fetch_rss_shared(
+                        source.url,
+                        raise_on_error=True,
+                        limiter=lambda: self._rss_fetch_slot(source.url, priority=True)
+                    )
+                    job["state"] = "ingesting"
+                    feed = fetched["feed"]
+                    job["new_torrents"], unresolved = await self._ingest_feed(
+                        session, source, feed.items_until(None) if feed else []
+                    )
+                    # 有条目暂未处理或feed内容被截断时，不记录条件请求信息，下次重新处理
+                    feed_state = {} if unresolved or (feed and feed.parse_error) else {
+                        "feed_etag": fetched["etag"],
+                        "feed_last_modified": fetched["last_modified"],
+                        "feed_digest": fetched["digest"],
+                        "last_seen_item": (feed.newest_key if feed else None) or source.last_seen_item,
+                    }
+                    last_check = datetime.utcnow()
+                    next_check = await self._next_check_at(session, source, last_check)
+                    await session.execute(
+                        update(Source).where(Source.id == source.id).values(
+                            last_check=last_check, next_check=next_check, **feed_state
+                        )
+                    )
+                    await session.commit()
+                    self.source_queue.schedule(source.id, next_check)
+                elif source.type == "magnet":
+                    job["new_torrents"] = int(await self._check_magnet_source(session, source))
+                
+                job["state"] = "adding"
+                result = await session.execute(
+                    select(Torrent.id).where(
+                        Torrent.source_id.in_(await self._feed_target_ids(session, source)),
+                        Torrent.status == "pending"
+                    )
+                )
+                torrent_ids = list(result.scalars().all())
+                if torrent_ids:
+                    await self._add_torrents_to_qbittorrent(session, torrent_ids)
+                    result = await session.execute(
+                        select(func.count(Torrent.id)).where(
+                            Torrent.id.in_(torrent_ids), Torrent.status == "downloading"
+                        )
+                    )
+                    job["added"] = result.scalar_one()
+            job["state"] = "done"
+        except Exception as e:
+            logger.error(f"Error checking source {source_id} now: {e}")
+            job["state"] = "failed"
+            job["error"] = str(e)
+            if feed_source_id != source_id:
+                await self._clear_feed_state(feed_source_id)
+            if rescheduled and feed_source_id not in self.source_queue:
+                self.source_queue.schedule(feed_source_id, datetime.utcnow() + timedelta(seconds=RSS_RETRY_INTERVAL))
+        finally:
+            job["finished_at"] = datetime.utcnow().isoformat()
+    
+    async def _clear_feed_state(self, source_id: int):
+        """清除源的抓取状态：节目源的立即检查失败时，所属聚合订阅源下次检查重新处理所有条目"""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(Source).where(Source.id == source_id).values(**dict.fromkeys(FEED_STATE_FIELDS))
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error clearing feed state of source {source_id}: {e}")
+    
+    async def handle_completion_hook(self, torrent_hash: str) -> bool:
+        """qBittorrent下载完成回调：立即标记种子完成并送入后处理阶段（轮询仍作为兜底）
+        
+        Returns:
+            bool: 种子是否已进入后处理队列
+        """
+        torrent_hash = torrent_hash.strip().lower()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Torrent).where(Torrent.hash == torrent_hash))
+            torrent = result.scalar_one_or_none()
+            if torrent is None:
+                logger.warning(f"Completion hook for unknown torrent: {torrent_hash}")
+                return False
             
-            # 4. 更新种子下载进度
-            await self._update_torrent_progress(session)
+            if torrent.status == "downloading":
+                torrent.status = "completed"
+                torrent.download_progress = 1.0
+                torrent.completed_at = datetime.utcnow()
+                await session.commit()
+                self._sync_pending.discard(torrent_hash)
+                logger.info(f"Torrent completed (hook): {torrent_hash}")
             
-            # 5. 处理已完成的种子
-            await self._process_completed_torrents(session)
+            if torrent.status != "completed":
+                return False
+            return self.process_stage.offer(torrent.id)
+    
+    async def _enqueue_plannable_torrents(self, db: Any):
+        """把下载中、尚未规划文件的种子送入规划阶段（规划失败的种子等到退避时间过后）"""
+        result = await db.execute(
+            select(Torrent.id).where(
+                Torrent.status == "downloading",
+                Torrent.files_planned.is_(False),
+                Torrent.plan_attempts < PLAN_MAX_ATTEMPTS,
+                or_(Torrent.next_plan_at.is_(None), Torrent.next_plan_at <= datetime.utcnow())
+            )
+        )
+        for torrent_id in result.scalars().all():
+            if not self.plan_stage.offer(torrent_id):
+                break
+    
+    async def _enqueue_completed_torrents(self, db: Any):
+        """把下载完成、等待后处理的种子送入后处理阶段"""
+        result = await db.execute(select(Torrent.id).where(Torrent.status == "completed"))
+        for torrent_id in result.scalars().all():
+            if not self.process_stage.offer(torrent_id):
+                break
+    
+    async def _check_rss_and_create_torrents(self, db: Any, source_ids: List[int]):
+        """检查到期的RSS源并创建新种子"""
+        logger.info(f"Checking {len(source_ids)} due RSS sources for new torrents...")
+        
+        # 未能正常处理的源稍后重试，避免从队列中丢失
+        unscheduled = set(source_ids)
+        try:
+            result = await db.execute(
+                select(Source).where(Source.id.in_(source_ids), Source.type.in_(FEED_SOURCE_TYPES))
+            )
+            sources : List[Source] = list(result.scalars().all())
+            # 已删除的源不再放回队列
+            unscheduled.intersection_update(source.id for source in sources)
             
-        except Exception as e:
-            logger.error(f"Error in execute_tasks: {e}")
-        finally:
-            # 尝试关闭session
+            # 并发抓取RSS，抓取结果按完成顺序交回当前协程，由它作为唯一的数据库写入者依次处理
+            fetches = [asyncio.create_task(self._fetch_rss(source)) for source in sources]
             try:
-                if hasattr(session, 'close'):
-                    if asyncio.iscoroutinefunction(session.close):
-                        await session.close()
-                    else:
-                        session.close()
-            except Exception as e:
-                logger.error(f"Error closing session: {e}")
+                for fetch in asyncio.as_completed(fetches):
+                    source, fetched = await fetch
+                    try:
+                        if not fetched:
+                            logger.warning(f"Failed to get RSS data for source {source.id}")
+                            continue
+                        
+                        feed_state = {
+                            "feed_etag": fetched["etag"],
+                            "feed_last_modified": fetched["last_modified"],
+                            "feed_digest": fetched["digest"],
+                        }
+                        unresolved = 0
+                        incomplete = False
+                        if fetched["modified"]:
+                            # 新条目在feed最前面，解析到上次处理过的最新条目即停止
+                            feed = fetched["feed"]
+                            items = feed.items_until(source.last_seen_item)
+                            # 批量处理RSS项目，新种子、条件请求信息与最后检查时间在同一事务中提交
+                            _, unresolved = await self._ingest_feed(db, source, items)
+                            # 内容被截断时可能还没读到停止位置，同样按暂未处理对待
+                            incomplete = bool(unresolved) or feed.parse_error is not None
+                            if incomplete:
+                                # 有条目暂未处理成功，不记录条件请求信息、不前移停止位置，下次重新抓取并处理这些条目
+                                feed_state = {"feed_etag": None, "feed_last_modified": None, "feed_digest": None}
+                            else:
+                                feed_state["last_seen_item"] = feed.newest_key or source.last_seen_item
+                            logger.debug(f"RSS source {source.id}: parsed {len(items)} new items")
+                        else:
+                            logger.debug(f"RSS source {source.id} not modified, skipping parse")
+                        
+                        # 更新最后检查时间，并按发布节奏安排下次检查
+                        last_check = datetime.utcnow()
+                        next_check = await self._next_check_at(db, source, last_check)
+                        if incomplete:
+                            # 暂未处理的条目不等待稀疏检查，最迟按固定检查间隔重试
+                            next_check = min(next_check, last_check + timedelta(seconds=source.check_interval))
+                        await db.execute(
+                            update(Source).where(Source.id == source.id).values(
+                                last_check=last_check,
+                                next_check=next_check,
+                                **feed_state
+                            )
+                        )
+                        await self._safe_commit(db)
+                        
+                        self.source_queue.schedule(source.id, next_check)
+                        unscheduled.discard(source.id)
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing RSS source {source.id}: {e}")
+                        await self._safe_rollback(db)
+            finally:
+                for fetch in fetches:
+                    fetch.cancel()
+        finally:
+            retry_at = datetime.utcnow() + timedelta(seconds=RSS_RETRY_INTERVAL)
+            for source_id in unscheduled:
+                if source_id not in self.source_queue:
+                    self.source_queue.schedule(source_id, retry_at)
     
-    async def _check_rss_and_create_torrents(self, db: Any):
-        """检查RSS源并创建新种子"""
-        logger.info("Checking RSS sources for new torrents...")
+    async def _next_check_at(self, db: Any, source: Source, last_check: datetime) -> datetime:
+        """源的下次检查时间
         
-        # 获取所有RSS源
+        按每个目标源（聚合订阅源为其下的各节目源）的发布历史学习发布节奏，取最早的下次检查时间；
+        未启用自适应检查或任一目标源的历史不足以学习节奏时，按固定检查间隔。
+        """
+        fixed = last_check + timedelta(seconds=source.check_interval)
+        if not CONFIG.scheduler.adaptive_polling:
+            return fixed
+        
+        target_ids = await self._feed_target_ids(db, source)
+        if not target_ids:
+            return fixed
+        released_at = func.coalesce(Torrent.published_at, Torrent.created_at)
         result = await db.execute(
-            select(Source).where(Source.type == "rss")
+            select(Torrent.source_id, released_at).where(
+                Torrent.source_id.in_(target_ids),
+                released_at >= last_check - timedelta(days=RELEASE_HISTORY_DAYS),
+            )
         )
-        sources : List[Source] = list(result.scalars().all())
+        history: Dict[int, List[datetime]] = {source_id: [] for source_id in target_ids}
+        for source_id, released in result.all():
+            history[source_id].append(released)
         
-        for source in sources:
-            try:
-                # 检查是否需要更新（根据检查间隔）
-                if source.last_check:
-                    next_check = source.last_check + timedelta(seconds=source.check_interval)
-                    if datetime.utcnow() < next_check:
-                        continue
-                
-                # 获取RSS数据
-                rss_data = await get_rss_data(source.url)
-                if not rss_data:
-                    logger.warning(f"Failed to get RSS data for source {source.id}")
-                    continue
-                
-                # 处理每个RSS项目
-                for item in rss_data.get("items", []):
-                    await self._process_rss_item(db, source, item)
-                
-                # 更新最后检查时间
-                await db.execute(
-                    update(Source).where(Source.id == source.id).values(
-                        last_check=datetime.utcnow()
-                    )
-                )
-                await self._safe_commit(db)
-                
-            except Exception as e:
-                logger.error(f"Error processing RSS source {source.id}: {e}")
+        min_interval = CONFIG.scheduler.adaptive_min_interval if source.min_check_interval is None else source.min_check_interval
+        max_interval = CONFIG.scheduler.adaptive_max_interval if source.max_check_interval is None else source.max_check_interval
+        next_checks = []
+        for source_id, release_times in history.items():
+            cadence = ReleaseCadence.learn(release_times)
+            if cadence is None:
+                return fixed
+            next_checks.append(cadence.next_check(last_check, min_interval, max_interval))
+            logger.debug(f"Source {source_id}: learned {cadence}")
+        return min(next_checks)
+    
+    async def _fetch_rss(self, source: Source) -> Tuple[Source, Optional[Dict[str, Any]]]:
+        """以条件请求抓取RSS源，同一feed的多个源共享一次抓取"""
+        return source, await fetch_rss_shared(
+            source.url,
+            etag=source.feed_etag,
+            last_modified=source.feed_last_modified,
+            digest=source.feed_digest,
+            limiter=lambda: self._rss_fetch_slot(source.url)
+        )
+    
+    @asynccontextmanager
+    async def _rss_fetch_slot(self, url: str, priority: bool = False):
+        """占用RSS抓取的站点名额和全局名额，priority为True时优先于等待中的后台抓取"""
+        host = (urlparse(url).hostname or "").lower()
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = PrioritySemaphore(max(1, CONFIG.scheduler.rss_per_host_concurrency))
+            self._host_semaphores[host] = host_semaphore
+        
+        # 先占用站点名额再占用全局名额，避免等待慢站点时占住全局名额
+        async with host_semaphore.slot(priority), self._rss_semaphore.slot(priority):
+            yield
         
     async def _check_magnet_sources(self, db: Any):
         """检查磁力链接源并创建种子"""
@@ -161,113 +595,54 @@ class AutoBangumiScheduler:
         
         for source in sources:
             try:
-                # 检查该磁力链接源是否已经创建过种子
-                existing_torrent = await db.execute(
-                    select(Torrent).where(Torrent.source_id == source.id)
-                )
-                if existing_torrent.scalar_one_or_none():
-                    # 如果已经存在种子，跳过
-                    logger.debug(f"Magnet source {source.id} already has torrent, skipping")
-                    continue
-                
-                # 验证磁力链接格式
-                magnet_url = source.url
-                if not magnet_url.startswith("magnet:"):
-                    logger.warning(f"Invalid magnet URL for source {source.id}: {magnet_url}")
-                    continue
-                
-                # 提取种子hash
-                torrent_hash = QBittorrentClient.extract_hash_from_magnet(magnet_url)
-                logger.info(f"Processing magnet source {source.id}, magnet url: {magnet_url}, torrent hash: {torrent_hash}")
-                if not torrent_hash:
-                    logger.warning(f"Cannot extract hash from magnet URL: {magnet_url}")
-                    continue
-                
-                # 检查是否已存在相同hash的种子（可能来自其他源）
-                existing_hash_torrent = await db.execute(
-                    select(Torrent).where(Torrent.hash == torrent_hash)
-                )
-                if existing_hash_torrent.scalar_one_or_none():
-                    logger.info(f"Torrent with hash {torrent_hash} already exists, skipping magnet source {source.id}")
-                    continue
-                
-                # 尝试从磁力链接中提取标题
-                from utils.magnet import get_magnet_info
-                magnet_info = await get_magnet_info(magnet_url)
-                title = magnet_info.get('name') or source.title or f"Magnet Torrent {torrent_hash[:8]}"
-                
-                # 创建新种子记录
-                new_torrent = Torrent(
-                    hash=torrent_hash,
-                    source_id=source.id,
-                    url=magnet_url,
-                    title=title,
-                    status="pending",
-                    download_progress=0.0,
-                    created_at=datetime.utcnow()
-                )
-                
-                db.add(new_torrent)
-                await self._safe_commit(db)
-                logger.info(f"Created new torrent from magnet source {source.id}: {torrent_hash}")
-                
-                # 更新源的最后检查时间（虽然磁力链接源不需要周期检查）
-                await db.execute(
-                    update(Source).where(Source.id == source.id).values(
-                        last_check=datetime.utcnow()
-                    )
-                )
-                await self._safe_commit(db)
-                
+                await self._check_magnet_source(db, source)
             except Exception as e:
                 logger.error(f"Error processing magnet source {source.id}: {e}")
                 await self._safe_rollback(db)
-
     
-    async def _process_rss_item(self, db: Any, source: Source, item: dict):
-        """处理单个RSS项目"""
-        # 提取磁力链接
-        magnet_url : str | None = item.get("magnet") or item.get("enclosure")
-        if magnet_url:
-            if magnet_url.startswith("magnet:"):
-                pass
-            elif magnet_url.endswith(".torrent"):
-                # 如果是种子文件链接，转换为磁力链接，下载种子文件，获取infohash，tracers，生成磁力链接
-                from utils.magnet import convert_torrent_to_magnet
-                magnet_url = await convert_torrent_to_magnet(magnet_url)
-                if not magnet_url:
-                    return
-            else:
-                return
-        else:
-            return
+    async def _check_magnet_source(self, db: Any, source: Source) -> bool:
+        """为单个磁力链接源创建种子，返回是否创建了新种子"""
+        # 检查该磁力链接源是否已经创建过种子
+        existing_torrent = await db.execute(
+            select(Torrent).where(Torrent.source_id == source.id)
+        )
+        if existing_torrent.scalar_one_or_none():
+            # 如果已经存在种子，跳过
+            logger.debug(f"Magnet source {source.id} already has torrent, skipping")
+            return False
+        
+        # 验证磁力链接格式
+        magnet_url = source.url
+        if not magnet_url.startswith("magnet:"):
+            logger.warning(f"Invalid magnet URL for source {source.id}: {magnet_url}")
+            return False
         
         # 提取种子hash
         torrent_hash = QBittorrentClient.extract_hash_from_magnet(magnet_url)
-        logger.info(f"Processing RSS item for source {source.id}, manget url: {magnet_url}, torrent hash: {torrent_hash}")
+        logger.info(f"Processing magnet source {source.id}, magnet url: {magnet_url}, torrent hash: {torrent_hash}")
         if not torrent_hash:
-            return
+            logger.warning(f"Cannot extract hash from magnet URL: {magnet_url}")
+            return False
         
-        # 检查种子是否已存在
-        existing_torrent = await db.execute(
+        # 检查是否已存在相同hash的种子（可能来自其他源）
+        existing_hash_torrent = await db.execute(
             select(Torrent).where(Torrent.hash == torrent_hash)
         )
-        if existing_torrent.scalar_one_or_none():
-            return
+        if existing_hash_torrent.scalar_one_or_none():
+            logger.info(f"Torrent with hash {torrent_hash} already exists, skipping magnet source {source.id}")
+            return False
         
-        # 提取种子标题
-        from utils.magnet import extract_title_from_rss_item, extract_title_from_torrent
-        title = extract_title_from_rss_item(item)
-        if not title:
-            # 如果RSS项目没有标题，尝试从种子文件/磁力链接中提取
-            title = await extract_title_from_torrent(magnet_url)
+        # 尝试从磁力链接中提取标题
+        from utils.magnet import get_magnet_info
+        magnet_info = await get_magnet_info(magnet_url)
+        title = magnet_info.get('name') or source.title or f"Magnet Torrent {torrent_hash[:8]}"
         
         # 创建新种子记录
         new_torrent = Torrent(
             hash=torrent_hash,
             source_id=source.id,
             url=magnet_url,
-            title=title,  # 添加标题
+            title=title,
             status="pending",
             download_progress=0.0,
             created_at=datetime.utcnow()
@@ -275,194 +650,643 @@ class AutoBangumiScheduler:
         
         db.add(new_torrent)
         await self._safe_commit(db)
-        logger.info(f"Created new torrent: {torrent_hash}")
+        logger.info(f"Created new torrent from magnet source {source.id}: {torrent_hash}")
+        
+        # 更新源的最后检查时间（虽然磁力链接源不需要周期检查）
+        await db.execute(
+            update(Source).where(Source.id == source.id).values(
+                last_check=datetime.utcnow()
+            )
+        )
+        await self._safe_commit(db)
+        return True
+
     
-    async def _add_torrents_to_qbittorrent(self, db: Any):
-        """将未添加的种子添加到qBittorrent（包括pending和failed状态的种子）"""
-        logger.info("Adding pending/failed torrents to qBittorrent...")
+    async def _resolve_rss_item_magnet(self, item: FeedItem) -> Optional[str]:
+        """获取RSS项目对应的磁力链接"""
+        magnet_url : str | None = item.magnet or item.enclosure
+        if magnet_url and magnet_url.startswith("magnet:"):
+            return magnet_url
+        if magnet_url and magnet_url.endswith(".torrent"):
+            # 如果是种子文件链接，转换为磁力链接，下载种子文件，获取infohash，tracers，生成磁力链接
+            from utils.magnet import convert_torrent_to_magnet
+            converted = await convert_torrent_to_magnet(magnet_url)
+            if converted:
+                return converted
+        if item.infohash:
+            # feed直接给出了infohash（nyaa:infoHash等），无需种子文件即可生成磁力链接
+            magnet_url = f"magnet:?xt=urn:btih:{item.infohash}"
+            if item.title:
+                magnet_url += f"&dn={quote(item.title)}"
+            return magnet_url
+        return None
+    
+    async def _existing_torrent_hashes(self, db: Any, hashes: List[str]) -> set:
+        """用 IN (...) 查询批量找出已存在的种子hash"""
+        existing = set()
+        for start in range(0, len(hashes), HASH_QUERY_CHUNK):
+            chunk = hashes[start:start + HASH_QUERY_CHUNK]
+            result = await db.execute(
+                select(Torrent.hash).where(Torrent.hash.in_(chunk))
+            )
+            existing.update(result.scalars().all())
+        return existing
+    
+    @staticmethod
+    def _rss_item_keys(source: Source, item: FeedItem) -> List[str]:
+        """RSS项目在条目索引中的键：种子文件链接（全局唯一）和源内的GUID"""
+        keys = []
+        enclosure = item.enclosure
+        if enclosure and not enclosure.startswith("magnet:"):
+            keys.append(enclosure)
+        guid = item.guid
+        if guid:
+            keys.append(f"guid:{source.id}:{guid}")
+        return keys
+    
+    async def _seen_rss_item_keys(self, db: Any, keys: List[str]) -> set:
+        """查询已入库的条目键（只认对应种子仍然存在的记录）"""
+        seen = set()
+        for start in range(0, len(keys), HASH_QUERY_CHUNK):
+            chunk = keys[start:start + HASH_QUERY_CHUNK]
+            result = await db.execute(
+                select(RssItemIndex.key)
+                .join(Torrent, Torrent.hash == RssItemIndex.hash)
+                .where(RssItemIndex.key.in_(chunk))
+            )
+            seen.update(result.scalars().all())
+        return seen
+    
+    async def _ingest_feed(self, db: Any, source: Source, items: List[FeedItem]) -> Tuple[int, int]:
+        """处理一个feed的条目：RSS源直接入库，聚合订阅源按路由规则分发给各节目源后入库
+        
+        Returns:
+            (新建的种子数量, 暂未处理的条目数量)
+        """
+        if source.type != "router":
+            return await self._ingest_rss_items(db, source, items)
         
-        # 获取所有待添加的种子（包括failed状态的种子）
         result = await db.execute(
-            select(Torrent).where(Torrent.status.in_(["pending", "failed"]))
+            select(Source).where(Source.router_id == source.id, Source.type == "routed")
+        )
+        router = FeedRouter(list(result.scalars().all()))
+        for source_id, error in router.invalid.items():
+            logger.warning(f"Skipping routed source {source_id} of router {source.id}: {error}")
+        
+        created = unresolved = 0
+        routed = router.route(items)
+        for target, target_items in routed:
+            target_created, target_unresolved = await self._ingest_rss_items(db, target, target_items)
+            created += target_created
+            unresolved += target_unresolved
+        logger.info(
+            f"Router source {source.id} dispatched {sum(len(i) for _, i in routed)}/{len(items)} items "
+            f"to {len(routed)} sources"
         )
-        torrents : Optional[List[Torrent]] = result.scalars().all()
-        logger.info(f"Found {len(torrents) if torrents else 0} pending/failed torrents to add to qBittorrent")
+        return created, unresolved
+    
+    async def _feed_target_ids(self, db: Any, source: Source) -> List[int]:
+        """源的条目最终入库到哪些源：聚合订阅源为其下的节目源，其他为自身"""
+        if source.type != "router":
+            return [source.id]
+        result = await db.execute(select(Source.id).where(Source.router_id == source.id))
+        return list(result.scalars().all())
+    
+    async def _ingest_rss_items(self, db: Any, source: Source, items: List[FeedItem]) -> Tuple[int, int]:
+        """批量处理一个RSS源的所有项目
+        
+        先用条目索引跳过已入库的条目，再收集剩余条目的hash，用一次查询去重，
+        最后把新种子一次性插入（不提交，由调用方提交）。
+        
+        Returns:
+            (新建的种子数量, 因种子文件下载/解析失败而暂未处理的条目数量)
+        """
+        # 入库前过滤：不需要的条目不会下载种子文件，也不会获取元数据
+        try:
+            item_filter = get_item_filter(source)
+        except ValueError as e:
+            # 规则修正之前不入库，条目计为暂未处理，修正后会被重新处理
+            logger.warning(f"Invalid filter rules on source {source.id}, skipping {len(items)} items: {e}")
+            return 0, len(items)
+        filtered = item_filter.apply(items)
+        if item_filter.needs_ingested_titles(filtered):
+            # 较差分辨率的版本：已入库同一集更好版本时不再入库（更好的版本可能在之前的抓取中出现）
+            result = await db.execute(
+                select(Torrent.title).where(Torrent.source_id == source.id, Torrent.title.is_not(None))
+            )
+            filtered = item_filter.apply(filtered, result.scalars().all())
+        if len(filtered) != len(items):
+            logger.info(f"Source {source.id}: filter rules dropped {len(items) - len(filtered)} of {len(items)} items")
+        items = filtered
+        
+        # 已入库的条目直接跳过，不再下载或解析种子文件
+        item_keys = [(item, self._rss_item_keys(source, item)) for item in items]
+        all_keys = [key for _, keys in item_keys for key in keys]
+        seen = await self._seen_rss_item_keys(db, all_keys) if all_keys else set()
+        
+        # 提取每个条目的磁力链接和种子hash（同一个feed中重复的hash只保留第一个）
+        candidates: Dict[str, Tuple[str, dict]] = {}
+        index_rows: Dict[str, str] = {}  # 条目键 -> 种子hash
+        unresolved = 0
+        # feed直接给出infohash的条目，在下载种子文件之前就能判断种子是否已存在
+        known_hashes = {
+            item.infohash for item, keys in item_keys
+            if item.infohash and not any(key in seen for key in keys)
+        }
+        existing_known = await self._existing_torrent_hashes(db, list(known_hashes)) if known_hashes else set()
+        for item, keys in item_keys:
+            if any(key in seen for key in keys):
+                continue
+            if item.infohash in existing_known:
+                for key in keys:
+                    index_rows[key] = item.infohash
+                continue
+            magnet_url = await self._resolve_rss_item_magnet(item)
+            torrent_hash = QBittorrentClient.extract_hash_from_magnet(magnet_url) if magnet_url else None
+            if not torrent_hash:
+                link = item.magnet or item.enclosure or ""
+                if link.startswith("magnet:") or link.endswith(".torrent"):
+                    unresolved += 1
+                continue
+            for key in keys:
+                index_rows[key] = torrent_hash
+            if torrent_hash not in candidates:
+                candidates[torrent_hash] = (magnet_url, item)
+        
+        if not candidates:
+            return 0, unresolved
+        
+        # 检查种子是否已存在
+        existing = await self._existing_torrent_hashes(db, list(candidates))
+        
+        from utils.magnet import extract_title_from_rss_item, extract_title_from_torrent
+        new_torrents = []
+        for torrent_hash, (magnet_url, item) in candidates.items():
+            if torrent_hash in existing:
+                continue
+            
+            # 提取种子标题
+            title = extract_title_from_rss_item(item)
+            published_at = parse_pub_date(item.pub_date)
+            now = datetime.utcnow()
+            if not title:
+                # 如果RSS项目没有标题，尝试从种子文件/磁力链接中提取
+                title = await extract_title_from_torrent(magnet_url)
+            
+            new_torrents.append({
+                "hash": torrent_hash,
+                "source_id": source.id,
+                "url": magnet_url,
+                "title": title,
+                "status": "pending",
+                "download_progress": 0.0,
+                "created_at": now,
+                "published_at": min(published_at, now) if published_at else None,
+            })
+        
+        if new_torrents:
+            # 批量插入，hash唯一索引冲突（例如同时被其他源写入）时忽略
+            await db.execute(
+                sqlite_insert(Torrent).values(new_torrents).on_conflict_do_nothing(index_elements=["hash"])
+            )
+            for torrent in new_torrents:
+                logger.info(f"Created new torrent for source {source.id}: {torrent['hash']}")
+        
+        # 记录条目索引，下次轮询时这些条目在下载/解析之前即被跳过
+        if index_rows:
+            now = datetime.utcnow()
+            stmt = sqlite_insert(RssItemIndex).values([
+                {"key": key, "hash": torrent_hash, "seen_at": now}
+                for key, torrent_hash in index_rows.items()
+            ])
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"hash": stmt.excluded.hash, "seen_at": stmt.excluded.seen_at},
+            ))
+        
+        return len(new_torrents), unresolved
+    
+    def _available_qbittorrent(self, stage: str) -> Optional[AsyncQBittorrent]:
+        """获取共享的qBittorrent客户端，处于失败退避期时返回None并跳过该阶段"""
+        qb_client = get_qbittorrent()
+        if not qb_client.health.available:
+            logger.warning(
+                f"qBittorrent unavailable (last error: {qb_client.health.last_error}), "
+                f"skipping {stage} until {qb_client.health.retry_at}"
+            )
+            return None
+        return qb_client
+    
+    async def _add_torrents_to_qbittorrent(self, db: Any, torrent_ids: List[int]):
+        """将添加阶段队列中的种子添加到qBittorrent（pending或到期重试的failed种子）"""
+        logger.info("Adding pending/failed torrents to qBittorrent...")
+        
+        # 入队后状态可能已经变化，重新按状态过滤
+        now = datetime.utcnow()
+        torrents : List[Torrent] = []
+        for start in range(0, len(torrent_ids), HASH_QUERY_CHUNK):
+            result = await db.execute(
+                select(Torrent).where(
+                    Torrent.id.in_(torrent_ids[start:start + HASH_QUERY_CHUNK]),
+                    or_(
+                        Torrent.status == "pending",
+                        and_(Torrent.status == "failed", Torrent.next_retry_at <= now)
+                    )
+                )
+            )
+            torrents.extend(result.scalars().all())
+        logger.info(f"Found {len(torrents)} pending/failed torrents to add to qBittorrent")
         
         if not torrents:
             return
         
-        with QBittorrentClient() as qb_client:
-            for torrent in torrents:
-                try:
-                    # 为failed状态的种子记录重试日志
-                    if torrent.status == "failed":
-                        logger.info(f"Retrying failed torrent: {torrent.hash}")
-                    
-                    # 检查种子是否已存在于qBittorrent中
-                    if qb_client.is_torrent_exists(torrent.url):
-                        # 更新状态为downloading
-                        await db.execute(
-                            update(Torrent).where(Torrent.id == torrent.id).values(
-                                status="downloading",
-                                started_at=datetime.utcnow()
-                            )
-                        )
-                        logger.info(f"Torrent already exists in qBittorrent: {torrent.hash}")
-                        continue
-                    
-                    # 添加到qBittorrent
-                    success = qb_client.add_magnet(torrent.url)
-                    if success:
-                        await db.execute(
-                            update(Torrent).where(Torrent.id == torrent.id).values(
-                                status="downloading",
-                                started_at=datetime.utcnow()
-                            )
-                        )
-                        logger.info(f"Added torrent to qBittorrent: {torrent.hash}")
-                    else:
-                        await db.execute(
-                            update(Torrent).where(Torrent.id == torrent.id).values(
-                                status="failed",
-                                error_message="Failed to add to qBittorrent"
-                            )
-                        )
-                        logger.error(f"Failed to add torrent to qBittorrent: {torrent.hash}")
-                
-                except Exception as e:
-                    logger.error(f"Error adding torrent {torrent.hash}: {e}")
-                    await db.execute(
-                        update(Torrent).where(Torrent.id == torrent.id).values(
-                            status="failed",
-                            error_message=str(e)
-                        )
-                        )
+        qb_client = self._available_qbittorrent("adding torrents")
+        if qb_client is None:
+            return
+        for start in range(0, len(torrents), QB_BATCH_SIZE):
+            batch = torrents[start:start + QB_BATCH_SIZE]
+            try:
+                await self._add_torrent_batch(db, qb_client, batch)
+            except Exception as e:
+                if not qb_client.health.available:
+                    # qBittorrent不可达时保留种子当前状态，等待恢复后再添加
+                    logger.warning(f"qBittorrent unavailable, postponing remaining torrents: {e}")
+                    break
+                logger.error(f"Error adding torrent batch to qBittorrent: {e}")
+                self._record_add_failure(batch, str(e))
         
         await self._safe_commit(db)
     
+    async def _add_torrent_batch(self, db: Any, qb_client: AsyncQBittorrent, torrents: List[Torrent]):
+        """批量添加一组种子：一次查询已存在的种子，一次添加其余种子，再一次核对添加结果"""
+        for torrent in torrents:
+            # 为failed状态的种子记录重试日志
+            if torrent.status == "failed":
+                logger.info(f"Retrying failed torrent ({torrent.retry_count}/{CONFIG.scheduler.torrent_max_retries}): {torrent.hash}")
+        
+        # 检查种子是否已存在于qBittorrent中
+        present = await qb_client.torrents_info([t.hash for t in torrents])
+        if present is None:
+            raise RuntimeError("Failed to query qBittorrent")
+        for torrent in torrents:
+            if torrent.hash in present:
+                logger.info(f"Torrent already exists in qBittorrent: {torrent.hash}")
+        
+        # 添加到qBittorrent
+        to_add = [t for t in torrents if t.hash not in present]
+        if to_add:
+            accepted = await qb_client.torrents_add([t.url for t in to_add])
+            added = await qb_client.torrents_info([t.hash for t in to_add]) or {}
+            if accepted and len(added) < len(to_add):
+                # 磁力链接可能稍后才出现在列表中，等待后再核对一次
+                await asyncio.sleep(1)
+                added = await qb_client.torrents_info([t.hash for t in to_add]) or added
+            present.update(added)
+        
+        now = datetime.utcnow()
+        ok_ids = [t.id for t in torrents if t.hash in present]
+        failed = [t for t in torrents if t.hash not in present]
+        if ok_ids:
+            await db.execute(
+                update(Torrent).where(Torrent.id.in_(ok_ids)).values(
+                    status="downloading",
+                    started_at=now,
+                    retry_count=0,
+                    next_retry_at=None
+                )
+            )
+        self._sync_pending.update(t.hash for t in torrents if t.hash in present)
+        for torrent in to_add:
+            if torrent.hash in present:
+                logger.info(f"Added torrent to qBittorrent: {torrent.hash}")
+        if failed:
+            for torrent in failed:
+                logger.error(f"Failed to add torrent to qBittorrent: {torrent.hash}")
+            self._record_add_failure(failed, "Failed to add to qBittorrent")
+    
+    def _record_add_failure(self, torrents: List[Torrent], error_message: str):
+        """记录添加失败：按指数退避安排下次重试，超过重试上限的种子标记为dead"""
+        config = CONFIG.scheduler
+        now = datetime.utcnow()
+        for torrent in torrents:
+            torrent.retry_count = (torrent.retry_count or 0) + 1
+            torrent.error_message = error_message
+            if torrent.retry_count >= config.torrent_max_retries:
+                torrent.status = "dead"
+                torrent.next_retry_at = None
+                logger.warning(f"Torrent {torrent.hash} failed {torrent.retry_count} times, giving up")
+                continue
+            delay = min(
+                config.torrent_retry_base_delay * 2 ** (torrent.retry_count - 1),
+                config.torrent_retry_max_delay
+            )
+            torrent.status = "failed"
+            torrent.next_retry_at = now + timedelta(seconds=delay)
+    
     async def _update_torrent_progress(self, db: Any):
-        """更新种子下载进度"""
+        """根据qBittorrent的增量同步数据更新种子下载进度"""
         logger.debug("Updating torrent progress...")
         
-        # 获取所有正在下载的种子
-        result = await db.execute(
-            select(Torrent).where(Torrent.status == "downloading")
-        )
-        torrents = result.scalars().all()
+        try:
+            qb_client = self._available_qbittorrent("syncing torrent state")
+            if qb_client is None:
+                return
+            try:
+                changed = await self.qb_sync.poll(qb_client)
+                # 只需核对状态有变化的种子，以及新进入下载状态的种子
+                hashes = list(changed | self._sync_pending)
+                lookup = self.qb_sync.get
+            except Exception as e:
+                # 增量同步失败时退回到批量查询所有下载中的种子
+                logger.warning(f"sync/maindata failed, falling back to batched torrents_info: {e}")
+                self.qb_sync.reset()
+                result = await db.execute(
+                    select(Torrent.hash).where(Torrent.status == "downloading")
+                )
+                hashes = list(result.scalars().all())
+                infos: Dict[str, Dict[str, Any]] = {}
+                for start in range(0, len(hashes), QB_BATCH_SIZE):
+                    infos.update(await qb_client.torrents_info(hashes[start:start + QB_BATCH_SIZE]) or {})
+                lookup = infos.get
+        except Exception as e:
+            logger.error(f"Error syncing torrent state from qBittorrent: {e}")
+            return
         
-        if not torrents:
+        if not hashes:
             return
         
-        with QBittorrentClient() as qb_client:
-            for torrent in torrents:
-                try:
-                    info = qb_client.get_torrent_info(torrent.hash)
-                    if not info:
-                        continue
-                    
-                    progress = info.get("progress", 0)
-                    state = info.get("state", "")
-                    
-                    # 更新进度
-                    update_data = {"download_progress": progress}
-                    
-                    # 检查是否下载完成
-                    if state in ["uploading", "stalledUP", "queuedUP"] and progress >= 1.0:
-                        update_data["status"] = "completed"
-                        update_data["completed_at"] = datetime.utcnow()
-                        logger.info(f"Torrent completed: {torrent.hash}")
-                    
-                    await db.execute(
-                        update(Torrent).where(Torrent.id == torrent.id).values(**update_data)
-                    )
+        torrents = []
+        for start in range(0, len(hashes), HASH_QUERY_CHUNK):
+            result = await db.execute(
+                select(Torrent).where(
+                    Torrent.status == "downloading",
+                    Torrent.hash.in_(hashes[start:start + HASH_QUERY_CHUNK])
+                )
+            )
+            torrents.extend(result.scalars().all())
+        
+        for torrent in torrents:
+            try:
+                info = lookup(torrent.hash)
+                if not info:
+                    continue
+                
+                progress = info.get("progress", 0)
+                state = info.get("state", "")
                 
-                except Exception as e:
-                    logger.error(f"Error updating progress for torrent {torrent.hash}: {e}")
+                # 更新进度
+                update_data = {"download_progress": progress}
+                
+                # 检查是否下载完成
+                if state in ["uploading", "stalledUP", "queuedUP"] and progress >= 1.0:
+                    update_data["status"] = "completed"
+                    update_data["completed_at"] = datetime.utcnow()
+                    logger.info(f"Torrent completed: {torrent.hash}")
+                elif progress == torrent.download_progress:
+                    continue
+                
+                await db.execute(
+                    update(Torrent).where(Torrent.id == torrent.id).values(**update_data)
+                )
+            
+            except Exception as e:
+                logger.error(f"Error updating progress for torrent {torrent.hash}: {e}")
+        
+        # 仍在下载但尚未出现在镜像中的种子下次继续核对，其余的已核对完毕
+        # （只移除本轮核对过的hash，添加阶段可能在此期间加入了新的种子）
+        still_missing = {torrent.hash for torrent in torrents if lookup(torrent.hash) is None}
+        self._sync_pending.difference_update(h for h in hashes if h not in still_missing)
         
         await self._safe_commit(db)
     
-    async def _process_completed_torrents(self, db: Any):
-        """处理已完成的种子"""
+    async def _process_completed_torrents(self, db: Any, torrent_ids: List[int]):
+        """处理已完成的种子（completed -> processing -> processed/process_failed，每个种子只处理一次）"""
         logger.info("Processing completed torrents...")
         
-        # 获取所有已完成但未处理文件的种子
-        result = await db.execute(
-            select(Torrent).where(
-                Torrent.status == "completed",
-                ~Torrent.files.any()  # 没有关联的文件记录
-            )
-        )
-        torrents = result.scalars().all()
-        
-        if not torrents:
+        qb_client = self._available_qbittorrent("processing completed torrents")
+        if qb_client is None:
             return
         
-        with QBittorrentClient() as qb_client:
-            for torrent in torrents:
-                try:
-                    await self._process_torrent_files(db, qb_client, torrent)
-                except Exception as e:
-                    logger.error(f"Error processing files for torrent {torrent.hash}: {e}")
-        
-        await self._safe_commit(db)
+        for torrent_id in torrent_ids:
+            torrent = await db.get(Torrent, torrent_id)
+            if torrent is None or torrent.status != "completed":
+                continue
+            torrent.status = "processing"
+            await self._safe_commit(db)
+            # 规划阶段可能在此之前刚刚提交，重新读取files_planned
+            await db.refresh(torrent)
+            try:
+                await self._process_torrent_files(db, qb_client, torrent)
+                torrent.status = "processed"
+                torrent.error_message = None
+            except Exception as e:
+                # 丢弃本次处理中途产生的文件记录，回滚后需重新加载种子
+                await self._safe_rollback(db)
+                torrent = await db.get(Torrent, torrent_id)
+                if torrent is None:
+                    continue
+                if not qb_client.health.available:
+                    # qBittorrent不可达，放回队列等待恢复后再处理
+                    logger.warning(f"qBittorrent unavailable, postponing post-processing: {e}")
+                    torrent.status = "completed"
+                    await self._safe_commit(db)
+                    break
+                logger.error(f"Error processing files for torrent {torrent.hash}: {e}")
+                torrent.status = "process_failed"
+                torrent.error_message = f"文件处理失败: {e}"
+            await self._safe_commit(db)
     
-    async def _process_torrent_files(self, db: Any, qb_client: QBittorrentClient, torrent: Torrent):
+    async def _process_torrent_files(self, db: Any, qb_client: AsyncQBittorrent, torrent: Torrent):
         """处理种子文件"""
-        # 获取种子文件列表
-        files = qb_client.get_torrent_files(torrent.hash)
-        if not files:
-            return
-        
         # 获取源信息
         source : Optional[Source] = await db.get(Source, torrent.source_id)
         if not source:
+            raise RuntimeError("种子所属的源不存在")
+        
+        # 下载期间已完成规划的种子只需创建硬链接
+        if torrent.files_planned:
+            await self._link_planned_files(db, source, torrent)
             return
         
-        for file_info in files:
-            file_name = file_info.get("name", "")
-            file_path = file_info.get("path") or file_info.get("name", "")
-            file_size = file_info.get("size", 0)
-            full_path = self._resolve_full_path(file_path)
-            
-            # 判断文件是否重要
-            is_important, is_main_episode, is_video = await is_file_important(file_name)
-            if not is_important:
-                continue
-            
-            # 判断文件类型
-            file_type = "episode" if is_main_episode else "special"
-            if file_name.lower().endswith(('.srt', '.ass', '.ssa', '.vtt', '.sub')):
-                file_type = "subtitle"
-            
-            # 创建文件记录
-            file_record = File(
-                torrent_id=torrent.id,
-                name=file_name,
-                path=file_path,
-                size=file_size,
-                file_type=file_type,
-                created_at=datetime.utcnow()
-            )
-            
-            # 提取剧集信息
-            if (is_main_episode or file_type == "subtitle") and source.media_type == "tv":
-                episode = await self._extract_episode_number(source, file_name)
-                if episode:
-                    file_record.extracted_episode = episode
-                    file_record.final_episode = episode + source.episode_offset
-
-                await self._resolve_season_for_file(source, file_record, full_path)
-            
+        # 获取种子文件列表
+        files = await qb_client.get_torrent_files(torrent.hash)
+        if not files:
+            raise RuntimeError("qBittorrent中没有该种子的文件列表")
+        
+        # 各文件的分类、剧集和季号提取相互独立，并发进行（LLM请求数由llm.concurrency限制）
+        analyzed = await asyncio.gather(
+            *(self._analyze_torrent_file(source, torrent, file_info) for file_info in files)
+        )
+        
+        # 汇总分析结果后依次写入数据库并创建硬链接
+        for file_record, needs_hardlink in (result for result in analyzed if result):
             db.add(file_record)
             
             # 如果需要创建硬链接 (视频文件或字幕文件)
-            if CONFIG.hardlink.enable and (is_video or file_type == "subtitle") and is_main_episode:
-                hardlink_result = await self._create_hardlink(db, source, file_record, False)
+            if needs_hardlink:
+                hardlink_result = await self._create_hardlink(db, source, file_record, False, resolve_season=False)
                 if hardlink_result.startswith("/"):
                     logger.info(f"硬链接创建成功: {hardlink_result}")
                 else:
                     logger.warning(f"硬链接创建失败: {hardlink_result}")
     
+    async def _plan_torrent_files(self, db: Any, torrent_ids: List[int]):
+        """规划阶段：元数据就绪后提前分析下载中种子的文件，写入预规划的文件记录和硬链接目标"""
+        qb_client = self._available_qbittorrent("planning torrent files")
+        if qb_client is None:
+            return
+        
+        for torrent_id in torrent_ids:
+            torrent = await db.get(Torrent, torrent_id)
+            if torrent is None or torrent.files_planned or torrent.status != "downloading":
+                continue
+            source : Optional[Source] = await db.get(Source, torrent.source_id)
+            if not source:
+                continue
+            
+            attempts = torrent.plan_attempts or 0
+            try:
+                # 元数据尚未获取到时文件列表为空，退避后再试
+                files = await qb_client.get_torrent_files(torrent.hash)
+                if not files:
+                    await self._postpone_planning(db, torrent_id, attempts)
+                    continue
+                
+                analyzed = await asyncio.gather(
+                    *(self._analyze_torrent_file(source, torrent, file_info) for file_info in files)
+                )
+                await self._skip_unwanted_files(qb_client, source, torrent, files, analyzed)
+                for file_record, needs_hardlink in (result for result in analyzed if result):
+                    db.add(file_record)
+                    if needs_hardlink:
+                        dest_path, error_msg = await self._plan_hardlink_target(db, source, file_record)
+                        if error_msg:
+                            file_record.hardlink_status = "failed"
+                            file_record.hardlink_error = error_msg
+                        else:
+                            file_record.hardlink_path = dest_path
+                            file_record.hardlink_status = "planned"
+                
+                # 种子可能在分析期间已被后处理阶段接手，此时放弃本次规划
+                claimed = await db.execute(
+                    update(Torrent).where(
+                        Torrent.id == torrent_id,
+                        Torrent.status.in_(["downloading", "completed"]),
+                        Torrent.files_planned.is_(False)
+                    ).values(files_planned=True)
+                )
+                if claimed.rowcount != 1:
+                    await self._safe_rollback(db)
+                    continue
+                await self._safe_commit(db)
+                logger.info(f"Planned {len(files)} files for downloading torrent {torrent.hash}")
+            except Exception as e:
+                logger.error(f"Error planning files for torrent {torrent_id}: {e}")
+                await self._safe_rollback(db)
+                await self._postpone_planning(db, torrent_id, attempts)
+    
+    async def _postpone_planning(self, db: Any, torrent_id: int, attempts: int):
+        """记录一次规划失败，按指数退避推迟下次规划，超过尝试上限后不再规划"""
+        attempts += 1
+        delay = min(PLAN_RETRY_BASE_DELAY * 2 ** (attempts - 1), PLAN_RETRY_MAX_DELAY)
+        try:
+            await db.execute(
+                update(Torrent).where(Torrent.id == torrent_id).values(
+                    plan_attempts=attempts,
+                    next_plan_at=datetime.utcnow() + timedelta(seconds=delay)
+                )
+            )
+            await self._safe_commit(db)
+        except Exception as e:
+            logger.error(f"Error postponing planning for torrent {torrent_id}: {e}")
+            await self._safe_rollback(db)
+            return
+        if attempts >= PLAN_MAX_ATTEMPTS:
+            logger.warning(f"Giving up planning files for torrent {torrent_id} after {attempts} attempts")
+    
+    async def _skip_unwanted_files(
+        self,
+        qb_client: AsyncQBittorrent,
+        source: Source,
+        torrent: Torrent,
+        files: List[Dict[str, Any]],
+        analyzed: List[Optional[Tuple[File, bool]]]
+    ):
+        """把不会被硬链接的文件在qBittorrent中设为不下载（优先级0）"""
+        if not CONFIG.hardlink.enable or not source.skip_unwanted_files:
+            return
+        
+        unwanted = [
+            file_info.get("index", position)
+            for position, (file_info, result) in enumerate(zip(files, analyzed))
+            if not result or not result[1]
+        ]
+        # 没有任何需要的文件时多半是分类出了问题，保持全部下载
+        if not unwanted or len(unwanted) == len(files):
+            return
+        
+        if await qb_client.set_file_priority(torrent.hash, unwanted, 0):
+            logger.info(f"Skipping {len(unwanted)}/{len(files)} unwanted files of torrent {torrent.hash}")
+    
+    async def _link_planned_files(self, db: Any, source: Source, torrent: Torrent):
+        """为已规划的种子创建硬链接，文件分析结果在下载期间已经写入"""
+        result = await db.execute(select(File).where(File.torrent_id == torrent.id))
+        for file_record in result.scalars().all():
+            if file_record.hardlink_status == "planned":
+                hardlink_result = await self._create_planned_hardlink(db, file_record)
+            elif file_record.hardlink_status == "failed":
+                # 规划时未能确定目标路径（如存在冲突），完成时再按常规流程尝试一次
+                hardlink_result = await self._create_hardlink(db, source, file_record, False, resolve_season=False)
+            else:
+                continue
+            if hardlink_result.startswith("/"):
+                logger.info(f"硬链接创建成功: {hardlink_result}")
+            else:
+                logger.warning(f"硬链接创建失败: {hardlink_result}")
+    
+    async def _analyze_torrent_file(self, source: Source, torrent: Torrent, file_info: Dict[str, Any]) -> Optional[Tuple[File, bool]]:
+        """分析单个文件：判断是否重要、文件类型、剧集和季号
+        
+        Returns:
+            (未写入数据库的文件记录, 是否需要创建硬链接)，不重要的文件返回None
+        """
+        file_name = file_info.get("name", "")
+        file_path = file_info.get("path") or file_info.get("name", "")
+        file_size = file_info.get("size", 0)
+        full_path = self._resolve_full_path(file_path)
+        
+        # 判断文件是否重要
+        is_important, is_main_episode, is_video = await is_file_important(file_name)
+        if not is_important:
+            return None
+        
+        # 判断文件类型
+        file_type = "episode" if is_main_episode else "special"
+        if file_name.lower().endswith(('.srt', '.ass', '.ssa', '.vtt', '.sub')):
+            file_type = "subtitle"
+        
+        # 创建文件记录
+        file_record = File(
+            torrent_id=torrent.id,
+            name=file_name,
+            path=file_path,
+            size=file_size,
+            file_type=file_type,
+            created_at=datetime.utcnow()
+        )
+        
+        # 提取剧集信息
+        if (is_main_episode or file_type == "subtitle") and source.media_type == "tv":
+            episode = await self._extract_episode_number(source, file_name)
+            if episode:
+                file_record.extracted_episode = episode
+                file_record.final_episode = episode + source.episode_offset
+
+            await self._resolve_season_for_file(source, file_record, full_path)
+        
+        needs_hardlink = CONFIG.hardlink.enable and (is_video or file_type == "subtitle") and is_main_episode
+        return file_record, needs_hardlink
+    
     async def _extract_episode_number(self, source: Source, filename: str) -> Optional[int]:
         """提取剧集编号"""
         try:
@@ -480,7 +1304,7 @@ class AutoBangumiScheduler:
             logger.error(f"Error extracting episode from {filename}: {e}")
             return None
     
-    async def _create_hardlink(self, db: Any, source: Source, file_record: File, force_overwrite: bool = False) -> str:
+    async def _create_hardlink(self, db: Any, source: Source, file_record: File, force_overwrite: bool = False, resolve_season: bool = True) -> str:
         """创建硬链接
         
         Args:
@@ -488,108 +1312,132 @@ class AutoBangumiScheduler:
             source: 源信息
             file_record: 文件记录
             force_overwrite: 是否强制覆盖已存在的硬链接
+            resolve_season: 是否重新解析季号（文件分析阶段已解析过时传False）
             
         Returns:
             str: 创建的硬链接路径或错误信息
         """
         try:
-            # Ensure title cannot escape output_base in strict mode
-            title = source.title or ""
-            if os.path.isabs(title) or ".." in os.path.normpath(title).split(os.sep):
-                error_msg = f"非法标题路径: {title}"
-                file_record.hardlink_status = "failed"
-                file_record.hardlink_error = error_msg
-                return error_msg
-
-            # 检查是否开启硬链接
-            if not CONFIG.hardlink.enable:
-                error_msg = "未开启硬链接功能"
+            # 检查源文件是否存在
+            source_path = self._resolve_full_path(file_record.path)
+            if not os.path.exists(source_path):
+                error_msg = f"源文件不存在: {source_path}"
                 file_record.hardlink_status = "failed"
                 file_record.hardlink_error = error_msg
                 return error_msg
             
-            if not CONFIG.hardlink.output_base:
-                error_msg = "未配置硬链接输出目录"
+            if source.media_type == "tv" and resolve_season:
+                await self._resolve_season_for_file(source, file_record, source_path)
+            
+            dest_path, error_msg = await self._plan_hardlink_target(db, source, file_record, force_overwrite)
+            if error_msg:
                 file_record.hardlink_status = "failed"
                 file_record.hardlink_error = error_msg
                 return error_msg
             
-            # 检查源文件是否存在
-            source_path = file_record.path
-            # 如果路径不是绝对路径，尝试与下载目录合并
-            if not os.path.isabs(source_path) and hasattr(CONFIG.download, 'download_dir') and CONFIG.download.download_dir:
-                source_path = os.path.join(CONFIG.download.download_dir, source_path)
+            return self._link_file(source_path, dest_path, file_record)
+            
+        except Exception as e:
+            error_msg = f"创建硬链接失败: {str(e)}"
+            logger.error(error_msg)
             
+            # 更新文件记录的错误状态
+            file_record.hardlink_status = "failed"
+            file_record.hardlink_error = str(e)
+            
+            return error_msg
+    
+    async def _create_planned_hardlink(self, db: Any, file_record: File) -> str:
+        """按规划阶段确定的目标路径创建硬链接"""
+        try:
+            source_path = self._resolve_full_path(file_record.path)
             if not os.path.exists(source_path):
                 error_msg = f"源文件不存在: {source_path}"
                 file_record.hardlink_status = "failed"
                 file_record.hardlink_error = error_msg
                 return error_msg
             
-            # 获取文件扩展名和基本名称
-            file_basename, file_ext = os.path.splitext(source_path)
-
-            if source.media_type == "tv":
-                await self._resolve_season_for_file(source, file_record, source_path)
-            
-            # 根据媒体类型和文件类型构建目标路径
-            dest_path = await self._build_hardlink_path(source, file_record, file_ext)
-            if not dest_path:
-                error_msg = "无法构建硬链接目标路径"
-                file_record.hardlink_status = "failed"
-                file_record.hardlink_error = error_msg
-                return error_msg
-
-            output_base = os.path.abspath(CONFIG.hardlink.output_base)
-            dest_abs = os.path.abspath(dest_path)
-            if os.path.commonpath([output_base, dest_abs]) != output_base:
-                error_msg = f"硬链接路径越界: {dest_path}"
+            # 规划之后其他种子可能已经链接到同一路径
+            dest_path = file_record.hardlink_path
+            conflict_check = await self._check_hardlink_conflicts(db, dest_path, file_record.id)
+            if conflict_check:
+                error_msg = f"硬链接冲突: 多个文件将指向同一路径 {dest_path}，存在冲突的文件: {conflict_check}"
+                file_record.hardlink_path = None
                 file_record.hardlink_status = "failed"
                 file_record.hardlink_error = error_msg
                 return error_msg
             
-            # 检查是否有多个文件会硬链接到同一个路径（仅在非强制覆盖模式下）
-            if not force_overwrite:
-                conflict_check = await self._check_hardlink_conflicts(db, dest_path, file_record.id)
-                if conflict_check:
-                    error_msg = f"硬链接冲突: 多个文件将指向同一路径 {dest_path}，存在冲突的文件: {conflict_check}"
-                    file_record.hardlink_status = "failed"
-                    file_record.hardlink_error = error_msg
-                    return error_msg
-            
-            # 确保目标目录存在
-            dest_dir = os.path.dirname(dest_path)
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir, exist_ok=True)
-            
-            logger.info(f"创建硬链接: {source_path} -> {dest_path}")
-            
-            # 如果目标文件已存在，直接删除（不管是否同一文件）
-            if os.path.exists(dest_path):
-                os.unlink(dest_path)
-                logger.info(f"删除已存在的目标文件: {dest_path}")
-            
-            # 创建硬链接
-            os.link(source_path, dest_path)
-            logger.info(f"创建硬链接成功: {source_path} -> {dest_path}")
-            
-            # 更新File表
-            file_record.hardlink_path = dest_path
-            file_record.hardlink_error = None
-            file_record.hardlink_status = "completed"
-            
-            return dest_path
+            return self._link_file(source_path, dest_path, file_record)
             
         except Exception as e:
             error_msg = f"创建硬链接失败: {str(e)}"
             logger.error(error_msg)
-            
-            # 更新文件记录的错误状态
             file_record.hardlink_status = "failed"
             file_record.hardlink_error = str(e)
-            
             return error_msg
     
+    async def _plan_hardlink_target(self, db: Any, source: Source, file_record: File, force_overwrite: bool = False) -> Tuple[Optional[str], Optional[str]]:
+        """计算并校验硬链接目标路径（不访问源文件）
+        
+        Returns:
+            (目标路径, 错误信息)，二者之一为None
+        """
+        # Ensure title cannot escape output_base in strict mode
+        title = source.title or ""
+        if os.path.isabs(title) or ".." in os.path.normpath(title).split(os.sep):
+            return None, f"非法标题路径: {title}"
+
+        # 检查是否开启硬链接
+        if not CONFIG.hardlink.enable:
+            return None, "未开启硬链接功能"
+        
+        if not CONFIG.hardlink.output_base:
+            return None, "未配置硬链接输出目录"
+        
+        # 根据媒体类型和文件类型构建目标路径
+        file_ext = os.path.splitext(file_record.path)[1]
+        dest_path = await self._build_hardlink_path(source, file_record, file_ext)
+        if not dest_path:
+            return None, "无法构建硬链接目标路径"
+
+        output_base = os.path.abspath(CONFIG.hardlink.output_base)
+        dest_abs = os.path.abspath(dest_path)
+        if os.path.commonpath([output_base, dest_abs]) != output_base:
+            return None, f"硬链接路径越界: {dest_path}"
+        
+        # 检查是否有多个文件会硬链接到同一个路径（仅在非强制覆盖模式下）
+        if not force_overwrite:
+            conflict_check = await self._check_hardlink_conflicts(db, dest_path, file_record.id)
+            if conflict_check:
+                return None, f"硬链接冲突: 多个文件将指向同一路径 {dest_path}，存在冲突的文件: {conflict_check}"
+        
+        return dest_path, None
+    
+    def _link_file(self, source_path: str, dest_path: str, file_record: File) -> str:
+        """创建硬链接并更新文件记录"""
+        # 确保目标目录存在
+        dest_dir = os.path.dirname(dest_path)
+        if not os.path.exists(dest_dir):
+            os.makedirs(dest_dir, exist_ok=True)
+        
+        logger.info(f"创建硬链接: {source_path} -> {dest_path}")
+        
+        # 如果目标文件已存在，直接删除（不管是否同一文件）
+        if os.path.exists(dest_path):
+            os.unlink(dest_path)
+            logger.info(f"删除已存在的目标文件: {dest_path}")
+        
+        # 创建硬链接
+        os.link(source_path, dest_path)
+        logger.info(f"创建硬链接成功: {source_path} -> {dest_path}")
+        
+        # 更新File表
+        file_record.hardlink_path = dest_path
+        file_record.hardlink_error = None
+        file_record.hardlink_status = "completed"
+        
+        return dest_path
+    
     async def _build_hardlink_path(self, source: Source, file_record: File, file_ext: str) -> Optional[str]:
         """构建硬链接目标路径"""
         try:
@@ -695,11 +1543,12 @@ class AutoBangumiScheduler:
     async def _check_hardlink_conflicts(self, db: Any, dest_path: str, current_file_id: int) -> Optional[str]:
         """检查硬链接冲突"""
         try:
-            # 查询是否有其他文件记录指向同一个目标路径
+            # 查询是否有其他文件记录指向同一个目标路径（仅规划、尚未链接的文件不算冲突）
             result = await db.execute(
                 select(File).where(
                     File.hardlink_path == dest_path,
-                    File.id != current_file_id
+                    File.id != current_file_id,
+                    or_(File.hardlink_status.is_(None), File.hardlink_status != "planned")
                 )
             )
             conflict_files = result.scalars().all()
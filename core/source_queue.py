@@ -0,0 +1,94 @@
+import asyncio
+import heapq
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# 启动时为每个源附加的随机抖动：不超过检查间隔的10%，且最多5分钟
+JITTER_RATIO = 0.1
+MAX_JITTER_SECONDS = 300
+
+
+def jittered_due(
+    last_check: Optional[datetime],
+    check_interval: int,
+    now: datetime,
+    next_check: Optional[datetime] = None,
+) -> datetime:
+    """根据计划的下次检查时间（未记录时按最后检查时间和检查间隔）计算带抖动的下次检查时间"""
+    due = now
+    if next_check is not None:
+        due = max(now, next_check)
+    elif last_check is not None:
+        due = max(now, last_check + timedelta(seconds=check_interval))
+    jitter = random.uniform(0, min(check_interval * JITTER_RATIO, MAX_JITTER_SECONDS))
+    return due + timedelta(seconds=jitter)
+
+
+class SourceDueQueue:
+    """按下次检查时间排序的源队列（最小堆，更新时惰性删除旧条目）"""
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, int]] = []  # (到期时间, 序号, 源ID)
+        self._entries: Dict[int, int] = {}  # 源ID -> 当前有效条目的序号
+        self._seq = 0
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, source_id: int) -> bool:
+        return source_id in self._entries
+
+    def schedule(self, source_id: int, due: datetime) -> None:
+        """设置（或覆盖）源的下次检查时间"""
+        self._seq += 1
+        self._entries[source_id] = self._seq
+        heapq.heappush(self._heap, (due, self._seq, source_id))
+        self._changed.set()
+
+    def remove(self, source_id: int) -> None:
+        """移除源，堆中的旧条目在弹出时丢弃"""
+        if self._entries.pop(source_id, None) is not None:
+            self._changed.set()
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+        self._changed.set()
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            _, seq, source_id = self._heap[0]
+            if self._entries.get(source_id) == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """最早到期的时间，队列为空时返回None"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """弹出所有已到期的源ID"""
+        # 调用方随后会根据当前状态决定睡眠时长，此后的修改需要重新唤醒它
+        self._changed.clear()
+        due_ids: List[int] = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, source_id = heapq.heappop(self._heap)
+            del self._entries[source_id]
+            due_ids.append(source_id)
+        return due_ids
+
+    async def wait(self, deadline: datetime) -> None:
+        """睡眠至deadline，队列被修改时提前返回"""
+        timeout = (deadline - datetime.utcnow()).total_seconds()
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
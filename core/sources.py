@@ -17,3 +17,11 @@ async def get_source_by_id(db: AsyncSession, source_id: int) -> Optional[Source]
     """根据ID获取来源"""
     source = await db.get(Source, source_id)
     return source if source else None
+
+# 源的条件请求信息和上次处理到的条目，清除后下次检查时完整抓取并处理所有条目
+FEED_STATE_FIELDS = ("feed_etag", "feed_last_modified", "feed_digest", "last_seen_item")
+
+def clear_feed_state(source: Source) -> None:
+    """清除源的条件请求信息和上次处理位置（不提交）"""
+    for field in FEED_STATE_FIELDS:
+        setattr(source, field, None)
@@ -13,6 +13,7 @@ from api.torrent import router as torrent_router
 from api.user import router as user_router
 from api.cache import router as cache_router
 from api.logs import router as logs_router
+from api.scheduler import router as scheduler_router
 from core.logging_config import configure_logging
 
 configure_logging()
@@ -28,6 +29,10 @@ async def lifespan(app: FastAPI):
     from models.session import init_db
     await init_db()
     
+    # 创建共享的对外HTTP连接池
+    from utils.http import start_http, close_http
+    await start_http()
+    
     # 启动定时任务调度器
     from core.scheduler import scheduler
     await scheduler.start()
@@ -42,6 +47,13 @@ async def lifespan(app: FastAPI):
     # 停止定时任务调度器
     await scheduler.stop()
 
+    # 关闭共享的qBittorrent连接
+    from utils.qbittorrent import close_qbittorrent
+    await close_qbittorrent()
+
+    # 关闭共享的对外HTTP连接池
+    await close_http()
+
     # 停止DHT服务
     dht_service.stop()
 
@@ -60,6 +72,7 @@ app.include_router(torrent_router, prefix="/api/torrent")
 app.include_router(user_router, prefix="/api/user")
 app.include_router(cache_router, prefix="/api/cache")
 app.include_router(logs_router, prefix="/api/logs")
+app.include_router(scheduler_router, prefix="/api/scheduler")
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Boolean, ForeignKey, DateTime, Float, Text
+from sqlalchemy import String, Boolean, ForeignKey, DateTime, Float, Text, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import Base
@@ -12,7 +12,7 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 class Source(Base):
-    type: Mapped[str] = mapped_column(String)  # RSS/magnet
+    type: Mapped[str] = mapped_column(String)  # rss/magnet/router（聚合订阅源）/routed（由聚合订阅源分发条目的节目源）
     url: Mapped[str] = mapped_column(String)
     media_type: Mapped[str] = mapped_column(String)  # movie/tv
     title: Mapped[str] = mapped_column(String, index=True)  # 媒体标题
@@ -27,10 +27,39 @@ class Source(Base):
     episode_regex: Mapped[str | None] = mapped_column(String, nullable=True)  # 剧集正则表达式
     episode_offset: Mapped[int] = mapped_column(default=0)  # 剧集偏移量
     
+    # 聚合订阅路由（仅用于routed类型）：条目标题匹配规则时由所属的聚合订阅源分发给本源
+    router_id: Mapped[int | None] = mapped_column(
+        ForeignKey("source.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
+    route_pattern: Mapped[str | None] = mapped_column(String, nullable=True)  # 关键词（空格分隔，全部包含）或正则表达式
+    route_use_regex: Mapped[bool] = mapped_column(Boolean, default=False)  # 路由规则是否为正则表达式
+    
+    # 入库前的条目过滤规则（在下载种子文件/获取元数据之前对feed条目求值）
+    filter_include: Mapped[str | None] = mapped_column(String, nullable=True)  # 标题须匹配的正则
+    filter_exclude: Mapped[str | None] = mapped_column(String, nullable=True)  # 标题匹配则排除的正则
+    filter_resolutions: Mapped[str | None] = mapped_column(String, nullable=True)  # 接受的分辨率，按偏好排列，如 1080p,720p
+    filter_subgroups: Mapped[str | None] = mapped_column(String, nullable=True)  # 接受的字幕组，逗号分隔
+    filter_min_size_mb: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 最小体积（MB）
+    filter_max_size_mb: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 最大体积（MB）
+    
+    # 下载策略
+    skip_unwanted_files: Mapped[bool] = mapped_column(Boolean, default=False)  # 不下载不会被硬链接的文件（样片、NCOP/NCED、菜单等）
+    
     # 其他设置
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     last_check: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # RSS最后检查时间
-    check_interval: Mapped[int] = mapped_column(default=3600)  # RSS检查间隔（秒）
+    check_interval: Mapped[int] = mapped_column(default=3600)  # RSS检查间隔（秒），发布历史不足以学习发布节奏时使用
+    # 自适应检查间隔的上下限（秒），为空时使用 scheduler.adaptive_min_interval/adaptive_max_interval
+    min_check_interval: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    max_check_interval: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    next_check: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # 计划的下次检查时间，重启后按它恢复检查队列
+    # RSS条件请求：上次响应的ETag/Last-Modified，以及上次成功处理的内容摘要
+    feed_etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    feed_last_modified: Mapped[str | None] = mapped_column(String, nullable=True)
+    feed_digest: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_seen_item: Mapped[str | None] = mapped_column(String, nullable=True)  # 上次处理的最新条目标识，下次解析读到它即停止
     outdated: Mapped[bool] = mapped_column(Boolean, default=False)  # 是否过期
     
     # 关系
@@ -42,19 +71,31 @@ class Source(Base):
     )
 
 class Torrent(Base):
+    __table_args__ = (
+        # 调度器按 status = failed AND next_retry_at <= now 选取到期重试的种子
+        Index("ix_torrent_status_next_retry_at", "status", "next_retry_at"),
+    )
+    
     hash: Mapped[str] = mapped_column(String, unique=True, index=True)
     source_id: Mapped[int] = mapped_column(
         ForeignKey("source.id", ondelete="CASCADE"),  # 当Source被删除时，删除关联的Torrent
         index=True
     )
     url: Mapped[str] = mapped_column(String)  # 磁力链接
-    status: Mapped[str] = mapped_column(String)  # downloading/downloaded/failed
+    # pending/downloading/failed/dead -> completed -> processing -> processed/process_failed
+    status: Mapped[str] = mapped_column(String)
     download_progress: Mapped[float] = mapped_column(Float, default=0.0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)  # 错误信息
     title: Mapped[str | None] = mapped_column(String, nullable=True)  # 种子标题
+    published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # feed条目的发布时间（UTC），用于学习源的发布节奏
+    retry_count: Mapped[int] = mapped_column(Integer, default=0)  # 添加到qBittorrent失败的次数
+    next_retry_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # 下次重试时间
+    files_planned: Mapped[bool] = mapped_column(Boolean, default=False)  # 下载期间是否已根据元数据预先规划文件
+    plan_attempts: Mapped[int] = mapped_column(Integer, default=0)  # 规划失败（元数据未就绪或分析出错）的次数
+    next_plan_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # 下次尝试规划的时间
     
     # 关系
     source: Mapped["Source"] = relationship("Source", back_populates="torrents")
@@ -85,9 +126,15 @@ class File(Base):
     
     # 硬链接相关
     hardlink_path: Mapped[str | None] = mapped_column(nullable=True)
-    hardlink_status: Mapped[str | None] = mapped_column(nullable=True)  # pending/completed/failed
+    hardlink_status: Mapped[str | None] = mapped_column(nullable=True)  # planned/pending/completed/failed
     hardlink_error: Mapped[str | None] = mapped_column(nullable=True)  # 硬链接错误信息
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     
     # 关系
     torrent: Mapped["Torrent"] = relationship("Torrent", back_populates="files")
+
+class RssItemIndex(Base):
+    # RSS条目标识到种子hash的映射，已入库的条目在下载/解析种子文件之前即可跳过
+    key: Mapped[str] = mapped_column(String, unique=True, index=True)  # 种子文件链接，或 guid:<源ID>:<GUID>
+    hash: Mapped[str] = mapped_column(String, index=True)  # 对应的种子hash
+    seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)  # 最近一次入库/确认的时间
@@ -13,6 +13,8 @@ DATABASE_URL = "sqlite+aiosqlite:///./aibangumi.db"
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,  # Disable echo to prevent info logs
+    # 调度器各阶段使用各自的session并发写入，等待写锁而不是立即报 database is locked
+    connect_args={"timeout": 30},
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -29,8 +31,50 @@ async def init_db():
 
 async def _migrate_schema(conn) -> None:
     await _ensure_column(conn, "source", "multi_season", "BOOLEAN", default="0")
+    await _ensure_column(conn, "source", "skip_unwanted_files", "BOOLEAN", default="0")
+    await _ensure_column(conn, "source", "feed_etag", "VARCHAR")
+    await _ensure_column(conn, "source", "feed_last_modified", "VARCHAR")
+    await _ensure_column(conn, "source", "feed_digest", "VARCHAR")
+    await _ensure_column(conn, "source", "last_seen_item", "VARCHAR")
+    await _ensure_column(conn, "source", "router_id", "INTEGER")
+    await _ensure_column(conn, "source", "filter_include", "VARCHAR")
+    await _ensure_column(conn, "source", "filter_exclude", "VARCHAR")
+    await _ensure_column(conn, "source", "filter_resolutions", "VARCHAR")
+    await _ensure_column(conn, "source", "filter_subgroups", "VARCHAR")
+    await _ensure_column(conn, "source", "filter_min_size_mb", "INTEGER")
+    await _ensure_column(conn, "source", "filter_max_size_mb", "INTEGER")
+    await _ensure_column(conn, "source", "route_pattern", "VARCHAR")
+    await _ensure_column(conn, "source", "route_use_regex", "BOOLEAN", default="0")
+    await _ensure_column(conn, "source", "min_check_interval", "INTEGER")
+    await _ensure_column(conn, "source", "max_check_interval", "INTEGER")
+    await _ensure_column(conn, "source", "next_check", "DATETIME")
     await _ensure_column(conn, "file", "extracted_season", "INTEGER")
     await _ensure_column(conn, "file", "final_season", "INTEGER")
+    await _ensure_column(conn, "torrent", "retry_count", "INTEGER", default="0")
+    await _ensure_column(conn, "torrent", "next_retry_at", "DATETIME")
+    await _ensure_column(conn, "torrent", "files_planned", "BOOLEAN", default="0")
+    await _ensure_column(conn, "torrent", "plan_attempts", "INTEGER", default="0")
+    await _ensure_column(conn, "torrent", "next_plan_at", "DATETIME")
+    await _ensure_column(conn, "torrent", "published_at", "DATETIME")
+    await _ensure_index(conn, "ix_torrent_status_next_retry_at", "torrent", "status, next_retry_at")
+    await _ensure_index(conn, "ix_source_router_id", "source", "router_id")
+    # 旧版本的failed种子没有重试时间，让它们在下一轮立即重试一次
+    await conn.execute(text(
+        "UPDATE torrent SET next_retry_at = CURRENT_TIMESTAMP "
+        "WHERE status = 'failed' AND next_retry_at IS NULL"
+    ))
+    # 旧版本以“已有文件记录”表示后处理完成，迁移为显式的processed状态
+    await conn.execute(text(
+        "UPDATE torrent SET status = 'processed' WHERE status = 'completed' "
+        "AND EXISTS (SELECT 1 FROM file WHERE file.torrent_id = torrent.id)"
+    ))
+    # 上次退出时处理到一半的种子：清掉不完整的文件记录，重新处理
+    await conn.execute(text(
+        "DELETE FROM file WHERE torrent_id IN (SELECT id FROM torrent WHERE status = 'processing')"
+    ))
+    await conn.execute(text(
+        "UPDATE torrent SET status = 'completed', files_planned = 0 WHERE status = 'processing'"
+    ))
 
 
 async def _ensure_column(conn, table: str, column: str, col_type: str, default: str | None = None) -> None:
@@ -41,6 +85,10 @@ async def _ensure_column(conn, table: str, column: str, col_type: str, default:
     default_clause = f" DEFAULT {default}" if default is not None else ""
     await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}{default_clause}"))
 
+
+async def _ensure_index(conn, name: str, table: str, columns: str) -> None:
+    await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
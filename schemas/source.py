@@ -1,7 +1,10 @@
 from typing import Optional, List, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
+# 检查间隔及自适应检查间隔上下限允许的最小值（秒），避免对站点频繁请求
+MIN_CHECK_INTERVAL = 60
+
 # API请求模型
 class AnalyzeSourceRequest(BaseModel):
     url: str
@@ -35,10 +38,24 @@ class SourceResponse(BaseModel):
     media_type: str
     season: Optional[int] = None
     multi_season: bool = False
+    skip_unwanted_files: bool = False
     episode_offset: int
     episode_regex: Optional[str] = None
     use_ai_episode: bool
     check_interval: int
+    min_check_interval: Optional[int] = None
+    max_check_interval: Optional[int] = None
+    next_check: Optional[datetime] = None
+    router_id: Optional[int] = None
+    route_pattern: Optional[str] = None
+    route_use_regex: bool = False
+    # 入库前的条目过滤规则
+    filter_include: Optional[str] = None
+    filter_exclude: Optional[str] = None
+    filter_resolutions: Optional[str] = None
+    filter_subgroups: Optional[str] = None
+    filter_min_size_mb: Optional[int] = None
+    filter_max_size_mb: Optional[int] = None
     created_at: datetime
     last_check: Optional[datetime] = None
 
@@ -53,11 +70,26 @@ class SourceBase(BaseModel):
     media_type: str
     season: Optional[int] = None
     multi_season: bool = False
+    skip_unwanted_files: bool = False
     episode_offset: int = 0
     episode_regex: Optional[str] = None
     use_ai_episode: bool = False
-    check_interval: int = 3600
+    check_interval: int = Field(3600, ge=MIN_CHECK_INTERVAL)
+    # 自适应检查间隔的上下限（秒，至少60），为空时使用全局配置
+    min_check_interval: Optional[int] = Field(None, ge=MIN_CHECK_INTERVAL)
+    max_check_interval: Optional[int] = Field(None, ge=MIN_CHECK_INTERVAL)
     tmdb_id: Optional[str] = None
+    # 仅用于routed类型：所属聚合订阅源ID和路由规则
+    router_id: Optional[int] = None
+    route_pattern: Optional[str] = None
+    route_use_regex: bool = False
+    # 入库前的条目过滤规则：标题包含/排除正则、分辨率偏好（逗号分隔，靠前优先）、字幕组白名单、大小范围（MB）
+    filter_include: Optional[str] = None
+    filter_exclude: Optional[str] = None
+    filter_resolutions: Optional[str] = None
+    filter_subgroups: Optional[str] = None
+    filter_min_size_mb: Optional[int] = None
+    filter_max_size_mb: Optional[int] = None
 
 # Source创建过程中的响应模型
 class SourceCreationResponse(BaseModel):
@@ -72,11 +104,20 @@ class SourceUpdate(BaseModel):
     title: Optional[str] = None
     season: Optional[int] = None
     multi_season: Optional[bool] = None
+    skip_unwanted_files: Optional[bool] = None
     episode_offset: Optional[int] = None
     episode_regex: Optional[str] = None
     use_ai_episode: Optional[bool] = None
     enable_sr: Optional[bool] = None
-    check_interval: Optional[int] = None
+    filter_include: Optional[str] = None
+    filter_exclude: Optional[str] = None
+    filter_resolutions: Optional[str] = None
+    filter_subgroups: Optional[str] = None
+    filter_min_size_mb: Optional[int] = None
+    filter_max_size_mb: Optional[int] = None
+    check_interval: Optional[int] = Field(None, ge=MIN_CHECK_INTERVAL)
+    min_check_interval: Optional[int] = Field(None, ge=MIN_CHECK_INTERVAL)
+    max_check_interval: Optional[int] = Field(None, ge=MIN_CHECK_INTERVAL)
 
 # 数据库中的Source
 class SourceInDB(SourceBase):
@@ -67,8 +67,12 @@ const Utils = {
             'downloading': '下载中',
             'downloaded': '已完成',
             'failed': '失败',
+            'dead': '已放弃',
             'pending': '待处理',
-            'completed': '已完成'
+            'completed': '已完成',
+            'processing': '处理中',
+            'processed': '已处理',
+            'process_failed': '处理失败'
         };
         return statusMap[status] || status;
     },
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 应用在导入 core.config 时从当前目录读取 config.yaml，测试使用一份最小配置
+TEST_CONFIG = """
+general: {listen: 8001, system_lang: cn, address: 127.0.0.1, http_proxy: ""}
+download: {qbittorrent_port: 8080, qbittorrent_url: 127.0.0.1}
+hardlink: {enable: false, output_base: /tmp}
+notifications: []
+tmdb_api: {api_key: test, enabled: false}
+llm: {enable: false, url: "", token: ""}
+"""
+
+
+def pytest_configure(config):
+    workdir = tempfile.mkdtemp(prefix="aibangumi-test-")
+    with open(os.path.join(workdir, "config.yaml"), "w") as f:
+        f.write(TEST_CONFIG)
+    os.chdir(workdir)
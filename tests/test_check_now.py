@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import core.scheduler as scheduler_module
+from core.scheduler import MAX_FINISHED_JOBS, AutoBangumiScheduler
+from models.models import Source, Torrent
+from models.session import AsyncSessionLocal, init_db
+from sqlalchemy import select
+from utils.qbittorrent import QBittorrentHealth
+from utils.rss import FeedStream
+
+FEED_URL = "https://feeds.example.org/check-now.xml"
+HASH = "ab" * 20
+FEED = f"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>check now</title>
+<item><title>[Group] Show - 01 [1080p]</title><guid>ep01</guid>
+<enclosure url="magnet:?xt=urn:btih:{HASH}" type="application/x-bittorrent"/></item>
+</channel></rss>"""
+
+
+class FakeQBittorrent:
+    """模拟qBittorrent：添加的种子立即出现在列表中"""
+
+    def __init__(self):
+        self.health = QBittorrentHealth()
+        self.torrents = {}
+
+    async def torrents_info(self, torrent_hashes):
+        return {h: self.torrents[h] for h in torrent_hashes if h in self.torrents}
+
+    async def torrents_add(self, urls):
+        for url in urls:
+            self.torrents[url.split("btih:")[1][:40].lower()] = {"state": "downloading"}
+        return True
+
+
+async def create_rss_source() -> int:
+    async with AsyncSessionLocal() as db:
+        source = Source(type="rss", url=FEED_URL, media_type="tv", title="check now", check_interval=3600)
+        db.add(source)
+        await db.commit()
+        return source.id
+
+
+async def wait_for_job(scheduler, job_id):
+    while scheduler.get_job(job_id)["finished_at"] is None:
+        await asyncio.sleep(0.01)
+    return scheduler.get_job(job_id)
+
+
+def test_check_now_fetches_through_priority_limiter_and_adds(monkeypatch):
+    qb_client = FakeQBittorrent()
+    monkeypatch.setattr(scheduler_module, "get_qbittorrent", lambda: qb_client)
+    scheduler = AutoBangumiScheduler()
+    priorities = []
+
+    async def fake_fetch(url, etag=None, last_modified=None, digest=None, raise_on_error=False, limiter=None):
+        # 立即检查同样占用站点/全局名额，并以高优先级排队
+        original_slot = scheduler._rss_fetch_slot
+        monkeypatch.setattr(
+            scheduler, "_rss_fetch_slot",
+            lambda url, priority=False: priorities.append(priority) or original_slot(url, priority)
+        )
+        async with limiter():
+            pass
+        return {"feed": FeedStream(FEED), "etag": '"v1"', "last_modified": None, "digest": "d1", "modified": True}
+
+    monkeypatch.setattr(scheduler_module, "fetch_rss_shared", fake_fetch)
+
+    async def run():
+        await init_db()
+        source_id = await create_rss_source()
+        job_id = scheduler.check_source_now(source_id)
+        assert scheduler.get_job(job_id)["state"] == "queued"
+        job = await wait_for_job(scheduler, job_id)
+        assert job["state"] == "done", job["error"]
+        assert job["new_torrents"] == 1
+        assert job["added"] == 1
+        assert priorities == [True]
+        assert source_id in scheduler.source_queue
+
+        async with AsyncSessionLocal() as db:
+            torrent = (await db.execute(select(Torrent).where(Torrent.hash == HASH))).scalar_one()
+            assert torrent.status == "downloading"
+            source = await db.get(Source, source_id)
+            assert source.feed_etag == '"v1"' and source.last_check is not None
+
+    asyncio.run(run())
+
+
+def test_failed_check_now_is_handed_back_to_queue(monkeypatch):
+    scheduler = AutoBangumiScheduler()
+
+    async def failing_fetch(url, **kwargs):
+        raise RuntimeError("feed unreachable")
+
+    monkeypatch.setattr(scheduler_module, "fetch_rss_shared", failing_fetch)
+
+    async def run():
+        await init_db()
+        source_id = await create_rss_source()
+        job = await wait_for_job(scheduler, scheduler.check_source_now(source_id))
+        assert job["state"] == "failed"
+        assert "feed unreachable" in job["error"]
+        # 失败的源交还后台队列稍后重试
+        assert scheduler.source_queue.next_due() <= datetime.utcnow() + timedelta(
+            seconds=scheduler_module.RSS_RETRY_INTERVAL
+        )
+
+        missing = await wait_for_job(scheduler, scheduler.check_source_now(999999))
+        assert missing["state"] == "failed" and missing["error"] == "源不存在"
+
+    asyncio.run(run())
+
+
+def test_job_store_keeps_recent_finished_jobs():
+    scheduler = AutoBangumiScheduler()
+    start = datetime(2024, 10, 1)
+    for i in range(MAX_FINISHED_JOBS + 5):
+        scheduler.jobs[f"done-{i}"] = {"id": f"done-{i}", "finished_at": (start + timedelta(seconds=i)).isoformat()}
+    scheduler.jobs["running"] = {"id": "running", "finished_at": None}
+
+    scheduler._prune_jobs()
+    assert len(scheduler.jobs) == MAX_FINISHED_JOBS + 1
+    assert scheduler.get_job("running") is not None
+    # 最早结束的任务先被清理
+    assert scheduler.get_job("done-4") is None
+    assert scheduler.get_job("done-5") is not None
+    assert scheduler.get_job("missing") is None
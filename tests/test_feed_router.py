@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import core.scheduler as scheduler_module
+from core.feed_router import FeedRouter, compile_route
+from core.scheduler import AutoBangumiScheduler
+from models.models import Source
+from models.session import AsyncSessionLocal, init_db
+from utils.rss import FeedItem
+
+
+def routed_source(source_id, pattern, use_regex=False):
+    return Source(id=source_id, type="routed", url="", title=f"show {source_id}", media_type="tv",
+                  route_pattern=pattern, route_use_regex=use_regex)
+
+
+def test_compile_route_keywords_and_regex():
+    regex, keywords = compile_route("  Frieren   1080p ")
+    assert regex is None and keywords == ["frieren", "1080p"]
+
+    regex, keywords = compile_route(r"frieren.*\[1080p\]", use_regex=True)
+    assert keywords == [] and regex.search("[Group] FRIEREN - 01 [1080p]")
+
+
+@pytest.mark.parametrize("pattern, use_regex", [(None, False), ("   ", False), ("(unclosed", True)])
+def test_compile_route_rejects_invalid_rules(pattern, use_regex):
+    with pytest.raises(ValueError):
+        compile_route(pattern, use_regex)
+
+
+def test_router_dispatches_to_first_matching_source():
+    router = FeedRouter([
+        routed_source(3, "frieren"),
+        routed_source(1, "frieren 1080p"),
+        routed_source(2, r"^\[Other\]", use_regex=True),
+        routed_source(4, "(", use_regex=True),
+    ])
+    assert list(router.invalid) == [4]
+
+    items = [
+        FeedItem(title="[Group] Frieren - 01 [1080p]"),
+        FeedItem(title="[Group] Frieren - 01 [720p]"),
+        FeedItem(title="[other] Show - 05"),
+        FeedItem(title="[Group] Unrelated - 01"),
+        FeedItem(title=None),
+    ]
+    routed = {source.id: [item.title for item in source_items] for source, source_items in router.route(items)}
+    # 按源ID顺序匹配，每个条目只分发给第一个匹配的源，未匹配的条目被忽略
+    assert routed == {
+        1: ["[Group] Frieren - 01 [1080p]"],
+        3: ["[Group] Frieren - 01 [720p]"],
+        2: ["[other] Show - 05"],
+    }
+
+
+def test_failed_routed_check_now_clears_router_feed_state(monkeypatch):
+    scheduler = AutoBangumiScheduler()
+
+    async def failing_fetch(url, **kwargs):
+        raise RuntimeError("feed unreachable")
+
+    monkeypatch.setattr(scheduler_module, "fetch_rss_shared", failing_fetch)
+
+    async def run():
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            router_source = Source(type="router", url="https://feeds.example.org/all.xml", title="all",
+                                   media_type="tv", feed_etag='"v1"', feed_digest="d1", last_seen_item="guid:1")
+            db.add(router_source)
+            await db.flush()
+            show = Source(type="routed", url=router_source.url, title="show", media_type="tv",
+                          router_id=router_source.id, route_pattern="show")
+            db.add(show)
+            await db.commit()
+            router_id, show_id = router_source.id, show.id
+
+        job_id = scheduler.check_source_now(show_id)
+        while scheduler.get_job(job_id)["finished_at"] is None:
+            await asyncio.sleep(0.01)
+        assert scheduler.get_job(job_id)["state"] == "failed"
+
+        async with AsyncSessionLocal() as db:
+            router_source = await db.get(Source, router_id)
+            # 聚合订阅源下次检查时重新处理所有条目，新节目源不会错过已处理过的条目
+            assert router_source.feed_etag is None
+            assert router_source.feed_digest is None
+            assert router_source.last_seen_item is None
+        assert router_id in scheduler.source_queue
+
+    asyncio.run(run())
@@ -0,0 +1,145 @@
+import asyncio
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import utils.rss as rss
+from utils.rss import FeedStream
+
+HASH = "0123456789abcdef0123456789abcdef01234567"
+
+
+def rss_feed(*items, close=True):
+    body = "".join(
+        f"<item><title>{title}</title><guid>{guid}</guid><pubDate>{pub_date}</pubDate></item>"
+        for title, guid, pub_date in items
+    )
+    feed = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title><link>https://example.org/</link>{body}'
+    return feed + "</channel></rss>" if close else feed
+
+
+NEWEST_FIRST = [
+    ("ep03", "3", "Mon, 21 Oct 2024 12:00:00 +0000"),
+    ("ep02", "2", "Mon, 14 Oct 2024 12:00:00 +0000"),
+    ("ep01", "1", "Mon, 07 Oct 2024 12:00:00 +0000"),
+]
+
+
+def test_rss_channel_and_items():
+    feed = FeedStream(rss_feed(*NEWEST_FIRST))
+    assert feed.title == "Feed" and feed.link == "https://example.org/"
+    assert [item.title for item in feed] == ["ep03", "ep02", "ep01"]
+    assert feed.newest_key == "guid:3"
+    assert feed.parse_error is None
+
+
+def test_atom_feed():
+    feed = FeedStream(
+        '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Atom</title>'
+        '<subtitle>desc</subtitle><link href="https://example.org/atom"/>'
+        '<entry><title>ep02</title><id>urn:2</id><updated>2024-10-14T12:00:00Z</updated>'
+        '<link href="https://example.org/2.torrent"/></entry>'
+        '<entry><title>ep01</title><id>urn:1</id><updated>2024-10-07T12:00:00Z</updated></entry></feed>'
+    )
+    assert (feed.title, feed.description, feed.link) == ("Atom", "desc", "https://example.org/atom")
+    items = list(feed)
+    assert [item.guid for item in items] == ["urn:2", "urn:1"]
+    assert items[0].link == "https://example.org/2.torrent"
+    assert items[0].pub_date == "2024-10-14T12:00:00Z"
+
+
+def test_nyaa_extensions():
+    feed = FeedStream(
+        '<?xml version="1.0"?><rss xmlns:nyaa="https://nyaa.si/xmlns/nyaa" version="2.0"><channel><title>nyaa</title>'
+        '<item><title>[Group] Show - 01 [1080p].mkv</title><link>https://nyaa.si/download/1.torrent</link>'
+        '<guid isPermaLink="true">https://nyaa.si/view/1</guid><pubDate>Mon, 07 Oct 2024 12:00:00 -0000</pubDate>'
+        f'<nyaa:infoHash>{HASH.upper()}</nyaa:infoHash><nyaa:size>1.4 GiB</nyaa:size></item>'
+        '</channel></rss>'
+    )
+    item = feed.first_item
+    assert item.infohash == HASH
+    assert item.size == int(1.4 * 1024 ** 3)
+    assert item.link == "https://nyaa.si/download/1.torrent"
+    assert rss.parse_pub_date(item.pub_date) is not None
+
+
+def test_items_until_stops_on_newest_first_feed():
+    feed = FeedStream(rss_feed(*NEWEST_FIRST))
+    assert [item.title for item in feed.items_until("guid:2")] == ["ep03"]
+    assert [item.title for item in feed.items_until(None)] == ["ep03", "ep02", "ep01"]
+    assert len(feed.items_until("guid:unknown")) == 3
+
+
+def test_items_until_ignores_stop_key_on_oldest_first_feed():
+    # 从旧到新排列的feed中，停止条目之后才是新条目，不能在停止条目处停止
+    feed = FeedStream(rss_feed(*reversed(NEWEST_FIRST)))
+    assert [item.title for item in feed.items_until("guid:2")] == ["ep01", "ep02", "ep03"]
+
+
+def test_truncated_feed_keeps_parsed_items_and_stops():
+    feed = FeedStream(rss_feed(*NEWEST_FIRST, close=False) + "<item><title>ep00")
+    assert [item.title for item in feed] == ["ep03", "ep02", "ep01"]
+    assert isinstance(feed.parse_error, ET.ParseError)
+    # 再次迭代只返回已解析的条目，不会抛出异常
+    assert len(feed.items_until("guid:missing")) == 3
+
+
+def test_invalid_feed_without_items_raises():
+    with pytest.raises(ET.ParseError):
+        FeedStream('<?xml version="1.0"?><rss><channel><title>broken')
+
+
+def test_truncated_fetch_is_not_shared(monkeypatch):
+    fetches = []
+
+    async def fake_fetch(url, etag=None, last_modified=None, digest=None, raise_on_error=False):
+        fetches.append(url)
+        return {"modified": True, "feed": FeedStream(rss_feed(*NEWEST_FIRST, close=False) + "<item"),
+                "etag": None, "last_modified": None, "digest": str(len(fetches))}
+
+    monkeypatch.setattr(rss, "fetch_rss_conditional", fake_fetch)
+    monkeypatch.setattr(rss, "_shared_fetches", {})
+
+    async def run():
+        first = await rss.fetch_rss_shared("https://example.org/truncated.xml")
+        assert list(first["feed"]) and first["feed"].parse_error is not None
+        # 被截断的结果不在共享窗口内复用
+        second = await rss.fetch_rss_shared("https://example.org/truncated.xml")
+        assert second["digest"] == "2"
+
+    asyncio.run(run())
+    assert len(fetches) == 2
+
+
+class FakeResponse:
+    def __init__(self, body: str):
+        self.status = 200
+        self.headers = {}
+        self._body = body
+
+    async def read(self):
+        return self._body.encode()
+
+    async def text(self):
+        return self._body
+
+
+def fake_http(body):
+    class FakeRequest:
+        async def __aenter__(self):
+            return FakeResponse(body)
+
+        async def __aexit__(self, *exc):
+            return False
+
+    return lambda method, url, headers=None: FakeRequest()
+
+
+def test_generate_regex_reports_unparsable_feed_as_bad_request(monkeypatch):
+    from api.source import generate_episode_regex
+
+    monkeypatch.setattr(rss, "http_request", fake_http('<?xml version="1.0"?><rss><channel><title>broken'))
+    monkeypatch.setattr(rss, "_shared_fetches", {})
+    response = asyncio.run(generate_episode_regex("https://example.org/broken.xml", "rss", None, None))
+    assert response.status_code == 400
+    assert "无法获取RSS源数据" in response.body.decode()
@@ -0,0 +1,91 @@
+import pytest
+
+from core.item_filter import ItemFilter, normalize_resolution
+from utils.rss import FeedItem
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1080p", "1080p"),
+    ("1080", "1080p"),
+    ("1080P", "1080p"),
+    ("1920x1080", "1080p"),
+    ("720", "720p"),
+    ("4K", "2160p"),
+    ("4k", "2160p"),
+    ("2160p", "2160p"),
+])
+def test_normalize_resolution(value, expected):
+    assert normalize_resolution(value) == expected
+
+
+@pytest.mark.parametrize("value", ["FHD", "1080x", "abc", "8K"])
+def test_invalid_resolution_rejected(value):
+    with pytest.raises(ValueError):
+        ItemFilter(resolutions=value)
+
+
+@pytest.mark.parametrize("resolutions, title", [
+    ("4K", "[Group] Show - 01 [4K]"),
+    ("4K", "[Group] Show - 01 [2160p]"),
+    ("1080", "[Group] Show - 01 [1080p]"),
+    ("1080", "[Group] Show - 01 [1920x1080]"),
+])
+def test_configured_resolution_matches_title(resolutions, title):
+    assert ItemFilter(resolutions=resolutions).accepts(FeedItem(title=title))
+
+
+def test_resolution_preference_with_unnormalized_settings():
+    items = [
+        FeedItem(title="[Group] Show - 01 [720p]"),
+        FeedItem(title="[Group] Show - 01 [1080p]"),
+    ]
+    kept = ItemFilter(resolutions="1080, 720").apply(items)
+    assert [item.title for item in kept] == ["[Group] Show - 01 [1080p]"]
+
+
+def test_mixed_codec_variants_of_one_episode_collapse():
+    items = [
+        FeedItem(title="[Group] Show - 05 [WebRip 720p AVC AAC][CHS]"),
+        FeedItem(title="[Group] Show - 05 [WebRip 1080p HEVC-10bit AAC][CHS]"),
+        FeedItem(title="[Group] Show - 05 [WebRip 1080p HEVC-10bit AAC][CHT]"),
+        FeedItem(title="[Other] Show - 05 [720p]"),
+        FeedItem(title="[Group] Show - 06 [720p x264]"),
+        FeedItem(title="[Group] Show Special [OVA]"),
+    ]
+    kept = ItemFilter(resolutions="1080p,720p").apply(items)
+    # 同一字幕组同一集只保留最偏好的分辨率，同分辨率的简繁版本都保留；其他字幕组、其他集不受影响
+    assert [item.title for item in kept] == [
+        "[Group] Show - 05 [WebRip 1080p HEVC-10bit AAC][CHS]",
+        "[Group] Show - 05 [WebRip 1080p HEVC-10bit AAC][CHT]",
+        "[Other] Show - 05 [720p]",
+        "[Group] Show - 06 [720p x264]",
+        "[Group] Show Special [OVA]",
+    ]
+
+
+def test_episode_regex_identifies_variants():
+    items = [
+        FeedItem(title="[Group] Show 第05话 1280x720 AVC"),
+        FeedItem(title="[Group] Show 第05话 1920x1080 HEVC"),
+    ]
+    kept = ItemFilter(resolutions="1080p,720p", episode_regex=r"第(\d+)话").apply(items)
+    assert [item.title for item in kept] == ["[Group] Show 第05话 1920x1080 HEVC"]
+
+
+def test_variants_arriving_on_different_polls():
+    item_filter = ItemFilter(resolutions="1080p,720p")
+    ingested = ["[Group] Show - 05 [1080p HEVC]", "[Group] Show - 06 [720p]"]
+    later = [
+        FeedItem(title="[Group] Show - 05 [720p AVC]"),  # 已入库1080p版本
+        FeedItem(title="[Group] Show - 05v2 [1080p HEVC]"),  # 同分辨率的新版本
+        FeedItem(title="[Group] Show - 06 [1080p]"),  # 比已入库的版本更好
+        FeedItem(title="[Group] Show - 07 [720p]"),  # 还没有其他版本
+    ]
+    assert item_filter.needs_ingested_titles(item_filter.apply(later))
+    kept = item_filter.apply(later, ingested)
+    assert [item.title for item in kept] == [
+        "[Group] Show - 05v2 [1080p HEVC]",
+        "[Group] Show - 06 [1080p]",
+        "[Group] Show - 07 [720p]",
+    ]
+    assert not item_filter.needs_ingested_titles([FeedItem(title="[Group] Show - 08 [1080p]")])
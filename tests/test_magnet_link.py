@@ -0,0 +1,58 @@
+import pytest
+
+from utils.qbittorrent import QBittorrentClient
+from utils.rss import _MAGNET_HREF_RE, FeedItem, extract_magnet_link
+
+HASH = "0123456789abcdef0123456789abcdef01234567"
+HASH_BASE32 = "AERUKZ4JVPG66AJDIVTYTK6N54ASGRLH"
+MAGNET = f"magnet:?xt=urn:btih:{HASH}&dn=Show%2001&tr=udp://tracker.example.org:80"
+
+
+@pytest.mark.parametrize("description", [
+    f'<p>下载</p><a href="{MAGNET.replace("&", "&amp;")}">magnet</a>',
+    f"<A HREF='{MAGNET.replace('&', '&amp;')}'>magnet</A>",
+    f'<a class="x" href={MAGNET.replace("&", "&#38;")}>magnet</a>',
+])
+def test_entity_escaped_magnet_is_unescaped(description):
+    assert extract_magnet_link(description) == MAGNET
+
+
+def test_first_magnet_wins_and_data_href_is_ignored():
+    description = (
+        f'<a data-href="magnet:?xt=urn:btih:{"f" * 40}">x</a>'
+        f'<a href="{MAGNET}">first</a><a href="magnet:?xt=urn:btih:{"e" * 40}">second</a>'
+    )
+    assert extract_magnet_link(description) == MAGNET
+
+
+def test_unmatched_magnet_falls_back_to_lxml():
+    # 属性值中含有'>'时正则不命中，由lxml解析
+    description = f'<a title="1080p > 720p" href="{MAGNET.replace("&", "&amp;")}">magnet</a>'
+    assert _MAGNET_HREF_RE.search(description) is None
+    assert extract_magnet_link(description) == MAGNET
+
+
+def test_text_without_magnet_anchor():
+    assert extract_magnet_link("no links here") is None
+    assert extract_magnet_link(f"plain text {MAGNET}") is None
+    assert extract_magnet_link('<a href="magnet:?xt=urn:btih:<broken') is None
+
+
+@pytest.mark.parametrize("magnet", [
+    f"magnet:?xt=urn:btih:{HASH}",
+    f"magnet:?xt=urn:btih:{HASH.upper()}&dn=x",
+    f"magnet:?xt=urn:btih:{HASH_BASE32}&tr=udp://t",
+    f"magnet:?xt=urn:btih:{HASH_BASE32.lower()}",
+])
+def test_extract_hash_from_magnet_normalizes_to_hex(magnet):
+    assert QBittorrentClient.extract_hash_from_magnet(magnet) == HASH
+
+
+def test_extract_hash_from_magnet_rejects_malformed_hash():
+    assert QBittorrentClient.extract_hash_from_magnet(f"magnet:?xt=urn:btih:{HASH[:39]}") is None
+    assert QBittorrentClient.extract_hash_from_magnet("https://example.org/a.torrent") is None
+
+
+def test_item_key_uses_hex_hash_for_base32_magnet():
+    assert FeedItem(magnet=f"magnet:?xt=urn:btih:{HASH_BASE32}").key == f"btih:{HASH}"
+    assert FeedItem(enclosure=f"magnet:?xt=urn:btih:{HASH.upper()}").key == f"btih:{HASH}"
@@ -0,0 +1,129 @@
+import asyncio
+
+from core.pipeline import PrioritySemaphore, StageQueue, StageStats
+
+
+def test_offer_deduplicates_pending_items():
+    async def run():
+        stage = StageQueue("add", maxsize=10)
+        assert stage.offer(1)
+        assert stage.offer(1)  # 已在队列中，视为成功但不重复入队
+        assert stage.offer(2)
+        assert len(stage) == 2
+        assert await stage.get_batch(10) == [1, 2]
+
+    asyncio.run(run())
+
+
+def test_item_can_be_requeued_after_done():
+    async def run():
+        stage = StageQueue("add", maxsize=10)
+        stage.offer(1)
+        items = await stage.get_batch()
+        # 处理期间仍视为待处理，不会再次入队
+        stage.offer(1)
+        assert len(stage) == 0
+        stage.done(items)
+        assert stage.offer(1)
+        assert len(stage) == 1
+        assert stage.processed == 1
+
+    asyncio.run(run())
+
+
+def test_offer_drops_when_full():
+    async def run():
+        stage = StageQueue("plan", maxsize=2)
+        assert stage.offer(1) and stage.offer(2)
+        assert not stage.offer(3)
+        assert stage.dropped == 1
+        # 被放弃的条目之后可以重新入队
+        stage.done(await stage.get_batch(1))
+        assert stage.offer(3)
+
+    asyncio.run(run())
+
+
+def test_get_batch_respects_max_items():
+    async def run():
+        stage = StageQueue("process", maxsize=10)
+        for item in range(5):
+            stage.offer(item)
+        assert await stage.get_batch(3) == [0, 1, 2]
+        assert await stage.get_batch(3) == [3, 4]
+        assert stage.busy == 2
+
+    asyncio.run(run())
+
+
+def test_put_waits_for_space():
+    async def run():
+        stage = StageQueue("rss", maxsize=1)
+        await stage.put(1)
+        blocked = asyncio.create_task(stage.put(2))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        stage.done(await stage.get_batch())
+        await asyncio.wait_for(blocked, 1)
+        assert await stage.get_batch() == [2]
+
+    asyncio.run(run())
+
+
+def test_stats_snapshot_records_errors():
+    stage = StageStats("progress")
+    stage.begin()
+    stage.finish(error=RuntimeError("qB down"))
+    snapshot = stage.snapshot()
+    assert snapshot["errors"] == 1 and snapshot["last_error"] == "qB down"
+    assert snapshot["busy"] == 0 and snapshot["last_run"] is not None
+
+
+def test_done_reports_batch_error():
+    async def run():
+        stage = StageQueue("add", maxsize=10)
+        stage.offer(1)
+        stage.done(await stage.get_batch(), RuntimeError("failed"))
+        assert stage.errors == 1 and stage.processed == 0
+        assert stage.snapshot()["queue_depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_priority_semaphore_wakes_priority_waiters_first():
+    async def run():
+        semaphore = PrioritySemaphore(1)
+        order = []
+
+        async def worker(name, priority):
+            async with semaphore.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await semaphore.acquire()
+        tasks = [asyncio.create_task(worker("background-1", False)),
+                 asyncio.create_task(worker("background-2", False))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("check-now", True)))
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        assert order == ["check-now", "background-1", "background-2"]
+        assert not semaphore.locked()
+
+    asyncio.run(run())
+
+
+def test_priority_semaphore_cancelled_waiter_does_not_leak_slot():
+    async def run():
+        semaphore = PrioritySemaphore(1)
+        await semaphore.acquire()
+        waiter = asyncio.create_task(semaphore.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        semaphore.release()
+        # 被取消的等待方不占用名额
+        await asyncio.wait_for(semaphore.acquire(), 1)
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import asyncio
+
+from utils.qbittorrent import QBittorrentHealth, ThreadedQBittorrentClient
+
+
+class FailingTorrentsInfo:
+    """模拟qbittorrentapi客户端：请求时抛出连接错误"""
+
+    def torrents_info(self, torrent_hashes=None):
+        raise ConnectionError("connection refused")
+
+
+def test_health_backoff_after_failure():
+    health = QBittorrentHealth()
+    assert health.available
+    health.record_failure("boom")
+    assert not health.available
+    assert health.consecutive_failures == 1
+    health.record_success()
+    assert health.available and health.consecutive_failures == 0
+
+
+def test_threaded_client_counts_swallowed_errors_as_failures():
+    qb_client = ThreadedQBittorrentClient()
+    qb_client.client.client = FailingTorrentsInfo()
+
+    # 同步客户端捕获错误后返回None，健康状态仍应记录失败并进入退避
+    assert asyncio.run(qb_client.torrents_info(["a" * 40])) is None
+    assert not qb_client.health.healthy
+    assert "connection refused" in qb_client.health.last_error
+    assert not qb_client.health.available
+
+
+def test_threaded_client_records_success():
+    class Torrents:
+        def torrents_info(self, torrent_hashes=None):
+            return [{"hash": "A" * 40, "progress": 0.5}]
+
+    qb_client = ThreadedQBittorrentClient()
+    qb_client.client.client = Torrents()
+    qb_client.health.record_failure("earlier")
+    qb_client.health.retry_at = None
+
+    assert asyncio.run(qb_client.torrents_info(["a" * 40])) == {"a" * 40: {"hash": "A" * 40, "progress": 0.5}}
+    assert qb_client.health.healthy
+    assert qb_client.client.last_error is None
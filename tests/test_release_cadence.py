@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from core.release_cadence import (
+    LATE_SPREAD_RATIO,
+    MIN_RELEASE_SPREAD,
+    ReleaseCadence,
+    release_batches,
+)
+
+START = datetime(2024, 10, 7, 12, 0, 0)
+MIN_INTERVAL = 600
+MAX_INTERVAL = 14400
+
+
+def weekly(weeks: int, jitter_minutes=()):
+    releases = []
+    for week in range(weeks):
+        released = START + timedelta(weeks=week, minutes=jitter_minutes[week] if week < len(jitter_minutes) else 0)
+        # 同一集的其他版本在几小时内陆续发布，合并为同一批次
+        releases += [released, released + timedelta(hours=2)]
+    return releases
+
+
+def test_release_batches_merge_close_releases():
+    batches = release_batches(reversed(weekly(3)))
+    assert batches == [START, START + timedelta(weeks=1), START + timedelta(weeks=2)]
+
+
+def test_weekly_cadence():
+    cadence = ReleaseCadence.learn(weekly(6, jitter_minutes=[0, 10, -5, 20, 0, 15]))
+    assert abs(cadence.period - timedelta(weeks=1)) <= timedelta(minutes=15)
+    assert MIN_RELEASE_SPREAD <= cadence.spread <= timedelta(hours=1)
+    last = START + timedelta(weeks=5, minutes=15)
+    assert cadence.last_release == last
+
+    start, end = cadence.window(last + timedelta(days=1))
+    assert start == last + cadence.period - cadence.spread
+    assert end == last + cadence.period + cadence.spread * LATE_SPREAD_RATIO
+
+    # 窗口外按最长间隔检查，但不晚于窗口开始
+    now = last + timedelta(days=1)
+    assert cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL) == now + timedelta(seconds=MAX_INTERVAL)
+    now = start - timedelta(minutes=30)
+    assert cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL) == start
+    # 窗口内按最短间隔检查
+    now = start + timedelta(minutes=5)
+    assert cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL) == now + timedelta(seconds=MIN_INTERVAL)
+
+
+def test_late_release_is_chased_at_medium_interval():
+    cadence = ReleaseCadence.learn(weekly(6))
+    _, end = cadence.window(cadence.last_release + timedelta(days=1))
+    now = end + timedelta(hours=1)
+    next_check = cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL)
+    assert now + timedelta(seconds=MIN_INTERVAL) < next_check < now + timedelta(seconds=MAX_INTERVAL)
+
+
+def test_irregular_history_gets_wide_window():
+    gaps = [2, 9, 4, 13, 6]
+    releases = [START]
+    for gap in gaps:
+        releases.append(releases[-1] + timedelta(days=gap))
+    cadence = ReleaseCadence.learn(releases)
+    assert cadence.period == timedelta(days=6)  # 间隔的中位数
+    # 偏差很大时窗口宽度以周期的1/12为上限
+    assert cadence.spread == cadence.period / 4 / LATE_SPREAD_RATIO
+
+
+def test_too_few_batches_or_too_short_period():
+    assert ReleaseCadence.learn([]) is None
+    assert ReleaseCadence.learn(weekly(2)) is None
+    # 同一天内的多次发布只算一个批次
+    assert ReleaseCadence.learn([START + timedelta(hours=hours) for hours in range(0, 6)]) is None
+    # 周期不足一天（聚合多部作品的feed）不学习节奏
+    assert ReleaseCadence.learn([START + timedelta(hours=7 * i) for i in range(10)]) is None
+
+
+def test_next_check_clamped_to_bounds():
+    cadence = ReleaseCadence.learn(weekly(6))
+    last = cadence.last_release
+    for hours in range(0, 24 * 7 * 2, 3):
+        now = last + timedelta(hours=hours)
+        next_check = cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL)
+        assert now + timedelta(seconds=MIN_INTERVAL) <= next_check <= now + timedelta(seconds=MAX_INTERVAL)
+
+    # 最长间隔小于最短间隔时以最短间隔为准
+    now = last + timedelta(days=1)
+    assert cadence.next_check(now, 3600, 600) == now + timedelta(seconds=3600)
+    # 很久没有新发布（已完结/停更）时只按最长间隔检查
+    now = last + timedelta(weeks=5)
+    assert cadence.next_check(now, MIN_INTERVAL, MAX_INTERVAL) == now + timedelta(seconds=MAX_INTERVAL)
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import core.scheduler as scheduler_module
+from core.scheduler import PLAN_MAX_ATTEMPTS, AutoBangumiScheduler
+from models.models import Source, Torrent
+from models.session import AsyncSessionLocal, init_db
+from utils.qbittorrent import QBittorrentHealth
+
+
+class MetadataPendingClient:
+    """元数据一直未就绪的qBittorrent：文件列表为空"""
+
+    def __init__(self):
+        self.health = QBittorrentHealth()
+        self.file_requests = 0
+
+    async def get_torrent_files(self, torrent_hash):
+        self.file_requests += 1
+        return []
+
+
+async def create_downloading_torrent(torrent_hash: str) -> int:
+    async with AsyncSessionLocal() as db:
+        source = Source(type="magnet", url="magnet:?xt=urn:btih:" + torrent_hash, media_type="tv", title="planning")
+        db.add(source)
+        await db.flush()
+        torrent = Torrent(hash=torrent_hash, source_id=source.id, url=source.url, status="downloading")
+        db.add(torrent)
+        await db.commit()
+        return torrent.id
+
+
+async def drain(stage):
+    """取出阶段队列中的全部条目并标记完成"""
+    if not len(stage):
+        return []
+    items = await stage.get_batch(len(stage))
+    stage.done(items)
+    return items
+
+
+def test_planning_backs_off_while_metadata_is_missing(monkeypatch):
+    qb_client = MetadataPendingClient()
+    monkeypatch.setattr(scheduler_module, "get_qbittorrent", lambda: qb_client)
+    scheduler = AutoBangumiScheduler()
+
+    async def run():
+        await init_db()
+        torrent_id = await create_downloading_torrent("1" * 40)
+
+        async with AsyncSessionLocal() as db:
+            await scheduler._enqueue_plannable_torrents(db)
+            assert torrent_id in await drain(scheduler.plan_stage)
+            await scheduler._plan_torrent_files(db, [torrent_id])
+
+        async with AsyncSessionLocal() as db:
+            torrent = await db.get(Torrent, torrent_id)
+            assert torrent.plan_attempts == 1
+            assert torrent.next_plan_at > datetime.utcnow()
+            # 退避期间不会再次进入规划阶段
+            await scheduler._enqueue_plannable_torrents(db)
+            assert torrent_id not in await drain(scheduler.plan_stage)
+
+            # 退避时间过后重新规划
+            torrent.next_plan_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+            await scheduler._enqueue_plannable_torrents(db)
+            assert torrent_id in await drain(scheduler.plan_stage)
+
+            # 超过尝试上限后不再规划，交给下载完成后的后处理
+            torrent.plan_attempts = PLAN_MAX_ATTEMPTS
+            torrent.next_plan_at = None
+            await db.commit()
+            await scheduler._enqueue_plannable_torrents(db)
+            assert torrent_id not in await drain(scheduler.plan_stage)
+        assert qb_client.file_requests == 1
+
+    asyncio.run(run())
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api.source import update_source
+from models.models import Source
+from models.session import AsyncSessionLocal, init_db
+from schemas.source import SourceUpdate
+
+
+async def create_source(**fields) -> int:
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        source = Source(type="rss", url="https://feeds.example.org/update.xml", media_type="tv", title="update", **fields)
+        db.add(source)
+        await db.commit()
+        return source.id
+
+
+async def patch(source_id: int, **fields):
+    async with AsyncSessionLocal() as db:
+        return await update_source(source_id, SourceUpdate(**fields), db, None)
+
+
+async def load(source_id: int) -> Source:
+    async with AsyncSessionLocal() as db:
+        return await db.get(Source, source_id)
+
+
+def test_update_source_filter_rules():
+    async def run():
+        source_id = await create_source(filter_exclude="HEVC")
+        assert await patch(source_id, filter_resolutions="1080p,720p", title=None) == {"status": "success"}
+        source = await load(source_id)
+        assert source.filter_resolutions == "1080p,720p"
+        assert source.filter_exclude == "HEVC"  # 未给出的字段不变
+        assert source.title == "update"  # 不可为空的字段传null时不修改
+
+        await patch(source_id, filter_exclude=None)
+        assert (await load(source_id)).filter_exclude is None
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("fields", [{"filter_include": "("}, {"filter_resolutions": "FHD"}])
+def test_update_source_rejects_invalid_filter_rules(fields):
+    async def run():
+        source_id = await create_source(filter_include="简繁")
+        with pytest.raises(HTTPException) as error:
+            await patch(source_id, **fields)
+        assert error.value.status_code == 400
+        assert (await load(source_id)).filter_include == "简繁"
+
+    asyncio.run(run())
+
+
+def test_update_missing_source():
+    async def run():
+        await init_db()
+        with pytest.raises(HTTPException) as error:
+            await patch(999999, title="missing")
+        assert error.value.status_code == 404
+
+    asyncio.run(run())
+
+
+def test_update_check_intervals_reschedules_source():
+    from datetime import datetime, timedelta
+
+    from core.scheduler import scheduler
+
+    async def run():
+        last_check = datetime.utcnow() - timedelta(minutes=10)
+        source_id = await create_source(check_interval=86400, last_check=last_check)
+        scheduler.schedule_source(source_id, last_check + timedelta(days=1))
+
+        await patch(source_id, check_interval=3600, min_check_interval=300, max_check_interval=7200)
+        source = await load(source_id)
+        assert (source.check_interval, source.min_check_interval, source.max_check_interval) == (3600, 300, 7200)
+        # 没有发布历史时按新的固定检查间隔，从最后检查时间算起
+        assert abs(source.next_check - (last_check + timedelta(hours=1))) < timedelta(seconds=1)
+        assert scheduler.source_queue.next_due() <= last_check + timedelta(hours=1, seconds=1)
+
+    asyncio.run(run())
+
+
+def test_update_rejects_inverted_interval_bounds():
+    async def run():
+        source_id = await create_source(max_check_interval=3600)
+        with pytest.raises(HTTPException) as error:
+            await patch(source_id, min_check_interval=7200)
+        assert error.value.status_code == 400
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("fields", [{"check_interval": 10}, {"min_check_interval": 59}])
+def test_interval_fields_have_floor(fields):
+    from pydantic import ValidationError
+
+    with pytest.raises(ValidationError):
+        SourceUpdate(**fields)
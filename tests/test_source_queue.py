@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from core.source_queue import MAX_JITTER_SECONDS, SourceDueQueue, jittered_due
+
+NOW = datetime(2024, 10, 1, 12, 0, 0)
+
+
+def test_pop_due_returns_sources_in_deadline_order():
+    queue = SourceDueQueue()
+    queue.schedule(1, NOW + timedelta(minutes=3))
+    queue.schedule(2, NOW + timedelta(minutes=1))
+    queue.schedule(3, NOW + timedelta(minutes=2))
+    queue.schedule(4, NOW + timedelta(hours=1))
+
+    assert queue.next_due() == NOW + timedelta(minutes=1)
+    assert queue.pop_due(NOW + timedelta(minutes=5)) == [2, 3, 1]
+    assert len(queue) == 1
+    assert 4 in queue and 1 not in queue
+
+
+def test_reschedule_replaces_previous_entry():
+    queue = SourceDueQueue()
+    queue.schedule(1, NOW + timedelta(minutes=1))
+    queue.schedule(1, NOW + timedelta(hours=1))
+
+    # 旧条目被惰性删除，不会提前弹出，也不会重复弹出
+    assert len(queue) == 1
+    assert queue.next_due() == NOW + timedelta(hours=1)
+    assert queue.pop_due(NOW + timedelta(minutes=30)) == []
+    assert queue.pop_due(NOW + timedelta(hours=2)) == [1]
+    assert queue.pop_due(NOW + timedelta(hours=3)) == []
+
+
+def test_reschedule_earlier():
+    queue = SourceDueQueue()
+    queue.schedule(1, NOW + timedelta(hours=1))
+    queue.schedule(1, NOW)
+    assert queue.pop_due(NOW) == [1]
+    assert queue.next_due() is None
+
+
+def test_remove_and_clear():
+    queue = SourceDueQueue()
+    queue.schedule(1, NOW)
+    queue.schedule(2, NOW + timedelta(minutes=1))
+    queue.remove(1)
+    queue.remove(99)  # 不存在的源
+    assert 1 not in queue
+    assert queue.next_due() == NOW + timedelta(minutes=1)
+    queue.clear()
+    assert len(queue) == 0
+    assert queue.next_due() is None
+    assert queue.pop_due(NOW + timedelta(days=1)) == []
+
+
+def test_wait_returns_early_when_queue_changes():
+    async def run():
+        queue = SourceDueQueue()
+        queue.pop_due(datetime.utcnow())  # 清除变更标记
+        waiter = asyncio.create_task(queue.wait(datetime.utcnow() + timedelta(seconds=30)))
+        await asyncio.sleep(0)
+        queue.schedule(1, datetime.utcnow())
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+
+
+def test_jittered_due():
+    due = jittered_due(None, 3600, NOW)
+    assert NOW <= due <= NOW + timedelta(seconds=360)
+
+    last_check = NOW - timedelta(minutes=10)
+    due = jittered_due(last_check, 3600, NOW)
+    assert last_check + timedelta(hours=1) <= due <= last_check + timedelta(hours=1, seconds=MAX_JITTER_SECONDS)
+
+    # 过期很久的源立即检查（加抖动）
+    due = jittered_due(NOW - timedelta(days=2), 86400, NOW)
+    assert NOW <= due <= NOW + timedelta(seconds=MAX_JITTER_SECONDS)
@@ -1,10 +1,18 @@
+import asyncio
 import aiohttp
 import json
 import re
 from typing import Tuple, List, Dict
 from core.config import CONFIG
+from utils.http import http_request
 import logging
 
+# 单次LLM请求的总超时（秒）
+LLM_TIMEOUT = 300
+
+# 限制同时进行的LLM请求数量（合集种子的各文件会并发分析）
+_llm_semaphore = asyncio.Semaphore(max(1, CONFIG.llm.concurrency))
+
 
 async def call_llm_api(messages: List[Dict[str, str]]) -> str:
     """
@@ -32,14 +40,21 @@ async def call_llm_api(messages: List[Dict[str, str]]) -> str:
             "max_tokens": 4000
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(CONFIG.llm.url, headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"].strip()
-                else:
-                    print(f"LLM API 调用失败: {response.status}")
-                    return ""
+        # LLM通常部署在本地或内网，不走HTTP代理；生成较慢，使用单独的超时
+        async with _llm_semaphore, http_request(
+            "POST",
+            CONFIG.llm.url,
+            headers=headers,
+            json=payload,
+            proxy=None,
+            timeout=aiohttp.ClientTimeout(total=LLM_TIMEOUT)
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                return result["choices"][0]["message"]["content"].strip()
+            else:
+                print(f"LLM API 调用失败: {response.status}")
+                return ""
     except Exception as e:
         print(f"LLM API 调用异常: {e}")
         return ""
@@ -489,6 +504,12 @@ async def _fallback_episode_extraction(filename: str) -> int:
     """
     备用的剧集编号提取规则
     """
+    return extract_episode_with_rules(filename)
+
+def extract_episode_with_rules(filename: str) -> int:
+    """
+    按常见命名规则从文件名/标题中提取剧集编号，无法识别时返回0
+    """
     try:
         # 常见的剧集编号模式
         patterns = [
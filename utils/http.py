@@ -0,0 +1,63 @@
+import logging
+from typing import Any, Optional
+
+import aiohttp
+
+from core.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 长连接的空闲保持时间（秒）
+HTTP_KEEPALIVE_TIMEOUT = 60
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _create_session() -> aiohttp.ClientSession:
+    """创建带连接池、DNS缓存和统一超时的HTTP会话"""
+    config = CONFIG.http
+    connector = aiohttp.TCPConnector(
+        limit=config.pool_size,
+        limit_per_host=config.per_host_limit,
+        ttl_dns_cache=config.dns_cache_ttl,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.timeout, connect=config.connect_timeout),
+    )
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """获取进程内共享的HTTP会话（未启动时按需创建）"""
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+    return _session
+
+
+def http_request(method: str, url: str, **kwargs: Any):
+    """通过共享会话发起请求，默认使用配置的HTTP代理
+
+    用法与 session.request 相同：async with http_request("GET", url) as response: ...
+    需要直连时传入 proxy=None。
+    """
+    kwargs.setdefault("proxy", CONFIG.general.http_proxy or None)
+    return get_http_session().request(method, url, **kwargs)
+
+
+async def start_http():
+    """创建共享HTTP会话（应用启动时调用）"""
+    get_http_session()
+    logger.info(
+        f"Shared HTTP client started (pool {CONFIG.http.pool_size}, "
+        f"per host {CONFIG.http.per_host_limit}, proxy {CONFIG.general.http_proxy or 'none'})"
+    )
+
+
+async def close_http():
+    """关闭共享HTTP会话（应用关闭时调用）"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
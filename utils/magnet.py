@@ -10,6 +10,8 @@ from urllib.parse import quote
 import logging
 from core.config import CONFIG
 from utils.dht import dht_service
+from utils.http import http_request
+from utils.rss import FeedItem
 
 logger = logging.getLogger(__name__)
 
@@ -303,26 +305,18 @@ async def download_torrent_file(url: str) -> Optional[bytes]:
         
         # 2. 缓存中没有，从网络下载
         logger.info(f"Downloading torrent file: {url}")
-        async with aiohttp.ClientSession() as session:
-            # 设置代理（如果配置了）
-            proxy = CONFIG.general.http_proxy if hasattr(CONFIG.general, 'http_proxy') else None
-            
-            async with session.get(
-                url,
-                timeout=aiohttp.ClientTimeout(total=30),
-                proxy=proxy
-            ) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    logger.info(f"Successfully downloaded torrent file: {url}")
-                    
-                    # 3. 保存到缓存
-                    _save_to_cache(url, content)
-                    
-                    return content
-                else:
-                    logger.error(f"Failed to download torrent file: {url}, status: {response.status}")
-                    return None
+        async with http_request("GET", url) as response:
+            if response.status == 200:
+                content = await response.read()
+                logger.info(f"Successfully downloaded torrent file: {url}")
+                
+                # 3. 保存到缓存
+                _save_to_cache(url, content)
+                
+                return content
+            else:
+                logger.error(f"Failed to download torrent file: {url}, status: {response.status}")
+                return None
                     
     except Exception as e:
         logger.error(f"Error downloading torrent file {url}: {e}")
@@ -495,17 +489,17 @@ async def get_magnet_info(magnet_url: str) -> Dict[str, Any]:
         logger.error(f"Error getting magnet info: {e}")
         return {}
 
-def extract_title_from_rss_item(item: Dict[str, Any]) -> Optional[str]:
+def extract_title_from_rss_item(item: FeedItem) -> Optional[str]:
     """
     从RSS项目中提取种子标题
     """
     try:
         # 优先使用RSS项目的标题
-        if 'title' in item and item['title']:
-            return item['title'].strip()
+        if item.title:
+            return item.title.strip()
         
         # 如果没有标题，尝试从磁力链接中提取
-        magnet_url = item.get("magnet") or item.get("enclosure")
+        magnet_url = item.magnet or item.enclosure
         if magnet_url and magnet_url.startswith("magnet:"):
             magnet_info = asyncio.run(get_magnet_info(magnet_url))
             if 'name' in magnet_info:
@@ -599,41 +593,30 @@ async def _download_from_itorrents(info_hash: str) -> Optional[bytes]:
         # itorrents.org API endpoint
         torrent_url = f"https://itorrents.org/torrent/{info_hash.upper()}.torrent"
         
-        async with aiohttp.ClientSession() as session:
-            # 设置代理
-            proxy = None
-            if hasattr(CONFIG.general, 'http_proxy') and CONFIG.general.http_proxy:
-                proxy = CONFIG.general.http_proxy
-            logger.info(f"Downloading from itorrents.org: {torrent_url} via proxy: {proxy}")
-            
-            # 设置请求头，模拟浏览器
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'application/x-bittorrent,*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
-            
-            async with session.get(
-                torrent_url,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=30),
-                proxy=proxy,
-                allow_redirects=True
-            ) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    # 验证是否为有效的种子文件
-                    if _is_valid_torrent_data(content):
-                        return content
-                    else:
-                        logger.warning(f"Invalid torrent data from itorrents.org: {info_hash}")
-                        return None
+        logger.info(f"Downloading from itorrents.org: {torrent_url} via proxy: {CONFIG.general.http_proxy or None}")
+        
+        # 设置请求头，模拟浏览器
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'application/x-bittorrent,*/*',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1'
+        }
+        
+        async with http_request("GET", torrent_url, headers=headers, allow_redirects=True) as response:
+            if response.status == 200:
+                content = await response.read()
+                # 验证是否为有效的种子文件
+                if _is_valid_torrent_data(content):
+                    return content
                 else:
-                    logger.debug(f"itorrents.org returned status {response.status} for {info_hash}")
+                    logger.warning(f"Invalid torrent data from itorrents.org: {info_hash}")
                     return None
+            else:
+                logger.debug(f"itorrents.org returned status {response.status} for {info_hash}")
+                return None
                     
     except Exception as e:
         logger.debug(f"Error downloading from itorrents.org: {e}")
@@ -653,31 +636,25 @@ async def _download_from_other_services(info_hash: str) -> Optional[bytes]:
     
     for service_url in services:
         try:
-            async with aiohttp.ClientSession() as session:
-                # 设置代理
-                proxy = None
-                if hasattr(CONFIG.general, 'http_proxy') and CONFIG.general.http_proxy:
-                    proxy = CONFIG.general.http_proxy
-                
-                # 设置请求头
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'application/x-bittorrent,*/*',
-                }
-                
-                async with session.get(
-                    service_url,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=20),
-                    proxy=proxy,
-                    allow_redirects=True
-                ) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        # 验证是否为有效的种子文件
-                        if _is_valid_torrent_data(content):
-                            logger.info(f"Downloaded torrent from alternative service: {service_url}")
-                            return content
+            # 设置请求头
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'application/x-bittorrent,*/*',
+            }
+            
+            async with http_request(
+                "GET",
+                service_url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=20),
+                allow_redirects=True
+            ) as response:
+                if response.status == 200:
+                    content = await response.read()
+                    # 验证是否为有效的种子文件
+                    if _is_valid_torrent_data(content):
+                        logger.info(f"Downloaded torrent from alternative service: {service_url}")
+                        return content
                         
         except Exception as e:
             logger.debug(f"Error downloading from {service_url}: {e}")
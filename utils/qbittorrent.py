@@ -1,10 +1,21 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Set, Union
+from urllib.parse import urlparse
+import aiohttp
 import qbittorrentapi
 from core.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+# 共享HTTP会话的连接池大小与keep-alive时长（秒）
+QB_POOL_SIZE = 8
+QB_KEEPALIVE_TIMEOUT = 60
+# 连接失败后暂停访问的退避时间（秒）
+HEALTH_BASE_BACKOFF = 5
+HEALTH_MAX_BACKOFF = 300
+
 class QBittorrentClient:
     """qBittorrent Web API 客户端"""
     
@@ -14,6 +25,8 @@ class QBittorrentClient:
         self.username = CONFIG.download.qbittorrent_username
         self.password = CONFIG.download.qbittorrent_password
         self.client: Optional[qbittorrentapi.Client] = None
+        # 最近一次被方法内部捕获的请求错误（方法本身只返回None/False/空列表）
+        self.last_error: Optional[str] = None
     
     def __enter__(self):
         self._connect()
@@ -48,16 +61,13 @@ class QBittorrentClient:
             raise
     
     def _ensure_connected(self):
-        """确保已连接，如果未连接则重新连接"""
+        """确保已登录
+        
+        登录后不再在每次调用前请求 app/version 探测会话：会话过期时qbittorrentapi会在请求返回403后
+        自动重新登录并重试，长期复用的客户端因此不会让每个请求都多出一次往返。
+        """
         if not self.client:
             raise RuntimeError("QBittorrent client is not connected")
-        
-        # 检查连接状态，如果需要重新登录
-        try:
-            self.client.app.version
-        except (qbittorrentapi.Unauthorized401Error, qbittorrentapi.Forbidden403Error):
-            logger.debug("Re-authenticating with qBittorrent")
-            self.client.auth_log_in()
     
     def add_magnet(self, magnet_url: str, save_path: Optional[str] = None) -> bool:
         """添加磁力链接到qBittorrent"""
@@ -96,6 +106,7 @@ class QBittorrentClient:
                 return True
             
             logger.error(f"Error adding magnet to qBittorrent: {e}")
+            self.last_error = str(e)
             return False
     
     def get_torrent_info(self, torrent_hash: str) -> Optional[Dict[str, Any]]:
@@ -112,8 +123,55 @@ class QBittorrentClient:
                     
         except Exception as e:
             logger.error(f"Error getting torrent info: {e}")
+            self.last_error = str(e)
+            return None
+    
+    def torrents_info(self, torrent_hashes: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """批量获取种子信息（hash以 | 连接，一次请求）
+        
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: hash -> 种子信息，只包含qBittorrent中存在的种子；请求失败返回None
+        """
+        self._ensure_connected()
+        assert self.client is not None  # 类型检查助手
+        
+        if not torrent_hashes:
+            return {}
+        
+        try:
+            torrents = self.client.torrents_info(torrent_hashes="|".join(torrent_hashes))
+            return {str(t["hash"]).lower(): dict(t) for t in torrents}
+        
+        except Exception as e:
+            logger.error(f"Error getting torrents info: {e}")
+            self.last_error = str(e)
             return None
     
+    def torrents_add(self, urls: List[str], save_path: Optional[str] = None) -> bool:
+        """一次请求批量添加多个磁力链接
+        
+        qBittorrent只要有一个链接添加成功就返回"Ok."，调用方需要自行核对每个种子是否已存在。
+        """
+        self._ensure_connected()
+        assert self.client is not None  # 类型检查助手
+        
+        if not urls:
+            return True
+        
+        try:
+            result = self.client.torrents_add(
+                urls=urls,
+                save_path=save_path,
+                use_auto_torrent_management=False
+            )
+            logger.info(f"Added {len(urls)} magnets to qBittorrent: {result}")
+            return result == "Ok."
+        
+        except Exception as e:
+            logger.error(f"Error adding magnets to qBittorrent: {e}")
+            self.last_error = str(e)
+            return False
+    
     def get_torrent_files(self, torrent_hash: str) -> List[Dict[str, Any]]:
         """获取种子文件列表"""
         self._ensure_connected()
@@ -126,8 +184,23 @@ class QBittorrentClient:
                     
         except Exception as e:
             logger.error(f"Error getting torrent files: {e}")
+            self.last_error = str(e)
             return []
     
+    def set_file_priority(self, torrent_hash: str, file_ids: List[int], priority: int) -> bool:
+        """设置种子中指定文件的下载优先级（0表示不下载）"""
+        self._ensure_connected()
+        assert self.client is not None  # 类型检查助手
+        
+        try:
+            self.client.torrents_file_priority(torrent_hash=torrent_hash, file_ids=file_ids, priority=priority)
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error setting file priority: {e}")
+            self.last_error = str(e)
+            return False
+    
     def is_torrent_exists(self, magnet_url: str) -> bool:
         """检查种子是否已存在于qBittorrent中"""
         self._ensure_connected()
@@ -144,17 +217,408 @@ class QBittorrentClient:
                 
         except Exception as e:
             logger.error(f"Error checking if torrent exists: {e}")
+            self.last_error = str(e)
             return False
     
+    def sync_maindata(self, rid: int = 0) -> Dict[str, Any]:
+        """获取 /api/v2/sync/maindata 的增量数据（rid为0时返回全量数据）"""
+        self._ensure_connected()
+        assert self.client is not None  # 类型检查助手
+        
+        return dict(self.client.sync_maindata(rid=rid))
+    
     @staticmethod
     def extract_hash_from_magnet(magnet_url: str) -> Optional[str]:
-        """从磁力链接中提取hash"""
+        """从磁力链接中提取hash（32位base32编码的hash转换为40位十六进制）"""
         try:
             import re
-            match = re.search(r'xt=urn:btih:([a-fA-F0-9]{40})', magnet_url)
+            match = re.search(r'xt=urn:btih:([a-fA-F0-9]{40}|[a-zA-Z2-7]{32})(?![a-zA-Z0-9])', magnet_url, re.IGNORECASE)
             if match:
-                return match.group(1).lower()
+                value = match.group(1)
+                if len(value) == 32:
+                    import base64
+                    return base64.b32decode(value.upper()).hex()
+                return value.lower()
             return None
         except Exception as e:
             logger.error(f"Error extracting hash from magnet: {e}")
             return None
+
+
+
+class QBittorrentAPIError(Exception):
+    """qBittorrent Web API 请求失败"""
+
+
+class QBittorrentHealth:
+    """qBittorrent连接健康状态，连续失败后按指数退避暂停访问"""
+    
+    def __init__(self):
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[datetime] = None
+        self.retry_at: Optional[datetime] = None
+    
+    @property
+    def available(self) -> bool:
+        """连接健康，或退避时间已过可以再次尝试"""
+        return self.healthy or self.retry_at is None or datetime.utcnow() >= self.retry_at
+    
+    def record_success(self):
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.retry_at = None
+        self.last_success = datetime.utcnow()
+    
+    def record_failure(self, error: str):
+        self.healthy = False
+        self.consecutive_failures += 1
+        self.last_error = error
+        delay = min(HEALTH_BASE_BACKOFF * 2 ** (self.consecutive_failures - 1), HEALTH_MAX_BACKOFF)
+        self.retry_at = datetime.utcnow() + timedelta(seconds=delay)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "retry_at": self.retry_at.isoformat() if self.retry_at else None,
+        }
+
+
+class AsyncQBittorrentClient:
+    """基于aiohttp的qBittorrent Web API 异步客户端
+    
+    进程内长期复用一个带连接池的HTTP会话，只在收到401/403时（重新）登录。
+    """
+    
+    def __init__(self):
+        self.base_url = self._build_base_url(
+            CONFIG.download.qbittorrent_url,
+            CONFIG.download.qbittorrent_port
+        )
+        self.username = CONFIG.download.qbittorrent_username
+        self.password = CONFIG.download.qbittorrent_password
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.health = QBittorrentHealth()
+    
+    @staticmethod
+    def _build_base_url(host: str, port: int) -> str:
+        """拼接Web API地址，host可以带协议和端口"""
+        if "://" not in host:
+            host = f"http://{host}"
+        parsed = urlparse(host)
+        netloc = parsed.netloc if parsed.port else f"{parsed.netloc}:{port}"
+        return f"{parsed.scheme}://{netloc}{parsed.path.rstrip('/')}"
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取（必要时创建）长连接HTTP会话"""
+        if self.session is None or self.session.closed:
+            # qBittorrent通常通过IP地址访问，需要允许为IP地址保存cookie
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=QB_POOL_SIZE, keepalive_timeout=QB_KEEPALIVE_TIMEOUT),
+                timeout=aiohttp.ClientTimeout(total=30),
+                cookie_jar=aiohttp.CookieJar(unsafe=True)
+            )
+        return self.session
+    
+    async def close(self):
+        """注销并关闭HTTP会话（应用关闭时调用）"""
+        if self.session and not self.session.closed:
+            try:
+                await self._request("auth/logout", retry_auth=False)
+            except Exception as e:
+                logger.debug(f"Error logging out of qBittorrent: {e}")
+            await self.session.close()
+        self.session = None
+    
+    async def login(self):
+        """登录qBittorrent，会话cookie由aiohttp保存"""
+        session = self._get_session()
+        
+        try:
+            async with session.post(
+                f"{self.base_url}/api/v2/auth/login",
+                data={"username": self.username, "password": self.password},
+                headers={"Referer": self.base_url}
+            ) as response:
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to connect to qBittorrent: {e}")
+            self.health.record_failure(f"Failed to connect to qBittorrent: {e}")
+            raise QBittorrentAPIError(f"Failed to connect to qBittorrent: {e}") from e
+        
+        if response.status != 200 or text.strip() != "Ok.":
+            logger.error("Failed to login to qBittorrent - invalid credentials")
+            error_msg = f"Failed to login to qBittorrent: HTTP {response.status} {text.strip()}"
+            self.health.record_failure(error_msg)
+            raise QBittorrentAPIError(error_msg)
+        logger.debug("Successfully logged in to qBittorrent")
+    
+    async def _request(
+        self,
+        method: str,
+        data: Optional[Dict[str, Any]] = None,
+        multipart: bool = False,
+        as_json: bool = False,
+        retry_auth: bool = True
+    ) -> Any:
+        """发送Web API请求，遇到401/403时登录并重试一次"""
+        session = self._get_session()
+        url = f"{self.base_url}/api/v2/{method}"
+        
+        try:
+            for attempt in range(2):
+                body: Any = data
+                if multipart and data is not None:
+                    body = aiohttp.FormData()
+                    for key, value in data.items():
+                        body.add_field(key, str(value))
+                
+                async with session.post(url, data=body) as response:
+                    if response.status in (401, 403) and retry_auth and attempt == 0:
+                        logger.debug("Authenticating with qBittorrent")
+                        await self.login()
+                        continue
+                    if response.status != 200:
+                        text = await response.text()
+                        error_msg = f"qBittorrent API {method} failed: HTTP {response.status} {text.strip()}"
+                        if response.status >= 500:
+                            self.health.record_failure(error_msg)
+                        raise QBittorrentAPIError(error_msg)
+                    if as_json:
+                        result = await response.json(content_type=None)
+                    else:
+                        result = await response.text()
+                    self.health.record_success()
+                    return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error_msg = f"qBittorrent API {method} failed: {e!r}"
+            self.health.record_failure(error_msg)
+            raise QBittorrentAPIError(error_msg) from e
+        
+        raise QBittorrentAPIError(f"qBittorrent API {method} failed: unauthorized")
+    
+    async def add_magnet(self, magnet_url: str, save_path: Optional[str] = None) -> bool:
+        """添加磁力链接到qBittorrent"""
+        try:
+            # 首先检查种子是否已存在
+            if await self.is_torrent_exists(magnet_url):
+                logger.info(f"Torrent already exists, treating as successful: {magnet_url[:50]}...")
+                return True
+            
+            if await self.torrents_add([magnet_url], save_path):
+                logger.info(f"Successfully added magnet: {magnet_url[:50]}...")
+                return True
+            
+            logger.error(f"Failed to add magnet: {magnet_url[:50]}...")
+            return False
+        
+        except Exception as e:
+            logger.error(f"Error adding magnet to qBittorrent: {e}")
+            return False
+    
+    async def torrents_add(self, urls: List[str], save_path: Optional[str] = None) -> bool:
+        """一次请求批量添加多个磁力链接
+        
+        qBittorrent只要有一个链接添加成功就返回"Ok."，调用方需要自行核对每个种子是否已存在。
+        """
+        if not urls:
+            return True
+        
+        data: Dict[str, Any] = {"urls": "\n".join(urls), "autoTMM": "false"}
+        if save_path:
+            data["savepath"] = save_path
+        
+        try:
+            result = await self._request("torrents/add", data, multipart=True)
+            logger.info(f"Added {len(urls)} magnets to qBittorrent: {result}")
+            return result.strip() == "Ok."
+        
+        except Exception as e:
+            logger.error(f"Error adding magnets to qBittorrent: {e}")
+            return False
+    
+    async def torrents_info(self, torrent_hashes: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """批量获取种子信息（hash以 | 连接，一次请求）
+        
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: hash -> 种子信息，只包含qBittorrent中存在的种子；请求失败返回None
+        """
+        if not torrent_hashes:
+            return {}
+        
+        try:
+            torrents = await self._request("torrents/info", {"hashes": "|".join(torrent_hashes)}, as_json=True)
+            return {str(t["hash"]).lower(): t for t in torrents}
+        
+        except Exception as e:
+            logger.error(f"Error getting torrents info: {e}")
+            return None
+    
+    async def get_torrent_info(self, torrent_hash: str) -> Optional[Dict[str, Any]]:
+        """获取种子信息"""
+        torrents = await self.torrents_info([torrent_hash])
+        if torrents:
+            return next(iter(torrents.values()))
+        return None
+    
+    async def get_torrent_files(self, torrent_hash: str) -> List[Dict[str, Any]]:
+        """获取种子文件列表"""
+        try:
+            return await self._request("torrents/files", {"hash": torrent_hash}, as_json=True)
+        
+        except Exception as e:
+            logger.error(f"Error getting torrent files: {e}")
+            return []
+    
+    async def set_file_priority(self, torrent_hash: str, file_ids: List[int], priority: int) -> bool:
+        """设置种子中指定文件的下载优先级（0表示不下载）"""
+        try:
+            await self._request("torrents/filePrio", {
+                "hash": torrent_hash,
+                "id": "|".join(str(file_id) for file_id in file_ids),
+                "priority": priority
+            })
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error setting file priority: {e}")
+            return False
+    
+    async def is_torrent_exists(self, magnet_url: str) -> bool:
+        """检查种子是否已存在于qBittorrent中"""
+        torrent_hash = QBittorrentClient.extract_hash_from_magnet(magnet_url)
+        if not torrent_hash:
+            return False
+        return bool(await self.torrents_info([torrent_hash]))
+    
+    async def sync_maindata(self, rid: int = 0) -> Dict[str, Any]:
+        """获取 /api/v2/sync/maindata 的增量数据（rid为0时返回全量数据）"""
+        return await self._request("sync/maindata", {"rid": rid}, as_json=True)
+
+
+class ThreadedQBittorrentClient:
+    """兼容层：在线程池中调用基于qbittorrentapi的同步客户端，对外提供与AsyncQBittorrentClient相同的异步接口"""
+    
+    def __init__(self):
+        self.client = QBittorrentClient()
+        self.health = QBittorrentHealth()
+    
+    async def _call(self, func, *args):
+        try:
+            if self.client.client is None:
+                await asyncio.to_thread(self.client._connect)
+            self.client.last_error = None
+            result = await asyncio.to_thread(func, *args)
+        except Exception as e:
+            self.health.record_failure(str(e))
+            raise
+        # 同步客户端在方法内部捕获请求错误后只返回None/False，同样计为失败
+        if self.client.last_error is not None:
+            self.health.record_failure(self.client.last_error)
+        else:
+            self.health.record_success()
+        return result
+    
+    async def close(self):
+        if self.client.client is not None:
+            await asyncio.to_thread(self.client.__exit__, None, None, None)
+            self.client.client = None
+    
+    async def add_magnet(self, magnet_url: str, save_path: Optional[str] = None) -> bool:
+        return await self._call(self.client.add_magnet, magnet_url, save_path)
+    
+    async def torrents_add(self, urls: List[str], save_path: Optional[str] = None) -> bool:
+        return await self._call(self.client.torrents_add, urls, save_path)
+    
+    async def torrents_info(self, torrent_hashes: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        return await self._call(self.client.torrents_info, torrent_hashes)
+    
+    async def get_torrent_info(self, torrent_hash: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self.client.get_torrent_info, torrent_hash)
+    
+    async def get_torrent_files(self, torrent_hash: str) -> List[Dict[str, Any]]:
+        return await self._call(self.client.get_torrent_files, torrent_hash)
+    
+    async def set_file_priority(self, torrent_hash: str, file_ids: List[int], priority: int) -> bool:
+        return await self._call(self.client.set_file_priority, torrent_hash, file_ids, priority)
+    
+    async def is_torrent_exists(self, magnet_url: str) -> bool:
+        return await self._call(self.client.is_torrent_exists, magnet_url)
+    
+    async def sync_maindata(self, rid: int = 0) -> Dict[str, Any]:
+        return await self._call(self.client.sync_maindata, rid)
+
+
+AsyncQBittorrent = Union[AsyncQBittorrentClient, ThreadedQBittorrentClient]
+
+# 进程内共享的qBittorrent客户端
+_qbittorrent: Optional[AsyncQBittorrent] = None
+
+
+def get_qbittorrent() -> AsyncQBittorrent:
+    """获取进程内共享的长连接qBittorrent客户端（按配置选择实现）"""
+    global _qbittorrent
+    if _qbittorrent is None:
+        if CONFIG.download.qbittorrent_backend == "qbittorrentapi":
+            _qbittorrent = ThreadedQBittorrentClient()
+        else:
+            _qbittorrent = AsyncQBittorrentClient()
+    return _qbittorrent
+
+
+async def close_qbittorrent():
+    """关闭共享的qBittorrent客户端"""
+    global _qbittorrent
+    if _qbittorrent is not None:
+        await _qbittorrent.close()
+        _qbittorrent = None
+
+class QBittorrentSync:
+    """基于 sync/maindata 增量协议维护qBittorrent种子状态的内存镜像"""
+    
+    def __init__(self):
+        self.rid = 0
+        self.torrents: Dict[str, Dict[str, Any]] = {}
+    
+    def reset(self):
+        """清空镜像，下次同步时重新拉取全量数据"""
+        self.rid = 0
+        self.torrents = {}
+    
+    async def poll(self, qb_client: AsyncQBittorrent) -> Set[str]:
+        """拉取一次增量数据并合并到镜像
+        
+        Returns:
+            Set[str]: 状态发生变化（新增、更新或删除）的种子hash
+        """
+        data = await qb_client.sync_maindata(self.rid)
+        changed: Set[str] = set()
+        
+        torrents = data.get("torrents") or {}
+        if data.get("full_update"):
+            # 全量数据：替换整个镜像
+            changed.update(self.torrents)
+            self.torrents = {h.lower(): dict(info) for h, info in torrents.items()}
+            changed.update(self.torrents)
+        else:
+            # 增量数据：只包含变化的字段
+            for torrent_hash, delta in torrents.items():
+                torrent_hash = torrent_hash.lower()
+                self.torrents.setdefault(torrent_hash, {}).update(delta)
+                changed.add(torrent_hash)
+        
+        for torrent_hash in data.get("torrents_removed") or []:
+            torrent_hash = torrent_hash.lower()
+            self.torrents.pop(torrent_hash, None)
+            changed.add(torrent_hash)
+        
+        self.rid = data.get("rid", self.rid)
+        return changed
+    
+    def get(self, torrent_hash: str) -> Optional[Dict[str, Any]]:
+        """获取镜像中的种子信息"""
+        return self.torrents.get(torrent_hash.lower())
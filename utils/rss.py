@@ -1,62 +1,199 @@
-import aiohttp
+import asyncio
+import base64
+import hashlib
+import html
+import re
+import time
 import xml.etree.ElementTree as ET
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, List, Callable, AsyncContextManager, Tuple, Iterator
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import logging
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 from core.config import CONFIG
+from utils.http import http_request
 
 logger = logging.getLogger(__name__)
 
-async def get_rss_data(url: str, raise_on_error: bool = False) -> Optional[Dict[str, Any]]:
+# 同一feed（按规范化URL）在此时间窗口内只抓取、解析一次，结果由所有请求方共享（秒）
+FEED_SHARE_WINDOW = 60
+
+# 规范化URL -> (开始时间, 抓取任务, 该次抓取使用的条件请求信息)
+_shared_fetches: Dict[str, Tuple[float, asyncio.Task, Tuple[Optional[str], Optional[str], Optional[str]]]] = {}
+
+def normalize_feed_url(url: str) -> str:
+    """规范化feed地址：协议和主机名小写、去掉默认端口和片段、查询参数排序"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+async def fetch_rss_shared(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    digest: Optional[str] = None,
+    raise_on_error: bool = False,
+    limiter: Optional[Callable[[], AsyncContextManager]] = None
+) -> Optional[Dict[str, Any]]:
     """
-    获取RSS源数据
+    合并同一feed的抓取：同时发起的请求共享一次进行中的抓取，
+    FEED_SHARE_WINDOW 内的后续请求直接复用已解析的结果
+    
+    返回值与 fetch_rss_conditional 相同，"modified" 按本请求方自己的摘要计算。
+    limiter 为并发限制（如站点/全局信号量），只有真正发出请求的一方会占用。
     """
+    key = normalize_feed_url(url)
+    validators = (etag, last_modified, digest)
+    now = time.monotonic()
+    for stale_key in [k for k, (started, task, _) in _shared_fetches.items() if task.done() and now - started > FEED_SHARE_WINDOW]:
+        del _shared_fetches[stale_key]
+    
+    entry = _shared_fetches.get(key)
+    if entry is not None and _has_parse_error(entry[1]):
+        # 读取途中发现内容无效（如响应被截断）的结果不再复用，重新抓取
+        del _shared_fetches[key]
+        entry = None
+    if entry is None:
+        task = asyncio.create_task(_limited_fetch(url, etag, last_modified, digest, limiter))
+        task.add_done_callback(lambda t, key=key: _forget_failed_fetch(key, t))
+        entry = (now, task, validators)
+        _shared_fetches[key] = entry
+    else:
+        logger.debug(f"Sharing RSS fetch for {key}")
+    _, task, shared_validators = entry
+    
     try:
-        async with aiohttp.ClientSession() as session:
-            # 如果配置了代理，使用代理
-            content = None
-            if CONFIG.general.http_proxy:
-                logging.info(f"Using proxy: {CONFIG.general.http_proxy} for URL: {url}")
-                async with session.get(
-                    url, 
-                    timeout=aiohttp.ClientTimeout(total=30),
-                    proxy=CONFIG.general.http_proxy
-                ) as response:
-                    if response.status != 200:
-                        error_msg = f"获取RSS失败: HTTP {response.status}"
-                        logger.error(error_msg)
-                        if raise_on_error:
-                            raise RuntimeError(error_msg)
-                        return None
-                    
-                    content = await response.text()
-            else:
-                async with session.get(
-                    url, 
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status != 200:
-                        error_msg = f"获取RSS失败: HTTP {response.status}"
-                        logger.error(error_msg)
-                        if raise_on_error:
-                            raise RuntimeError(error_msg)
-                        return None
-                    
-                    content = await response.text()
-                    
-            # 尝试解析XML
-            if content:
-                try:
-                    root = ET.fromstring(content)
-                    return _parse_rss_xml(root)
-                except ET.ParseError as e:
-                    error_msg = f"RSS解析失败: {e}"
-                    logger.error(error_msg)
-                    if raise_on_error:
-                        raise RuntimeError(error_msg)
-                    return None
-            else:
+        # 某个请求方被取消时不影响其他共享同一抓取的请求方
+        result = await asyncio.shield(task)
+        if result["feed"] is None and validators != shared_validators and digest != result["digest"]:
+            # 共享的抓取对其发起方未变化（304或摘要相同），但本请求方需要完整内容，单独抓取
+            return await _limited_fetch(url, etag, last_modified, digest, limiter)
+    except Exception as e:
+        if raise_on_error:
+            raise
+        logger.warning(f"Shared RSS fetch failed for {url}: {e}")
+        return None
+    
+    if result["feed"] is None:
+        return dict(result, modified=False)
+    return dict(result, modified=result["digest"] != digest)
+
+async def _limited_fetch(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    digest: Optional[str],
+    limiter: Optional[Callable[[], AsyncContextManager]]
+) -> Dict[str, Any]:
+    """在并发限制下执行一次条件请求抓取，失败时抛出异常"""
+    if limiter is None:
+        result = await fetch_rss_conditional(url, etag, last_modified, digest, raise_on_error=True)
+    else:
+        async with limiter():
+            result = await fetch_rss_conditional(url, etag, last_modified, digest, raise_on_error=True)
+    if result is None:
+        raise RuntimeError("获取RSS失败: 内容为空")
+    return result
+
+def _has_parse_error(task: asyncio.Task) -> bool:
+    """已完成的共享抓取，其feed在读取途中是否遇到了无效的XML"""
+    if not task.done() or task.cancelled() or task.exception() is not None:
+        return False
+    feed = task.result()["feed"]
+    return feed is not None and feed.parse_error is not None
+
+def _forget_failed_fetch(key: str, task: asyncio.Task) -> None:
+    """失败的抓取不在窗口内复用，下一个请求方会重新抓取"""
+    if task.cancelled() or task.exception() is not None:
+        entry = _shared_fetches.get(key)
+        if entry is not None and entry[1] is task:
+            del _shared_fetches[key]
+
+async def get_rss_data(url: str, raise_on_error: bool = False) -> Optional["FeedStream"]:
+    """
+    获取RSS源数据（按需解析条目的FeedStream）
+    """
+    result = await fetch_rss_shared(url, raise_on_error=raise_on_error)
+    return result["feed"] if result else None
+
+async def fetch_rss_conditional(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    digest: Optional[str] = None,
+    raise_on_error: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    带条件请求的RSS抓取：发送 If-None-Match / If-Modified-Since，
+    服务器返回304或内容摘要与上次相同时不再解析XML
+    
+    Returns:
+        {"modified": 是否有变化, "feed": 增量解析的FeedStream（未变化时为None）, "etag", "last_modified", "digest"}，
+        失败时返回None
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    
+    try:
+        # 如果配置了代理，使用代理
+        if CONFIG.general.http_proxy:
+            logging.info(f"Using proxy: {CONFIG.general.http_proxy} for URL: {url}")
+        async with http_request("GET", url, headers=headers) as response:
+            if response.status == 304:
+                return {
+                    "modified": False,
+                    "feed": None,
+                    "etag": response.headers.get("ETag") or etag,
+                    "last_modified": response.headers.get("Last-Modified") or last_modified,
+                    "digest": digest,
+                }
+            
+            if response.status != 200:
+                error_msg = f"获取RSS失败: HTTP {response.status}"
+                logger.error(error_msg)
+                if raise_on_error:
+                    raise RuntimeError(error_msg)
+                return None
+            
+            body = await response.read()
+            new_digest = hashlib.sha256(body).hexdigest()
+            result = {
+                "modified": new_digest != digest,
+                "feed": None,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "digest": new_digest,
+            }
+            # 内容与上次相同，跳过解析
+            if not result["modified"]:
+                return result
+            
+            content = await response.text()
+        
+        # 解析到第一个条目为止，其余条目在读取时才解析
+        if content:
+            try:
+                result["feed"] = FeedStream(content)
+                return result
+            except ET.ParseError as e:
+                error_msg = f"RSS解析失败: {e}"
+                logger.error(error_msg)
+                if raise_on_error:
+                    raise RuntimeError(error_msg)
                 return None
+        else:
+            return None
     except Exception as e:
         error_msg = f"获取RSS异常: {e}"
         logger.error(error_msg)
@@ -64,145 +201,352 @@ async def get_rss_data(url: str, raise_on_error: bool = False) -> Optional[Dict[
             raise RuntimeError(error_msg)
         return None
 
-def _parse_rss_xml(root: ET.Element) -> Dict[str, Any]:
+# 增量解析时每次送入解析器的字符数
+FEED_PARSE_CHUNK = 64 * 1024
+
+_BTIH_RE = re.compile(r"btih:([0-9a-fA-F]{40}|[A-Za-z2-7]{32})(?![0-9A-Za-z])")
+_INFOHASH_RE = re.compile(r"[0-9a-fA-F]{40}")
+_SIZE_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)\s*([KMGT]i?B|B)?", re.IGNORECASE)
+_SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+# <a ... href="magnet:...">：标签和属性名不区分大小写，属性值可以用双引号、单引号或不加引号
+_MAGNET_HREF_RE = re.compile(
+    r"""<(?i:a)(?:\s[^>]*?)?\s(?i:href)\s*=\s*(?:"(magnet:[^"]*)"|'(magnet:[^']*)'|(magnet:[^\s>"']+))"""
+)
+
+def _btih_hex(value: str) -> str:
+    """磁力链接中的btih统一为小写的40位十六进制（32位的是base32编码）"""
+    if len(value) == 32:
+        return base64.b32decode(value.upper()).hex()
+    return value.lower()
+
+class FeedItem:
     """
-    解析RSS XML数据
+    RSS/Atom条目
+    
+    使用 __slots__ 存储解析出的字段；条目描述只在解析时用于提取磁力链接，不会保留。
     """
-    rss_data = {
-        "title": None,
-        "description": None,
-        "link": None,
-        "items": []
-    }
+    __slots__ = ("title", "link", "enclosure", "magnet", "infohash", "guid", "pub_date", "size")
     
-    # 查找channel元素
-    channel = root.find(".//channel")
-    if channel is None:
-        # 尝试查找feed元素（Atom格式）
-        if root.tag.endswith("feed"):
-            return _parse_atom_xml(root)
-        return rss_data
+    def __init__(
+        self,
+        title: Optional[str] = None,
+        link: Optional[str] = None,
+        enclosure: Optional[str] = None,
+        magnet: Optional[str] = None,
+        infohash: Optional[str] = None,
+        guid: Optional[str] = None,
+        pub_date: Optional[str] = None,
+        size: Optional[int] = None
+    ):
+        self.title = title
+        self.link = link
+        self.enclosure = enclosure
+        self.magnet = magnet
+        self.infohash = infohash
+        self.guid = guid
+        self.pub_date = pub_date
+        self.size = size  # 字节数，feed未提供时为None
     
-    # 获取频道信息
-    title_elem = channel.find("title")
-    if title_elem is not None:
-        rss_data["title"] = title_elem.text
+    def __repr__(self) -> str:
+        return f"FeedItem({self.to_dict()!r})"
     
-    desc_elem = channel.find("description")
-    if desc_elem is not None:
-        rss_data["description"] = desc_elem.text
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FeedItem):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
     
-    link_elem = channel.find("link")
-    if link_elem is not None:
-        rss_data["link"] = link_elem.text
+    def to_dict(self) -> Dict[str, Any]:
+        """非空字段组成的字典"""
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
     
-    # 获取条目
-    items = channel.findall("item")
-    for item in items:
-        item_data = {}
-        
-        title_elem = item.find("title")
-        if title_elem is not None:
-            item_data["title"] = title_elem.text
-        
-        link_elem = item.find("link")
-        if link_elem is not None:
-            item_data["link"] = link_elem.text
-        
-        desc_elem = item.find("description")
-        if desc_elem is not None:
-            item_data["description"] = desc_elem.text
+    @property
+    def key(self) -> Optional[str]:
+        """条目在feed内的标识：GUID，其次是infohash（feed给出或从链接中提取），再次是种子/条目链接"""
+        if self.guid:
+            return f"guid:{self.guid}"
+        if self.infohash:
+            return f"btih:{self.infohash}"
+        for link in (self.magnet, self.enclosure, self.link):
+            if link:
+                match = _BTIH_RE.search(link)
+                if match:
+                    return f"btih:{_btih_hex(match.group(1))}"
+        return self.enclosure or self.link
+
+class FeedStream:
+    """
+    增量解析的RSS/Atom feed
+    
+    条目在被读取时才解析（已解析的条目会缓存，多个读取方共享），
+    读取方可以在遇到上次处理过的条目时停止，不必解析整个feed。
+    读取途中遇到无效的XML（如被截断的响应）时停止迭代，错误记录在 parse_error 中。
+    """
+    
+    def __init__(self, content: str):
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.link: Optional[str] = None
+        self._content = content
+        self._offset = 0
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._closed = False
+        self._done = False
+        self._path: List[str] = []  # 当前元素路径（去掉命名空间的标签名）
+        self._container: Optional[ET.Element] = None  # channel（RSS）或 feed（Atom）元素
+        self._atom_ns: Optional[Dict[str, str]] = None  # Atom命名空间，RSS为None
+        self._items: List[FeedItem] = []
+        self.parse_error: Optional[ET.ParseError] = None
+        # 先解析到第一个条目，得到频道信息，同时尽早发现无效的XML
+        self._parse_next_item()
+        if self.parse_error is not None and not self._items:
+            raise self.parse_error
+    
+    def __iter__(self) -> Iterator[FeedItem]:
+        index = 0
+        while index < len(self._items) or self._parse_next_item():
+            yield self._items[index]
+            index += 1
+    
+    def items_until(self, stop_key: Optional[str]) -> List[FeedItem]:
+        """按feed顺序返回条目，遇到标识为stop_key的条目时停止（不包含该条目）
         
-        pub_date_elem = item.find("pubDate")
-        if pub_date_elem is not None:
-            item_data["pub_date"] = pub_date_elem.text
+        停止位置只在feed确实按发布时间从新到旧排列时可信：停止条目不晚于它之前的条目，也不早于它之后的条目。
+        发布时间缺失或顺序不符（如从旧到新排列的feed）时返回全部条目，由条目索引跳过已入库的条目。
+        """
+        items = []
+        for index, item in enumerate(self):
+            if stop_key and item.key == stop_key:
+                if self._newest_first_at(index):
+                    return items
+                logger.debug(f"Feed is not ordered newest-first around {stop_key}, parsing all items")
+                return list(self)
+            items.append(item)
+        return items
+    
+    def _newest_first_at(self, index: int) -> bool:
+        """第index个条目及之前的条目、以及它之后的一个条目，是否按发布时间从新到旧排列"""
+        while len(self._items) <= index + 1 and self._parse_next_item():
+            pass
+        dates = [_pub_date_order_key(item.pub_date) for item in self._items[:index + 2]]
+        if any(date is None for date in dates):
+            return False
+        return all(newer >= older for newer, older in zip(dates, dates[1:]))
+    
+    @property
+    def first_item(self) -> Optional[FeedItem]:
+        """feed中第一个（最新的）条目，只解析到该条目为止"""
+        return next(iter(self), None)
+    
+    @property
+    def newest_key(self) -> Optional[str]:
+        """feed中第一个（最新的）条目的标识"""
+        item = self.first_item
+        return item.key if item else None
+    
+    def _parse_next_item(self) -> bool:
+        """继续解析直到得到下一个条目，没有更多条目或XML无效时返回False"""
+        try:
+            while not self._done:
+                for event, elem in self._parser.read_events():
+                    if self._handle_event(event, elem):
+                        return True
+                if self._closed:
+                    self._done = True
+                    # 解析完毕，释放原始内容
+                    self._content = ""
+                elif self._offset < len(self._content):
+                    self._parser.feed(self._content[self._offset:self._offset + FEED_PARSE_CHUNK])
+                    self._offset += FEED_PARSE_CHUNK
+                else:
+                    self._closed = True
+                    self._parser.close()
+        except ET.ParseError as e:
+            # 已解析的条目仍然有效，之后的内容无法解析，停止迭代
+            logger.warning(f"Feed parse error after {len(self._items)} items: {e}")
+            self.parse_error = e
+            self._done = True
+            self._content = ""
+        return False
+    
+    def _handle_event(self, event: str, elem: ET.Element) -> bool:
+        """处理一个解析事件，完成一个条目时返回True"""
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            self._path.append(tag)
+            if len(self._path) == 1 and tag == "feed":
+                self._container = elem
+                self._atom_ns = {"atom": elem.tag[1:].split("}")[0]} if elem.tag.startswith("{") else {}
+            elif tag == "channel" and self._atom_ns is None and self._container is None:
+                self._container = elem
+            return False
         
-        # 查找enclosure或magnet链接
-        enclosure_elem = item.find("enclosure")
-        if enclosure_elem is not None:
-            item_data["enclosure"] = enclosure_elem.get("url")
+        self._path.pop()
+        parent = self._path[-1] if self._path else None
+        if self._container is None or parent != self._container.tag.rsplit("}", 1)[-1]:
+            return False
         
-        # 查找magnet链接（通常在description中）
-        if "description" in item_data and item_data["description"]:
-            soup = BeautifulSoup(item_data["description"], 'html.parser')
-            links = soup.find_all("a")
-            for link in links:
-                try:
-                    # 尝试获取 href 属性
-                    href = None
-                    if hasattr(link, 'get'):
-                        href = link.get("href")  # type: ignore
-                    if href and isinstance(href, str) and href.startswith("magnet:"):
-                        item_data["magnet"] = href
-                        break
-                except:
-                    continue
+        if self._atom_ns is None:
+            if tag == "item":
+                self._items.append(_parse_rss_item(elem))
+            elif tag in ("title", "description", "link"):
+                setattr(self, tag, elem.text)
+                return False
+            else:
+                return False
+        else:
+            if tag == "entry":
+                self._items.append(_parse_atom_entry(elem, self._atom_ns))
+            elif tag == "title":
+                self.title = elem.text
+                return False
+            elif tag == "subtitle":
+                self.description = elem.text
+                return False
+            elif tag == "link":
+                if self.link is None:
+                    self.link = elem.get("href")
+                return False
+            else:
+                return False
         
-        rss_data["items"].append(item_data)
-    
-    return rss_data
+        # 条目已转换为字典，释放其元素
+        self._container.remove(elem)
+        return True
 
-def _parse_atom_xml(root: ET.Element) -> Dict[str, Any]:
+def _parse_rss_item(item: ET.Element) -> FeedItem:
     """
-    解析Atom XML数据
+    解析RSS条目
     """
-    rss_data = {
-        "title": None,
-        "description": None,
-        "link": None,
-        "items": []
-    }
+    feed_item = FeedItem(
+        title=item.findtext("title"),
+        link=item.findtext("link"),
+        pub_date=item.findtext("pubDate"),
+    )
     
-    # 获取命名空间
-    ns = {"atom": root.tag.split("}")[0][1:]} if "}" in root.tag else {}
+    guid = item.findtext("guid")
+    if guid:
+        feed_item.guid = guid.strip()
     
-    # 获取feed信息
-    title_elem = root.find("atom:title", ns) if ns else root.find("title")
-    if title_elem is not None:
-        rss_data["title"] = title_elem.text
+    # 查找enclosure或magnet链接
+    enclosure_elem = item.find("enclosure")
+    if enclosure_elem is not None:
+        feed_item.enclosure = enclosure_elem.get("url")
+        feed_item.size = _parse_size(enclosure_elem.get("length"))
+    
+    # 扩展命名空间中的infohash/磁力链接/体积（nyaa:infoHash、torrent:infoHash、torrent:magnetURI、nyaa:size、Mikan的torrent/contentLength和torrent/pubDate）
+    for child in item:
+        name = child.tag.rsplit("}", 1)[-1] if isinstance(child.tag, str) else ""
+        if name == "infoHash" and child.text and _INFOHASH_RE.fullmatch(child.text.strip()):
+            feed_item.infohash = child.text.strip().lower()
+        elif name == "magnetURI" and child.text and child.text.strip().startswith("magnet:") and not feed_item.magnet:
+            feed_item.magnet = child.text.strip()
+        elif name in ("size", "contentLength"):
+            feed_item.size = _parse_size(child.text) or feed_item.size
+        elif name == "torrent":
+            for grandchild in child:
+                grandchild_name = grandchild.tag.rsplit("}", 1)[-1] if isinstance(grandchild.tag, str) else ""
+                if grandchild_name == "contentLength":
+                    feed_item.size = _parse_size(grandchild.text) or feed_item.size
+                elif grandchild_name == "pubDate" and not feed_item.pub_date:
+                    # Mikan的发布时间只在torrent/pubDate中给出
+                    feed_item.pub_date = grandchild.text
+    
+    # 查找magnet链接（通常在description中）
+    description = item.findtext("description")
+    if not feed_item.magnet and description:
+        feed_item.magnet = extract_magnet_link(description)
+    
+    return feed_item
+
+def _parse_size(text: Optional[str]) -> Optional[int]:
+    """解析条目体积：字节数，或 "1.4 GiB" / "700MB" 这样带单位的写法"""
+    match = _SIZE_RE.fullmatch((text or "").strip())
+    if not match:
+        return None
+    size = float(match.group(1)) * _SIZE_UNITS[(match.group(2) or "b").lower().replace("i", "")]
+    # 部分站点把enclosure长度写成0或1，视为未知
+    return int(size) if size > 1 else None
+
+def parse_pub_date(text: Optional[str]) -> Optional[datetime]:
+    """解析条目发布时间（RSS的RFC 822格式或Atom的ISO 8601格式），返回UTC时间
+    
+    不带时区的时间（如Mikan的torrent/pubDate）无法确定对应的UTC时间，视为未知
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        value = parsedate_to_datetime(text)
+        if value.tzinfo is None:
+            # RFC 822中的 -0000（如nyaa）表示UTC
+            value = value.replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError, IndexError):
+        try:
+            value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if value.tzinfo is None:
+            return None
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _pub_date_order_key(text: Optional[str]) -> Optional[datetime]:
+    """用于比较条目先后的发布时间：同一feed内时区一致，不带时区的时间也可以比较"""
+    value = parse_pub_date(text)
+    if value is None and text:
+        try:
+            value = datetime.fromisoformat(text.strip())
+        except ValueError:
+            return None
+    return value
+
+def extract_magnet_link(description: str) -> Optional[str]:
+    """
+    从条目描述HTML中提取第一个 <a href="magnet:..."> 链接
     
-    subtitle_elem = root.find("atom:subtitle", ns) if ns else root.find("subtitle")
-    if subtitle_elem is not None:
-        rss_data["description"] = subtitle_elem.text
+    先用预编译的正则扫描原始文本，只有包含magnet:但正则未命中的少见写法才交给lxml解析
+    """
+    if "magnet:" not in description:
+        return None
+    match = _MAGNET_HREF_RE.search(description)
+    if match:
+        return html.unescape(next(group for group in match.groups() if group))
+    try:
+        fragment = lxml_html.fragment_fromstring(description, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return None
+    for href in fragment.xpath(".//a/@href"):
+        if href.startswith("magnet:"):
+            return href
+    return None
+
+def _parse_atom_entry(entry: ET.Element, ns: Dict[str, str]) -> FeedItem:
+    """
+    解析Atom条目
+    """
+    feed_item = FeedItem(
+        title=entry.findtext("atom:title", namespaces=ns) if ns else entry.findtext("title"),
+        pub_date=entry.findtext("atom:updated", namespaces=ns) if ns else entry.findtext("updated"),
+    )
     
-    link_elem = root.find("atom:link", ns) if ns else root.find("link")
+    link_elem = entry.find("atom:link", ns) if ns else entry.find("link")
     if link_elem is not None:
-        rss_data["link"] = link_elem.get("href")
+        feed_item.link = link_elem.get("href")
     
-    # 获取条目
-    entries = root.findall("atom:entry", ns) if ns else root.findall("entry")
-    for entry in entries:
-        item_data = {}
-        
-        title_elem = entry.find("atom:title", ns) if ns else entry.find("title")
-        if title_elem is not None:
-            item_data["title"] = title_elem.text
-        
-        link_elem = entry.find("atom:link", ns) if ns else entry.find("link")
-        if link_elem is not None:
-            item_data["link"] = link_elem.get("href")
-        
-        content_elem = entry.find("atom:content", ns) if ns else entry.find("content")
-        if content_elem is not None:
-            item_data["description"] = content_elem.text
-        
-        updated_elem = entry.find("atom:updated", ns) if ns else entry.find("updated")
-        if updated_elem is not None:
-            item_data["pub_date"] = updated_elem.text
-        
-        rss_data["items"].append(item_data)
+    entry_id = entry.findtext("atom:id", namespaces=ns) if ns else entry.findtext("id")
+    if entry_id:
+        feed_item.guid = entry_id.strip()
     
-    return rss_data
+    return feed_item
 
-async def get_rss_title(url: str, data=None) -> Optional[str]:
+async def get_rss_title(url: str, data: Optional[FeedStream] = None) -> Optional[str]:
     """
-    获取RSS源的标题
+    获取RSS源的标题（只需解析到第一个条目）
     """
     if data is None:
         data = await get_rss_data(url)
     
-    if data and "title" in data:
-        title = data["title"]
+    if data:
+        title = data.title
         if title:
             # 清理标题，移除多余的空白字符
             title = title.strip()
@@ -214,7 +558,7 @@ async def get_rss_title(url: str, data=None) -> Optional[str]:
     
     return None
 
-async def get_item_titles(url: str, data=None) -> Optional[List[str]]:
+async def get_item_titles(url: str, data: Optional[FeedStream] = None) -> Optional[List[str]]:
     """
     获取RSS源的所有条目标题
     """
@@ -222,24 +566,18 @@ async def get_item_titles(url: str, data=None) -> Optional[List[str]]:
         data = await get_rss_data(url)
     
     if data:
-        titles = []
-        for item in data.get("items", []):
-            if "title" in item:
-                titles.append(item["title"])
-        return titles
+        return [item.title for item in data if item.title is not None]
 
     return None
 
-async def get_first_item(url: str, data=None) -> Optional[Dict[str, Any]]:
+async def get_first_item(url: str, data: Optional[FeedStream] = None) -> Optional[FeedItem]:
     """
-    获取RSS源的第一个条目
+    获取RSS源的第一个条目（只解析到该条目为止）
     """
     if data is None:
         data = await get_rss_data(url)
     
-    if data and data.get("items"):
-        items = data.get("items", [])
-        if items:
-            return items[0]
+    if data:
+        return data.first_item
     
     return None
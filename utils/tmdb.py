@@ -1,6 +1,7 @@
 from schemas.source import AnalyzeSourceResponse
 from utils.rss import get_rss_title, get_rss_data
 from core.config import load_config
+from utils.http import http_request
 import logging
 import aiohttp
 import asyncio
@@ -49,22 +50,22 @@ async def search_tmdb(title: str, raise_on_error: bool = False) -> List[Dict]:
             }
             if language:
                 params['language'] = language
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    search_url,
-                    headers=headers,
-                    params=params,
-                    proxy=proxy,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('results', [])
-                    message = f"TMDB请求失败: HTTP {response.status}"
-                    logger.error(message)
-                    if raise_on_error:
-                        raise RuntimeError(message)
-                    return []
+            async with http_request(
+                "GET",
+                search_url,
+                headers=headers,
+                params=params,
+                proxy=proxy,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get('results', [])
+                message = f"TMDB请求失败: HTTP {response.status}"
+                logger.error(message)
+                if raise_on_error:
+                    raise RuntimeError(message)
+                return []
 
         system_lang = (getattr(config.general, "system_lang", "") or "")
         preferred_lang = _language_from_system(system_lang)
@@ -165,48 +166,48 @@ async def get_tmdb_tv_details(tv_id: int, raise_on_error: bool = False) -> Optio
             proxy = config.general.http_proxy
         
         # 发起HTTP请求
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                tv_url, 
-                headers=headers, 
-                params=params,
-                proxy=proxy,
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # 处理季度信息
-                    seasons = []
-                    for season in data.get('seasons', []):
-                        if season.get('season_number', 0) > 0:  # 排除特别篇（season 0）
-                            seasons.append({
-                                'season_number': season.get('season_number'),
-                                'name': season.get('name'),
-                                'episode_count': season.get('episode_count'),
-                                'air_date': season.get('air_date'),
-                                'overview': season.get('overview')
-                            })
-                    
-                    return {
-                        'id': data.get('id'),
-                        'name': data.get('name'),
-                        'original_name': data.get('original_name'),
-                        'overview': data.get('overview'),
-                        'number_of_seasons': data.get('number_of_seasons'),
-                        'number_of_episodes': data.get('number_of_episodes'),
-                        'seasons': seasons,
-                        'first_air_date': data.get('first_air_date'),
-                        'last_air_date': data.get('last_air_date'),
-                        'status': data.get('status')
-                    }
-                else:
-                    message = f"TMDB详情请求失败: HTTP {response.status}"
-                    logger.error(message)
-                    if raise_on_error:
-                        raise RuntimeError(message)
-                    return None
-                    
+        async with http_request(
+            "GET",
+            tv_url,
+            headers=headers, 
+            params=params,
+            proxy=proxy,
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as response:
+            if response.status == 200:
+                data = await response.json()
+                
+                # 处理季度信息
+                seasons = []
+                for season in data.get('seasons', []):
+                    if season.get('season_number', 0) > 0:  # 排除特别篇（season 0）
+                        seasons.append({
+                            'season_number': season.get('season_number'),
+                            'name': season.get('name'),
+                            'episode_count': season.get('episode_count'),
+                            'air_date': season.get('air_date'),
+                            'overview': season.get('overview')
+                        })
+                
+                return {
+                    'id': data.get('id'),
+                    'name': data.get('name'),
+                    'original_name': data.get('original_name'),
+                    'overview': data.get('overview'),
+                    'number_of_seasons': data.get('number_of_seasons'),
+                    'number_of_episodes': data.get('number_of_episodes'),
+                    'seasons': seasons,
+                    'first_air_date': data.get('first_air_date'),
+                    'last_air_date': data.get('last_air_date'),
+                    'status': data.get('status')
+                }
+            else:
+                message = f"TMDB详情请求失败: HTTP {response.status}"
+                logger.error(message)
+                if raise_on_error:
+                    raise RuntimeError(message)
+                return None
+                
     except asyncio.TimeoutError:
         message = "TMDB详情请求超时"
         logger.error(message)